@@ -0,0 +1,67 @@
+"""
+Benchmark of the per-toolchain compiler pool.
+
+Runs a few hundred compilations of the stub compiler through InstallerFlyweight and reports
+throughput, the time per compilation and the number of processes started for several
+concurrency limits. Compilations are queued with ``submit``, whose bounded queue makes the
+producer wait whenever ``max_pending`` compilations are already waiting.
+
+Usage (from the InstallerGenerator directory):
+    python -m benchmarks.bench_compiler_pool [--compilations 300] [--delay 0.0] [--concurrency 1 2 4 8]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from core.factories.flyweight import InstallerFlyweight
+
+STUB_COMPILER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stub_compiler.py')
+
+
+def run_pool(compilations: int, delay: float, max_concurrency: int, max_pending: int, output_directory: str) -> dict:
+    """
+    Compile ``compilations`` stub outputs through a fresh pool and return its statistics.
+    """
+    flyweight = InstallerFlyweight('bench', {'python': sys.executable}, max_concurrency=max_concurrency,
+                                   max_pending=max_pending)
+    start = time.perf_counter()
+    futures = [flyweight.submit([sys.executable, STUB_COMPILER, '--delay', str(delay),
+                                 '-o', os.path.join(output_directory, f"out_{index}.bin")],
+                                on_output=lambda line: None)
+               for index in range(compilations)]
+    failures = sum(1 for future in futures if future.result().returncode != 0)
+    elapsed = time.perf_counter() - start
+    flyweight.shutdown()
+    return {
+        'concurrency': max_concurrency,
+        'seconds': elapsed,
+        'per_compilation_ms': elapsed / compilations * 1000,
+        'compilations_per_second': compilations / elapsed,
+        'spawned': flyweight.spawned,
+        'failures': failures,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the compiler pool with the stub compiler.")
+    parser.add_argument("--compilations", type=int, default=300)
+    parser.add_argument("--delay", type=float, default=0.0, help="Simulated compile time of the stub in seconds.")
+    parser.add_argument("--concurrency", type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--max-pending", type=int, default=16)
+    arguments = parser.parse_args()
+
+    print(f"{arguments.compilations} stub compilations, {arguments.delay * 1000:.0f} ms simulated compile time, "
+          f"queue limit {arguments.max_pending}")
+    print(f"{'concurrency':>12}{'seconds':>10}{'ms/compile':>12}{'compiles/s':>12}{'spawned':>9}{'failed':>8}")
+    for max_concurrency in arguments.concurrency:
+        with tempfile.TemporaryDirectory() as output_directory:
+            result = run_pool(arguments.compilations, arguments.delay, max_concurrency, arguments.max_pending,
+                              output_directory)
+        print(f"{result['concurrency']:>12}{result['seconds']:>10.2f}{result['per_compilation_ms']:>12.1f}"
+              f"{result['compilations_per_second']:>12.1f}{result['spawned']:>9}{result['failures']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark of the build profiles: compile time versus installer size.
+
+Builds an MSI and an EXE installer of synthetic payloads with every build profile and
+reports the compile time and the installer size per profile. The payloads stand in for
+typical installer contents:
+
+    text     Source code and configuration: many small, highly compressible files.
+    binary   Already compressed media and archives: few large, incompressible files.
+    mixed    An application: executables, libraries with repeated sections and data files.
+
+By default the compilers are replaced by the stub compiler in ``--compress`` mode, which
+compresses the payload with the zlib or lzma settings closest to each profile; pass
+``--toolchain configured`` to run the candle, light and ISCC configured in base_config.
+
+Usage (from the InstallerGenerator directory):
+    python -m benchmarks.bench_compression_profiles [--size-mb 16] [--runs 3] [--payloads text binary mixed]
+        [--profiles fast balanced release] [--toolchain stub|configured] [--json results.json]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from core.factories.creator_factory import InstallerCreatorFactory
+from core.profiles import PROFILES
+
+STUB_COMPILER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stub_compiler.py')
+
+WORDS = ("installer component directory feature product package media cabinet file source "
+         "compression profile release build version manifest registry shortcut service").split()
+
+
+def text_file(rng: random.Random, size: int) -> bytes:
+    lines = []
+    while sum(map(len, lines)) < size:
+        lines.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 12))) + f" = {rng.randint(0, 999)};\n")
+    return "".join(lines).encode('ascii')[:size]
+
+
+def binary_file(rng: random.Random, size: int) -> bytes:
+    return rng.randbytes(size)
+
+
+def library_file(rng: random.Random, size: int) -> bytes:
+    sections = [rng.randbytes(rng.randint(256, 4096)) for _ in range(8)]
+    chunks = []
+    while sum(map(len, chunks)) < size:
+        chunks.append(rng.choice(sections) if rng.random() < 0.7 else rng.randbytes(1024))
+    return b"".join(chunks)[:size]
+
+
+def generate_payload(kind: str, directory: str, total_bytes: int, seed: int = 0) -> List[str]:
+    """
+    Write a synthetic payload of about ``total_bytes`` bytes and return its relative paths.
+    """
+    rng = random.Random(seed)
+    if kind == 'text':
+        layout = [(text_file, 4 * 1024, 'src', '.py')]
+    elif kind == 'binary':
+        layout = [(binary_file, 2 * 1024 * 1024, 'media', '.bin')]
+    else:
+        layout = [(library_file, 256 * 1024, 'bin', '.dll'), (text_file, 16 * 1024, 'config', '.ini'),
+                  (binary_file, 512 * 1024, 'data', '.pak')]
+
+    files = []
+    written = 0
+    while written < total_bytes:
+        generator, file_size, folder, extension = layout[len(files) % len(layout)]
+        path = os.path.join(folder, f"sub{len(files) % 7}", f"file_{len(files)}{extension}")
+        os.makedirs(os.path.join(directory, os.path.dirname(path)), exist_ok=True)
+        with open(os.path.join(directory, path), 'wb') as payload_file:
+            payload_file.write(generator(rng, file_size))
+        files.append(path)
+        written += file_size
+    return files
+
+
+def build(installer_type: str, profile: str, source_directory: str, files: List[str], output_directory: str,
+          toolchain: str) -> Dict[str, float]:
+    """
+    Build one installer and return its compile time in seconds and its size in bytes.
+    """
+    creator_class = InstallerCreatorFactory.creator_class(installer_type)
+    creator = creator_class(source_directory, output_directory, files, f"{installer_type.lower()}_{profile}",
+                            profile=profile)
+    steps = creator.prepare_build()
+    start = time.perf_counter()
+    for step in steps:
+        command = step.command
+        if toolchain == 'stub':
+            command = [sys.executable, STUB_COMPILER, '--compress', *command[1:]]
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(f"{step.name} failed for {installer_type} {profile}:\n{completed.stdout}{completed.stderr}")
+    seconds = time.perf_counter() - start
+    size = os.path.getsize(creator.output_path())
+    creator.finish_build()
+    return {'seconds': seconds, 'bytes': size}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure compile time and installer size of the build profiles.")
+    parser.add_argument("--size-mb", type=float, default=16.0, help="Size of every synthetic payload in MiB.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--payloads", nargs='+', choices=['text', 'binary', 'mixed'], default=['text', 'binary', 'mixed'])
+    parser.add_argument("--profiles", nargs='+', choices=list(PROFILES), default=list(PROFILES))
+    parser.add_argument("--types", nargs='+', choices=InstallerCreatorFactory.installer_types(),
+                        default=InstallerCreatorFactory.installer_types())
+    parser.add_argument("--toolchain", choices=['stub', 'configured'], default='stub')
+    parser.add_argument("--json", help="Write the results to this JSON file.")
+    arguments = parser.parse_args()
+    total_bytes = int(arguments.size_mb * 1024 * 1024)
+
+    results = []
+    print(f"{'payload':<8}{'type':<6}{'profile':<10}{'seconds':>10}{'size MiB':>10}{'ratio':>8}")
+    for payload in arguments.payloads:
+        with tempfile.TemporaryDirectory() as source_directory, tempfile.TemporaryDirectory() as output_directory:
+            files = generate_payload(payload, source_directory, total_bytes)
+            payload_bytes = sum(os.path.getsize(os.path.join(source_directory, file)) for file in files)
+            for installer_type in arguments.types:
+                for profile in arguments.profiles:
+                    runs = [build(installer_type, profile, source_directory, files, output_directory,
+                                  arguments.toolchain) for _ in range(arguments.runs)]
+                    result = {
+                        'payload': payload,
+                        'payload_bytes': payload_bytes,
+                        'files': len(files),
+                        'installer_type': installer_type,
+                        'profile': profile,
+                        'seconds': statistics.median(run['seconds'] for run in runs),
+                        'bytes': runs[-1]['bytes'],
+                    }
+                    result['ratio'] = result['bytes'] / payload_bytes
+                    results.append(result)
+                    print(f"{payload:<8}{installer_type:<6}{profile:<10}{result['seconds']:>10.2f}"
+                          f"{result['bytes'] / 1024 ** 2:>10.2f}{result['ratio']:>8.3f}")
+
+    if arguments.json:
+        with open(arguments.json, 'w') as results_file:
+            json.dump({'toolchain': arguments.toolchain, 'results': results}, results_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
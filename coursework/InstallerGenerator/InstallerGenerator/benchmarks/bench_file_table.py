@@ -0,0 +1,117 @@
+"""
+Benchmark of the file table shared by the script emitters.
+
+Compares the per-file data the WiX and Inno Setup emitters consume when it is derived from
+the plain file list on every pass, as the creators used to do, with the same data read from
+the compact FileTable, and the memory a file list keeps per file with the memory of a table.
+
+Usage (from the InstallerGenerator directory):
+    python -m benchmarks.bench_file_table [--sizes 10000 100000 250000]
+"""
+import argparse
+import gc
+import os
+import time
+import tracemalloc
+import uuid
+from collections import deque
+from typing import Callable, Iterator, List, Tuple
+
+from core.creators.exe_creator import EXECreator
+from core.creators.msi_creator import GUID_NAMESPACE, MSICreator
+from core.file_table import FileTable, normalize_path
+
+
+def synthetic_paths(count: int) -> List[str]:
+    """
+    Build a file list of the given size spread over a few hundred nested directories.
+    """
+    return [os.path.join(f"dir{index % 97}", f"sub{index % 13}", f"file_{index}.dat") for index in range(count)]
+
+
+def legacy_component_contexts(creator: MSICreator) -> Iterator[dict]:
+    """
+    The WiX component and component reference values as they were derived before the file table.
+    """
+    def sorted_files() -> List[str]:
+        return sorted(creator.file_list, key=normalize_path)
+
+    shared_files = set(creator.shared_files)
+    own_files = [file for file in sorted_files() if file not in shared_files]
+    files_per_cabinet = creator.profile.files_per_cabinet or max(len(own_files), 1)
+    disk_ids = {file: position // files_per_cabinet + 1 for position, file in enumerate(own_files)}
+    disk_ids.update((file, 2) for file in sorted_files() if file in shared_files)
+    for file in sorted_files():
+        disk_id = disk_ids[file]
+        yield {
+            'id': os.path.basename(file),
+            'guid': str(uuid.uuid5(GUID_NAMESPACE, f"component:{creator.installer_name}:{normalize_path(file)}")).upper(),
+            'source': file,
+            'disk_id': disk_id if disk_id != 1 else '',
+        }
+    for file in sorted_files():
+        yield {'id': os.path.basename(file)}
+
+
+def table_component_contexts(creator: MSICreator) -> Iterator[dict]:
+    """
+    The WiX component and component reference values read from the creator's file table.
+    """
+    disk_ids, _ = creator.disk_ids()
+    yield from creator.iter_component_contexts(disk_ids)
+    yield from creator.iter_component_ref_contexts()
+
+
+def legacy_file_contexts(creator: EXECreator) -> Iterator[dict]:
+    """
+    The Inno Setup [Files] values as they were derived before the file table.
+    """
+    return ({'source': os.path.join(creator.source_directory, file), 'dest_dir': '{app}'} for file in creator)
+
+
+def measure(action: Callable[[], object]) -> Tuple[float, int, int]:
+    """
+    Run an action and return its duration, its peak traced memory and the memory still held by its result.
+    """
+    gc.collect()
+    start = time.perf_counter()
+    action()
+    duration = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    result = action()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return duration, peak, current
+
+
+def run(sizes: List[int]) -> None:
+    """
+    Run the benchmark for every file list size and print a result table.
+    """
+    print(f"{'case':<22}{'files':>10}{'seconds':>10}{'us/file':>10}{'peak B/file':>13}{'held B/file':>13}")
+    for size in sizes:
+        paths = synthetic_paths(size)
+
+        def drain(contexts: Iterator[dict]) -> None:
+            deque(contexts, maxlen=0)
+
+        cases = [
+            ("file list", lambda: [(path + '.')[:-1] for path in paths]),
+            ("file table", lambda: FileTable.from_paths(paths)),
+            ("wix legacy", lambda: drain(legacy_component_contexts(MSICreator("C:\\source", "out", paths, "Bench")))),
+            ("wix table", lambda: drain(table_component_contexts(MSICreator("C:\\source", "out", paths, "Bench")))),
+            ("inno legacy", lambda: drain(legacy_file_contexts(EXECreator("C:\\source", "out", paths, "Bench")))),
+            ("inno table", lambda: drain(EXECreator("C:\\source", "out", paths, "Bench").iter_file_contexts())),
+        ]
+        for name, action in cases:
+            duration, peak, held = measure(action)
+            print(f"{name:<22}{size:>10}{duration:>10.3f}{duration / size * 1e6:>10.2f}"
+                  f"{peak / size:>13.1f}{held / size:>13.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the file table shared by the script emitters.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 250000])
+    run(parser.parse_args().sizes)
@@ -0,0 +1,101 @@
+"""
+Benchmark of the cold start import time of the GUI and of the headless builder.
+
+Each entry point is imported in a fresh interpreter with ``python -X importtime``, in an
+empty working directory. The median total import time is compared with a budget, and the
+run fails if an entry point imports a module it should only load on first use (winshell,
+the creator modules, tkinter for the headless builder) or creates files such as the log
+database while being imported.
+
+Usage (from the InstallerGenerator directory):
+    python -m benchmarks.bench_import_time [--runs 5] [--gui-budget-ms 250] [--headless-budget-ms 200]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+PROJECT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LAZY_MODULES = ['winshell', 'core.creators.msi_creator', 'core.creators.exe_creator']
+
+ENTRY_POINTS = {
+    'gui': ('core.gui_creator.gui', LAZY_MODULES),
+    'headless': ('core.cli', LAZY_MODULES + ['tkinter']),
+}
+
+
+def measure_import(module: str) -> Tuple[float, Dict[str, int], List[str]]:
+    """
+    Import a module in a fresh interpreter and return its import time.
+
+    Returns:
+        Tuple[float, Dict[str, int], List[str]]: The total import time in milliseconds, the cumulative
+            import time in microseconds of every imported module and the files created in the working directory.
+    """
+    environment = dict(os.environ, PYTHONPATH=PROJECT_DIRECTORY)
+    with tempfile.TemporaryDirectory() as working_directory:
+        completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                                   cwd=working_directory, env=environment, capture_output=True, text=True)
+        created_files = sorted(os.listdir(working_directory))
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr.strip().splitlines()[-1]}")
+
+    total_us = 0
+    cumulative: Dict[str, int] = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        total_us += int(self_us)
+        cumulative[name.strip()] = int(cumulative_us)
+    return total_us / 1000, cumulative, created_files
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure the cold start import time of the entry points.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--gui-budget-ms", type=float, default=250.0)
+    parser.add_argument("--headless-budget-ms", type=float, default=200.0)
+    parser.add_argument("--top", type=int, default=8, help="Number of slowest imports to list.")
+    arguments = parser.parse_args()
+    budgets = {'gui': arguments.gui_budget_ms, 'headless': arguments.headless_budget_ms}
+
+    failures: List[str] = []
+    for name, (module, lazy_modules) in ENTRY_POINTS.items():
+        totals: List[float] = []
+        cumulative: Dict[str, int] = {}
+        created_files: List[str] = []
+        try:
+            for _ in range(arguments.runs):
+                total_ms, cumulative, created_files = measure_import(module)
+                totals.append(total_ms)
+        except RuntimeError as error:
+            failures.append(f"{name}: {error}")
+            continue
+        median_ms = statistics.median(totals)
+
+        print(f"{name} ({module}): median {median_ms:.1f} ms, min {min(totals):.1f} ms, "
+              f"budget {budgets[name]:.0f} ms")
+        slowest = sorted(((us, imported) for imported, us in cumulative.items() if imported != module), reverse=True)
+        for us, imported in slowest[:arguments.top]:
+            print(f"    {us / 1000:8.1f} ms  {imported}")
+
+        if median_ms > budgets[name]:
+            failures.append(f"{name}: {median_ms:.1f} ms exceeds the budget of {budgets[name]:.0f} ms")
+        eager_modules = [lazy for lazy in lazy_modules if lazy in cumulative]
+        if eager_modules:
+            failures.append(f"{name}: imports {', '.join(eager_modules)} at startup")
+        if created_files:
+            failures.append(f"{name}: creates {', '.join(created_files)} at import time")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
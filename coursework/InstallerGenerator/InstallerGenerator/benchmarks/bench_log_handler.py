@@ -0,0 +1,95 @@
+"""
+Benchmark of the SQLite log handler.
+
+Compares the original handler, which inserts and commits every record on the calling
+thread, with the batched handler that writes from a background thread. Records per
+second include the final flush, so every record is on disk when the clock stops.
+
+Usage (from the InstallerGenerator directory):
+    python -m benchmarks.bench_log_handler [--records 20000] [--threads 4]
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from core.logging_config import SQLiteLogHandler
+
+
+class LegacySQLiteLogHandler(logging.Handler):
+    """
+    The SQLite log handler as it was before batching: one INSERT and one commit per record.
+    """
+
+    def __init__(self, db: str):
+        super().__init__()
+        self.conn = sqlite3.connect(db, check_same_thread=False)
+        self.cur = self.conn.cursor()
+        self.cur.execute("CREATE TABLE IF NOT EXISTS logs (time TEXT, level TEXT, message TEXT)")
+        self.conn.commit()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        log_entry = self.format(record)
+        self.cur.execute("INSERT INTO logs (time, level, message) VALUES (?, ?, ?)",
+                         (record.asctime, record.levelname, log_entry))
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+        super().close()
+
+
+def log_records(handler: logging.Handler, records: int, threads: int) -> float:
+    """
+    Log the given number of records through a handler from several threads.
+
+    Returns:
+        float: Records written per second.
+    """
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    logger = logging.getLogger(f"benchmark.{id(handler)}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+
+    def worker(count: int) -> None:
+        for index in range(count):
+            logger.info(f"Proxy: Starting to create MSI installer {index}.")
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(records // threads,)) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    handler.flush()
+    duration = time.perf_counter() - start
+
+    logger.removeHandler(handler)
+    handler.close()
+    return (records // threads * threads) / duration
+
+
+def run(records: int, threads: int) -> None:
+    """
+    Run the benchmark for both handlers and print the throughput.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        legacy_rate = log_records(LegacySQLiteLogHandler(os.path.join(directory, "legacy.db")), records, threads)
+        batched_rate = log_records(SQLiteLogHandler(os.path.join(directory, "batched.db")), records, threads)
+
+    print(f"{'handler':<12}{'records/s':>14}")
+    print(f"{'legacy':<12}{legacy_rate:>14.0f}")
+    print(f"{'batched':<12}{batched_rate:>14.0f}")
+    print(f"speedup: {batched_rate / legacy_rate:.1f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the SQLite log handler.")
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=4)
+    arguments = parser.parse_args()
+    run(arguments.records, arguments.threads)
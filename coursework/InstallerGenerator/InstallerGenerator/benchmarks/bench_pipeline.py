@@ -0,0 +1,259 @@
+"""
+Benchmark suite of the build pipeline, from scanning the sources to the finished installers.
+
+A synthetic source tree of configurable size and depth is generated, and every stage of the
+pipeline is timed on it with the stub compiler standing in for candle, light and ISCC:
+
+    scan_cold        Scanning the source tree without a previous manifest.
+    scan_warm        Rescanning an unchanged tree with the previous manifest.
+    preflight        Checking and hashing every input file.
+    inno_script      Writing the Inno Setup script (generate_inno_setup_script).
+    wix_script       Writing the WiX script (generate_components and the rest of the document).
+    proxy_exe        Building an EXE through the factory's proxy, with logging and telemetry.
+    proxy_msi        Building an MSI through the factory's proxy, with logging and telemetry.
+    batch_cold       Building both installers with the scheduler and an empty build cache.
+    batch_cached     Building both installers again, restored from the build cache.
+
+Each stage is timed ``--runs`` times and reported with its median, and run once more under
+tracemalloc for its peak Python memory. The results can be written as JSON and compared with
+a baseline written by an earlier run: a stage whose median time or memory peak grows by more
+than ``--tolerance`` (and by more than a small noise floor) is reported as a regression, and
+the suite exits with status 1.
+
+Usage (from the InstallerGenerator directory):
+    python -m benchmarks.bench_pipeline [--files 2000] [--depth 3] [--file-size 1024] [--runs 5]
+        [--stages scan_cold preflight ...] [--json results.json] [--baseline baseline.json] [--tolerance 0.25]
+"""
+import argparse
+import atexit
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from .synthetic import create_stub_toolchain, generate_source_tree
+
+# base_config reads the toolchain and the log database from the environment when it is first
+# imported, so the stub toolchain and a scratch directory are set up before importing core.
+WORK_DIRECTORY = tempfile.mkdtemp(prefix="installer_bench_")
+atexit.register(shutil.rmtree, WORK_DIRECTORY, ignore_errors=True)
+os.environ.update(create_stub_toolchain(os.path.join(WORK_DIRECTORY, 'toolchain')))
+os.environ['INSTALLER_LOG_DATABASE'] = os.path.join(WORK_DIRECTORY, 'installer_logs.db')
+
+from core.build_cache import BuildCache  # noqa: E402
+from core.creators.exe_creator import EXECreator  # noqa: E402
+from core.creators.msi_creator import MSICreator  # noqa: E402
+from core.creators.script_writer import write_script  # noqa: E402
+from core.factories.creator_factory import InstallerCreatorFactory  # noqa: E402
+from core.preflight import run_preflight  # noqa: E402
+from core.scanner import DirectoryScanner  # noqa: E402
+from core.scheduler import BuildJob, BuildScheduler  # noqa: E402
+
+TIME_NOISE_FLOOR = 0.002
+MEMORY_NOISE_FLOOR = 64 * 1024
+
+
+class Workload:
+    """
+    The synthetic source tree and scratch directories shared by the stages.
+    """
+
+    def __init__(self, source_directory: str, files: List[str]):
+        self.source_directory: str = source_directory
+        self.files: List[str] = files
+        self.counter: int = 0
+
+    def output_directory(self) -> str:
+        """
+        Return a new, empty output directory.
+        """
+        self.counter += 1
+        directory = os.path.join(WORK_DIRECTORY, 'output', str(self.counter))
+        os.makedirs(directory)
+        return directory
+
+
+def stage_scan_cold(workload: Workload) -> Callable[[], object]:
+    return DirectoryScanner(workload.source_directory).scan
+
+
+def stage_scan_warm(workload: Workload) -> Callable[[], object]:
+    scanner = DirectoryScanner(workload.source_directory)
+    scanner.scan()
+    return scanner.scan
+
+
+def stage_preflight(workload: Workload) -> Callable[[], object]:
+    manifest = DirectoryScanner(workload.source_directory).scan()
+    return lambda: run_preflight(workload.source_directory, workload.files, manifest)
+
+
+def stage_inno_script(workload: Workload) -> Callable[[], object]:
+    output_directory = workload.output_directory()
+    creator = EXECreator(workload.source_directory, output_directory, workload.files, 'bench')
+    return lambda: write_script(os.path.join(output_directory, 'bench.iss'), creator.iter_inno_setup_script())
+
+
+def stage_wix_script(workload: Workload) -> Callable[[], object]:
+    output_directory = workload.output_directory()
+    creator = MSICreator(workload.source_directory, output_directory, workload.files, 'bench')
+    return lambda: write_script(os.path.join(output_directory, 'bench.wxs'), creator.iter_msi_script())
+
+
+def proxy_stage(installer_type: str) -> Callable[[Workload], Callable[[], object]]:
+    def stage(workload: Workload) -> Callable[[], object]:
+        creator = InstallerCreatorFactory.create(installer_type, workload.source_directory,
+                                                 workload.output_directory(), workload.files, 'bench')
+
+        def build() -> None:
+            with contextlib.redirect_stdout(io.StringIO()):
+                if not creator.create_installer():
+                    raise RuntimeError(f"The {installer_type} build failed.")
+        return build
+    return stage
+
+
+def batch_stage(cached: bool) -> Callable[[Workload], Callable[[], object]]:
+    def stage(workload: Workload) -> Callable[[], object]:
+        output_directory = workload.output_directory()
+        build_cache = BuildCache(os.path.join(output_directory, 'cache'))
+        jobs = [BuildJob(installer_type, workload.source_directory, workload.files, 'bench', output_directory)
+                for installer_type in ('MSI', 'EXE')]
+
+        def build() -> None:
+            results = BuildScheduler(build_cache=build_cache).run(jobs)
+            failed = [result.error for result in results if not result.success]
+            if failed:
+                raise RuntimeError(f"The batch build failed: {failed}")
+        if cached:
+            build()
+        return build
+    return stage
+
+
+STAGES: Dict[str, Callable[[Workload], Callable[[], object]]] = {
+    'scan_cold': stage_scan_cold,
+    'scan_warm': stage_scan_warm,
+    'preflight': stage_preflight,
+    'inno_script': stage_inno_script,
+    'wix_script': stage_wix_script,
+    'proxy_exe': proxy_stage('EXE'),
+    'proxy_msi': proxy_stage('MSI'),
+    'batch_cold': batch_stage(cached=False),
+    'batch_cached': batch_stage(cached=True),
+}
+
+
+def measure(stage: Callable[[Workload], Callable[[], object]], workload: Workload, runs: int) -> dict:
+    """
+    Time a stage ``runs`` times, then run it once under tracemalloc for its memory peak.
+    """
+    seconds = []
+    for _ in range(runs):
+        run = stage(workload)
+        start = time.perf_counter()
+        run()
+        seconds.append(time.perf_counter() - start)
+
+    run = stage(workload)
+    tracemalloc.start()
+    try:
+        run()
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'seconds': statistics.median(seconds), 'min_seconds': min(seconds), 'peak_bytes': peak_bytes}
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """
+    Compare results with a baseline and describe every regression.
+
+    Args:
+        results (dict): The results of this run.
+        baseline (dict): The results of the baseline run.
+        tolerance (float): Allowed relative growth, e.g. 0.25 for 25 %.
+
+    Returns:
+        List[str]: One line per regressed stage and metric.
+    """
+    regressions = []
+    for name, stage in results['stages'].items():
+        reference = baseline['stages'].get(name)
+        if reference is None:
+            continue
+        for metric, noise_floor in (('seconds', TIME_NOISE_FLOOR), ('peak_bytes', MEMORY_NOISE_FLOOR)):
+            limit = reference[metric] * (1 + tolerance)
+            if stage[metric] > limit and stage[metric] - reference[metric] > noise_floor:
+                growth = stage[metric] / reference[metric] - 1 if reference[metric] else float('inf')
+                regressions.append(f"{name}: {metric} {reference[metric]:.6g} -> {stage[metric]:.6g} "
+                                   f"(+{growth:.0%}, tolerance {tolerance:.0%})")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the stages of the build pipeline.")
+    parser.add_argument("--files", type=int, default=2000, help="Number of files in the synthetic source tree.")
+    parser.add_argument("--depth", type=int, default=3, help="Directory depth of the synthetic source tree.")
+    parser.add_argument("--file-size", type=int, default=1024, help="Size of every file in bytes.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--stages", nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--json", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="Compare with the results of an earlier run.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative growth before a regression.")
+    arguments = parser.parse_args()
+
+    parameters = {'files': arguments.files, 'depth': arguments.depth, 'file_size': arguments.file_size}
+    baseline = None
+    if arguments.baseline:
+        with open(arguments.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get('parameters') != parameters:
+            print(f"The baseline was measured with {baseline.get('parameters')}, not {parameters}.")
+            sys.exit(2)
+
+    source_directory = os.path.join(WORK_DIRECTORY, 'source')
+    workload = Workload(source_directory, generate_source_tree(source_directory, arguments.files, arguments.depth,
+                                                               file_size=arguments.file_size))
+    results = {
+        'parameters': parameters,
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'cpu_count': os.cpu_count()},
+        'runs': arguments.runs,
+        'stages': {},
+    }
+
+    print(f"{arguments.files} files, depth {arguments.depth}, {arguments.file_size} bytes each, "
+          f"{arguments.runs} runs per stage")
+    print(f"{'stage':<14}{'median ms':>11}{'min ms':>10}{'peak KiB':>11}{'baseline ms':>13}")
+    for name in arguments.stages:
+        stage = measure(STAGES[name], workload, arguments.runs)
+        results['stages'][name] = stage
+        reference = baseline['stages'].get(name) if baseline else None
+        reference_ms = f"{reference['seconds'] * 1000:>13.1f}" if reference else f"{'-':>13}"
+        print(f"{name:<14}{stage['seconds'] * 1000:>11.1f}{stage['min_seconds'] * 1000:>10.1f}"
+              f"{stage['peak_bytes'] / 1024:>11.0f}{reference_ms}")
+
+    if arguments.json:
+        with open(arguments.json, 'w') as results_file:
+            json.dump(results, results_file, indent=2)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, arguments.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline.")
+
+
+if __name__ == '__main__':
+    main()
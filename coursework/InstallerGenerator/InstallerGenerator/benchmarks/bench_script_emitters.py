@@ -0,0 +1,117 @@
+"""
+Benchmark of the installer script emitters.
+
+Compares the original string-concatenating script generators with the streaming
+emitters that write the script to disk in buffered chunks, for growing file lists.
+
+Usage (from the InstallerGenerator directory):
+    python -m benchmarks.bench_script_emitters [--sizes 1000 10000 100000]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import uuid
+from typing import Callable, List, Tuple
+
+from core.creators.exe_creator import EXECreator
+from core.creators.msi_creator import MSICreator
+from core.creators.script_writer import write_script
+
+
+def synthetic_file_list(count: int) -> List[str]:
+    """
+    Build a file list of the given size spread over a few nested directories.
+    """
+    return [os.path.join(f"dir{index % 97}", f"sub{index % 13}", f"file_{index}.dat") for index in range(count)]
+
+
+def legacy_inno_setup_script(creator: EXECreator) -> str:
+    """
+    The Inno Setup generator as it was before streaming, built with str +=.
+    """
+    script = f"""
+                    [Setup]
+                    AppName={creator.installer_name}
+                    AppVersion=1.0
+                    DefaultDirName={{autopf}}\\{creator.installer_name}
+                    OutputDir={creator.output_directory}
+                    OutputBaseFilename={creator.installer_name}_installer
+                    Compression=lzma
+                    SolidCompression=yes
+                    [Files]
+                    """
+    for file in creator.file_list:
+        script += f"Source: \"{os.path.join(creator.source_directory, file)}\"; DestDir: \"{{app}}\"\n"
+    return script
+
+
+def legacy_msi_script(creator: MSICreator) -> str:
+    """
+    The WiX component generators as they were before streaming, built with str +=.
+    """
+    components_xml = ""
+    for file in creator.file_list:
+        file_id = os.path.basename(file)
+        source_path = os.path.join(creator.source_directory, file)
+        component_xml = f"""
+            <Component Id="{file_id}" Guid="{str(uuid.uuid4())}">
+                <File Id="{file_id}" Source="{source_path}" KeyPath="yes" />
+            </Component>
+            """
+        components_xml += component_xml
+    component_refs_xml = ""
+    for file in creator.file_list:
+        file_id = os.path.basename(file)
+        component_ref_xml = f"<ComponentRef Id=\"{file_id}\" />"
+        component_refs_xml += component_ref_xml
+    return f"<Wix>{components_xml}{component_refs_xml}</Wix>"
+
+
+def measure(action: Callable[[], None]) -> Tuple[float, int]:
+    """
+    Run an action and return its duration in seconds and its peak traced memory in bytes.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    action()
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duration, peak
+
+
+def run(sizes: List[int]) -> None:
+    """
+    Run the benchmark for every file list size and print a result table.
+    """
+    print(f"{'emitter':<22}{'files':>10}{'seconds':>12}{'peak MiB':>12}")
+    with tempfile.TemporaryDirectory() as output_directory:
+        script_path = os.path.join(output_directory, "script.out")
+
+        def write_whole(text_factory: Callable[[], str]) -> Callable[[], None]:
+            def action() -> None:
+                with open(script_path, "w") as script_file:
+                    script_file.write(text_factory())
+            return action
+
+        for size in sizes:
+            file_list = synthetic_file_list(size)
+            exe_creator = EXECreator("C:\\source", output_directory, file_list, "Benchmark")
+            msi_creator = MSICreator("C:\\source", output_directory, file_list, "Benchmark")
+            cases = [
+                ("inno legacy", write_whole(lambda: legacy_inno_setup_script(exe_creator))),
+                ("inno streaming", lambda: write_script(script_path, exe_creator.iter_inno_setup_script())),
+                ("wix legacy", write_whole(lambda: legacy_msi_script(msi_creator))),
+                ("wix streaming", lambda: write_script(script_path, msi_creator.iter_msi_script())),
+            ]
+            for name, action in cases:
+                duration, peak = measure(action)
+                print(f"{name:<22}{size:>10}{duration:>12.3f}{peak / 1024 ** 2:>12.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the installer script emitters.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    run(parser.parse_args().sizes)
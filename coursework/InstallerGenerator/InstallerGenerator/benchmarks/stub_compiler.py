@@ -0,0 +1,183 @@
+"""
+A stand-in for candle, light and ISCC that lets builds run without the real toolchains.
+
+It prints its arguments, optionally sleeps to simulate compile time, and writes a small
+artifact to the path given with ``-o``/``-out`` or, for an Inno Setup script, to the
+OutputDir/OutputBaseFilename named in the script. When linking with a cabinet cache
+(``-cc``), it also writes the shared cabinets named in the WiX source next to the object
+file into the cache, unless they are already there.
+
+With ``--compress`` the artifact of ISCC and light holds the installer's files, compressed
+with the zlib or lzma settings closest to the script's Compression/SolidCompression
+directives or to the CompressionLevel of every WiX <Media> cabinet. Compile time and
+artifact size then follow the chosen compression settings, which lets build profiles be
+compared without the real toolchains.
+
+Usage:
+    python benchmarks/stub_compiler.py [--delay 0.05] [--fail] [--compress] <compiler arguments>
+"""
+import lzma
+import os
+import re
+import sys
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+MSZIP_BLOCK_SIZE = 32 * 1024
+
+
+def zlib_compressor(level: int) -> Callable[[bytes], bytes]:
+    return lambda data: zlib.compress(data, level)
+
+
+def lzma_compressor(preset: int) -> Callable[[bytes], bytes]:
+    return lambda data: lzma.compress(data, preset=preset)
+
+
+def mszip_compress(data: bytes) -> bytes:
+    """
+    Compress data the way MSZIP does, as independent deflate blocks of 32 KiB.
+    """
+    return b"".join(zlib.compress(data[offset:offset + MSZIP_BLOCK_SIZE], 6)
+                    for offset in range(0, len(data), MSZIP_BLOCK_SIZE))
+
+
+INNO_COMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {
+    'none': lambda data: data,
+    'zip': zlib_compressor(7),
+    'bzip': zlib_compressor(9),
+    'lzma': lzma_compressor(9),
+    'lzma/fast': lzma_compressor(1),
+    'lzma/normal': lzma_compressor(6),
+    'lzma/max': lzma_compressor(9),
+    'lzma/ultra': lzma_compressor(9 | lzma.PRESET_EXTREME),
+    'lzma2': lzma_compressor(9),
+    'lzma2/fast': lzma_compressor(1),
+    'lzma2/normal': lzma_compressor(6),
+    'lzma2/max': lzma_compressor(9),
+    'lzma2/ultra': lzma_compressor(9 | lzma.PRESET_EXTREME),
+    'lzma2/ultra64': lzma_compressor(9 | lzma.PRESET_EXTREME),
+}
+INNO_COMPRESSORS.update((f'zip/{level}', zlib_compressor(level)) for level in range(1, 10))
+
+WIX_COMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {
+    'none': lambda data: data,
+    'low': lzma_compressor(0),
+    'medium': lzma_compressor(3),
+    'high': lzma_compressor(6),
+    'mszip': mszip_compress,
+}
+
+
+def output_path(arguments: list) -> str:
+    """
+    Return the artifact path a real compiler would write for the given arguments.
+    """
+    for flag in ('-o', '-out'):
+        if flag in arguments:
+            return arguments[arguments.index(flag) + 1]
+    with open(arguments[-1]) as script_file:
+        script = script_file.read()
+    output_directory = re.search(r"OutputDir=(.*)", script).group(1).strip()
+    output_name = re.search(r"OutputBaseFilename=(.*)", script).group(1).strip()
+    return os.path.join(output_directory, output_name + ".exe")
+
+
+def write_cabinets(arguments: list) -> None:
+    """
+    Write the shared cabinets of the linked WiX source into the cabinet cache.
+    """
+    cabinet_directory = arguments[arguments.index('-cc') + 1]
+    object_files = [argument for argument in arguments if argument.endswith('.wixobj')]
+    source_path = os.path.join(os.path.dirname(object_files[0]), 'installer.wxs')
+    with open(source_path) as source_file:
+        cabinets = re.findall(r'Cabinet="(payload_[0-9a-f]+\.cab)"', source_file.read())
+    for cabinet in cabinets:
+        cabinet_path = os.path.join(cabinet_directory, cabinet)
+        if not os.path.exists(cabinet_path):
+            print(f"stub compiler: compressing {cabinet}")
+            with open(cabinet_path, 'w') as cabinet_file:
+                cabinet_file.write("stub cabinet\n")
+        else:
+            print(f"stub compiler: reusing {cabinet}")
+
+
+def read_files(paths: List[str]) -> bytes:
+    contents = []
+    for path in paths:
+        with open(path, 'rb') as source_file:
+            contents.append(source_file.read())
+    return b"".join(contents)
+
+
+def compress_inno(script_path: str) -> bytes:
+    """
+    Compress the files of an Inno Setup script as one solid block or one file at a time.
+    """
+    with open(script_path) as script_file:
+        script = script_file.read()
+    compression = re.search(r"Compression=(.*)", script).group(1).strip().lower()
+    solid = re.search(r"SolidCompression=(.*)", script).group(1).strip().lower() == 'yes'
+    compress = INNO_COMPRESSORS[compression]
+    sources = re.findall(r'^\s*Source: "([^"]*)"', script, re.MULTILINE)
+    if solid:
+        return compress(read_files(sources))
+    return b"".join(compress(read_files([source])) for source in sources)
+
+
+def compress_wix(arguments: List[str]) -> bytes:
+    """
+    Compress the files of every <Media> cabinet of the linked WiX source, cabinets in parallel.
+    """
+    base_directory = arguments[arguments.index('-b') + 1] if '-b' in arguments else '.'
+    object_files = [argument for argument in arguments if argument.endswith('.wixobj')]
+    with open(os.path.join(os.path.dirname(object_files[0]), 'installer.wxs')) as source_file:
+        source = source_file.read()
+    levels = {}
+    for attributes in re.findall(r'<Media ([^>]*)/>', source):
+        level = re.search(r'CompressionLevel="(\w+)"', attributes)
+        levels[int(re.search(r'Id="(\d+)"', attributes).group(1))] = level.group(1) if level else 'mszip'
+    cabinets: Dict[int, List[str]] = {disk_id: [] for disk_id in levels}
+    for attributes in re.findall(r'<File ([^>]*)/>', source):
+        disk_id = re.search(r'DiskId="(\d+)"', attributes)
+        path = re.search(r'Source="([^"]*)"', attributes).group(1)
+        cabinets[int(disk_id.group(1)) if disk_id else 1].append(os.path.join(base_directory, path))
+
+    def compress_cabinet(disk_id: int) -> bytes:
+        return WIX_COMPRESSORS[levels[disk_id]](read_files(cabinets[disk_id]))
+
+    with ThreadPoolExecutor() as executor:
+        return b"".join(executor.map(compress_cabinet, sorted(cabinets)))
+
+
+def main() -> int:
+    arguments = sys.argv[1:]
+    delay = 0.0
+    if arguments[:1] == ['--delay']:
+        delay = float(arguments[1])
+        arguments = arguments[2:]
+    if arguments[:1] == ['--fail']:
+        print("stub compiler: failing as requested")
+        return 2
+    compress = arguments[:1] == ['--compress']
+    if compress:
+        arguments = arguments[1:]
+    print(f"stub compiler: {' '.join(arguments)}")
+    if delay:
+        time.sleep(delay)
+    content = b"stub artifact\n"
+    if compress and output_path(arguments).lower().endswith('.msi'):
+        content = compress_wix(arguments)
+    elif compress and arguments[-1].lower().endswith('.iss'):
+        content = compress_inno(arguments[-1])
+    with open(output_path(arguments), 'wb') as artifact:
+        artifact.write(content)
+    if '-cc' in arguments:
+        write_cabinets(arguments)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
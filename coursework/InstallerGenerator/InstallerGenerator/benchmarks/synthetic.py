@@ -0,0 +1,72 @@
+"""
+Synthetic inputs for the benchmarks: source trees and a stub toolchain.
+"""
+import os
+import random
+import stat
+import sys
+from typing import Dict, List
+
+STUB_COMPILER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stub_compiler.py')
+
+
+def generate_source_tree(directory: str, files: int, depth: int = 3, fanout: int = 4, file_size: int = 1024,
+                         seed: int = 0) -> List[str]:
+    """
+    Write a source tree of ``files`` files spread over directories nested ``depth`` levels deep.
+
+    Every directory has up to ``fanout`` subdirectories, and the files are distributed round
+    robin over the directories of the deepest level. File contents are random but reproducible
+    for a given seed.
+
+    Args:
+        directory (str): Root of the tree, created if needed.
+        files (int): Number of files.
+        depth (int): Number of directory levels below the root.
+        fanout (int): Number of subdirectories per directory.
+        file_size (int): Size of every file in bytes.
+        seed (int): Seed of the file contents.
+
+    Returns:
+        List[str]: The paths of the files, relative to the root.
+    """
+    rng = random.Random(seed)
+    leaf_count = fanout ** depth
+    paths = []
+    for index in range(files):
+        leaf = index % leaf_count
+        parts = [f"dir{(leaf // fanout ** level) % fanout}" for level in range(depth)]
+        paths.append(os.path.join(*parts, f"file_{index}.dat"))
+
+    for path in paths:
+        absolute_path = os.path.join(directory, path)
+        os.makedirs(os.path.dirname(absolute_path), exist_ok=True)
+        with open(absolute_path, 'wb') as source_file:
+            source_file.write(rng.randbytes(file_size))
+    return paths
+
+
+def create_stub_toolchain(directory: str) -> Dict[str, str]:
+    """
+    Create executables for candle, light and ISCC that run the stub compiler.
+
+    Args:
+        directory (str): Directory to create the executables in.
+
+    Returns:
+        Dict[str, str]: The executables, keyed by the environment variables base_config reads them from.
+    """
+    os.makedirs(directory, exist_ok=True)
+    toolchain = {}
+    for variable, name in (('WIX_CANDLE', 'candle'), ('WIX_LIGHT', 'light'), ('INNO_SETUP_COMPILER', 'iscc')):
+        if os.name == 'nt':
+            path = os.path.join(directory, f"{name}.cmd")
+            content = f'@"{sys.executable}" "{STUB_COMPILER}" %*\r\n'
+        else:
+            path = os.path.join(directory, name)
+            content = f'#!/bin/sh\nexec "{sys.executable}" "{STUB_COMPILER}" "$@"\n'
+        with open(path, 'w') as executable:
+            executable.write(content)
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+        toolchain[variable] = path
+    return toolchain
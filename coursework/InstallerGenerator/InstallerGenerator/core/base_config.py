@@ -1,3 +1,21 @@
-inno_setup_compiler = r"C:\Program Files (x86)\Inno Setup 6\ISCC.exe"
-candle_exe_path = r'C:\Program Files (x86)\WiX Toolset v3.14\bin\candle.exe'
-light_exe_path = r'C:\Program Files (x86)\WiX Toolset v3.14\bin\light.exe'
\ No newline at end of file
+import os
+
+inno_setup_compiler = os.environ.get("INNO_SETUP_COMPILER", r"C:\Program Files (x86)\Inno Setup 6\ISCC.exe")
+candle_exe_path = os.environ.get("WIX_CANDLE", r'C:\Program Files (x86)\WiX Toolset v3.14\bin\candle.exe')
+light_exe_path = os.environ.get("WIX_LIGHT", r'C:\Program Files (x86)\WiX Toolset v3.14\bin\light.exe')
+build_cache_directory = os.environ.get("INSTALLER_BUILD_CACHE", os.path.join(os.path.expanduser("~"), ".installer_generator", "build_cache"))
+build_cache_max_bytes = int(os.environ.get("INSTALLER_BUILD_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+manifest_index_directory = os.environ.get("INSTALLER_MANIFEST_INDEX", os.path.join(os.path.expanduser("~"), ".installer_generator", "manifests"))
+log_database = os.environ.get("INSTALLER_LOG_DATABASE", os.path.join(".", "installer_logs.db"))
+log_retention_days = float(os.environ.get("INSTALLER_LOG_RETENTION_DAYS", 90))
+log_max_rows = int(os.environ.get("INSTALLER_LOG_MAX_ROWS", 1000000))
+log_maintenance_interval = float(os.environ.get("INSTALLER_LOG_MAINTENANCE_INTERVAL", 3600))
+log_file = os.environ.get("INSTALLER_LOG_FILE", os.path.join(".", "installer_creator.log"))
+log_file_max_bytes = int(os.environ.get("INSTALLER_LOG_FILE_MAX_BYTES", 10 * 1024 ** 2))
+log_file_backups = int(os.environ.get("INSTALLER_LOG_FILE_BACKUPS", 5))
+compiler_max_concurrency = int(os.environ.get("INSTALLER_COMPILER_CONCURRENCY", os.cpu_count() or 1))
+compiler_max_pending = int(os.environ.get("INSTALLER_COMPILER_QUEUE", 64))
+payload_share_min_bytes = int(os.environ.get("INSTALLER_PAYLOAD_SHARE_MIN_BYTES", 1024 * 1024))
+build_profile = os.environ.get("INSTALLER_BUILD_PROFILE", "release")
+inno_setup_template = os.environ.get("INSTALLER_INNO_TEMPLATE")
+wix_template = os.environ.get("INSTALLER_WIX_TEMPLATE")
@@ -0,0 +1,170 @@
+import json
+import os
+from typing import Dict, List, Optional
+
+from .base_config import manifest_index_directory
+from .profiles import get_profile
+from .scanner import DirectoryScanner, FileManifest
+from .scheduler import BuildJob
+
+try:
+    import tomllib
+    _DECODE_ERRORS = (json.JSONDecodeError, tomllib.TOMLDecodeError)
+except ImportError:
+    tomllib = None
+    _DECODE_ERRORS = (json.JSONDecodeError,)
+
+
+class BatchManifest:
+    """
+    A batch of installers to build, read from a JSON or TOML manifest file.
+
+    The manifest holds an optional ``defaults`` table and an ``installers`` list. Every
+    installer takes its settings from its own entry, falling back to the defaults:
+
+        name    Name of the installer (required).
+        type    Installer type, or list of types, to build: 'MSI' and/or 'EXE' (required).
+        source  Directory containing the source files (required).
+        output  Output directory for the installer (required).
+        files   Files to include, relative to the source directory. Defaults to every file
+                below the source directory.
+        profile Build profile ('fast'/'dev', 'balanced' or 'release'). Defaults to
+                INSTALLER_BUILD_PROFILE.
+
+    Relative directories are resolved against the directory of the manifest file, and all
+    directories are normalized to absolute paths, the form the change watchers report.
+
+    Attributes:
+        path (str): Path of the manifest file.
+        installers (List[dict]): The installer entries with the defaults applied.
+    """
+    INSTALLER_TYPES: List[str] = ['MSI', 'EXE']
+
+    def __init__(self, path: str, installers: List[dict]):
+        """
+        Initialize the BatchManifest.
+
+        Args:
+            path (str): Path of the manifest file.
+            installers (List[dict]): The installer entries with the defaults applied.
+        """
+        self.path: str = path
+        self.installers: List[dict] = installers
+
+    @classmethod
+    def load(cls, path: str) -> 'BatchManifest':
+        """
+        Read and validate a manifest file. Files ending in '.toml' are read as TOML, others as JSON.
+
+        Args:
+            path (str): Path of the manifest file.
+
+        Returns:
+            BatchManifest: The validated manifest.
+
+        Raises:
+            ValueError: If the manifest cannot be read or describes an invalid installer.
+        """
+        try:
+            if path.lower().endswith('.toml'):
+                if tomllib is None:
+                    raise ValueError("TOML manifests require Python 3.11 or later.")
+                with open(path, 'rb') as manifest_file:
+                    data = tomllib.load(manifest_file)
+            else:
+                with open(path, encoding='utf-8') as manifest_file:
+                    data = json.load(manifest_file)
+        except OSError as error:
+            raise ValueError(f"Cannot read batch manifest {path}: {error}")
+        except _DECODE_ERRORS as error:
+            raise ValueError(f"Invalid batch manifest {path}: {error}")
+
+        if not isinstance(data, dict) or not isinstance(data.get('installers'), list) or not data['installers']:
+            raise ValueError(f"Batch manifest {path} must contain a non-empty 'installers' list.")
+        defaults = data.get('defaults', {})
+        if not isinstance(defaults, dict):
+            raise ValueError(f"The 'defaults' of batch manifest {path} must be a table.")
+
+        base_directory = os.path.dirname(os.path.abspath(path))
+        installers = [cls._parse_installer(position, {**defaults, **entry} if isinstance(entry, dict) else entry,
+                                           base_directory)
+                      for position, entry in enumerate(data['installers'], start=1)]
+        return cls(path, installers)
+
+    @classmethod
+    def _parse_installer(cls, position: int, entry: dict, base_directory: str) -> dict:
+        """
+        Validate one installer entry and normalize its types and directories.
+        """
+        if not isinstance(entry, dict):
+            raise ValueError(f"Installer #{position} must be a table.")
+        for key in ('name', 'type', 'source', 'output'):
+            if not entry.get(key):
+                raise ValueError(f"Installer #{position} is missing '{key}'.")
+
+        installer_types = entry['type'] if isinstance(entry['type'], list) else [entry['type']]
+        installer_types = [str(installer_type).upper() for installer_type in installer_types]
+        for installer_type in installer_types:
+            if installer_type not in cls.INSTALLER_TYPES:
+                raise ValueError(f"Installer '{entry['name']}' has unknown type '{installer_type}'.")
+
+        files = entry.get('files')
+        if files is not None and (not isinstance(files, list) or not all(isinstance(file, str) for file in files)):
+            raise ValueError(f"The 'files' of installer '{entry['name']}' must be a list of paths.")
+
+        profile = entry.get('profile')
+        if profile is not None:
+            try:
+                profile = get_profile(str(profile)).name
+            except ValueError as error:
+                raise ValueError(f"Installer '{entry['name']}': {error}")
+
+        return {
+            'name': str(entry['name']),
+            'types': installer_types,
+            'source': os.path.abspath(os.path.join(base_directory, os.path.expanduser(entry['source']))),
+            'output': os.path.abspath(os.path.join(base_directory, os.path.expanduser(entry['output']))),
+            'files': files,
+            'profile': profile,
+        }
+
+    def create_scanners(self, index_directory: Optional[str] = manifest_index_directory) -> Dict[str, DirectoryScanner]:
+        """
+        Create a scanner for every distinct source directory.
+
+        Args:
+            index_directory (Optional[str]): Directory holding the manifest indexes, or None to not persist them.
+
+        Returns:
+            Dict[str, DirectoryScanner]: The scanners, keyed by source directory.
+        """
+        scanners: Dict[str, DirectoryScanner] = {}
+        for installer in self.installers:
+            source = installer['source']
+            if source in scanners:
+                continue
+            index_path = DirectoryScanner.default_index_path(source, index_directory) if index_directory else None
+            scanners[source] = DirectoryScanner(source, index_path)
+        return scanners
+
+    def build_jobs(self, manifests: Dict[str, FileManifest], profile: Optional[str] = None) -> List[BuildJob]:
+        """
+        Create one BuildJob per installer and type.
+
+        Args:
+            manifests (Dict[str, FileManifest]): Scanned manifests, keyed by source directory.
+            profile (Optional[str]): Build profile overriding the profiles of the manifest.
+
+        Returns:
+            List[BuildJob]: The jobs in manifest order.
+        """
+        jobs: List[BuildJob] = []
+        for installer in self.installers:
+            manifest = manifests.get(installer['source'])
+            file_list = installer['files']
+            if file_list is None:
+                file_list = manifest.paths() if manifest is not None else []
+            for installer_type in installer['types']:
+                jobs.append(BuildJob(installer_type, installer['source'], list(file_list), installer['name'],
+                                     installer['output'], manifest, profile=profile or installer['profile']))
+        return jobs
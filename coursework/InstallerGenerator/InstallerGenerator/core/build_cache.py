@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .hashing import compiler_fingerprint, hash_file
+
+
+class BuildCache:
+    """
+    A persistent, content-addressed cache of built installers.
+
+    Installers are stored under a key derived from everything that determines their
+    contents: the generated script, every input file and the compilers used to build them.
+    When a build produces a key that is already cached, the stored installer is copied to
+    the output directory instead of running the toolchain again.
+
+    The cache keeps an index of entry sizes and last use times, and evicts the least
+    recently used entries once it exceeds ``max_bytes`` or ``max_entries``. Several processes,
+    e.g. the local workers of a build farm, may share a cache directory: every change to the
+    index is made under a lock file, to the index as it is on disk at that moment.
+
+    Attributes:
+        directory (str): Directory holding the cached installers and the index.
+        max_bytes (int): Maximum total size of the cached installers.
+        max_entries (int): Maximum number of cached installers.
+    """
+    _INDEX_FILE: str = 'index.json'
+    _LOCK_FILE: str = 'index.lock'
+
+    def __init__(self, directory: str, max_bytes: int = 2 * 1024 ** 3, max_entries: int = 1000):
+        """
+        Initialize the BuildCache.
+
+        Args:
+            directory (str): Directory holding the cached installers. It is created if needed.
+            max_bytes (int): Maximum total size of the cached installers.
+            max_entries (int): Maximum number of cached installers.
+        """
+        self.directory: str = directory
+        self.max_bytes: int = max_bytes
+        self.max_entries: int = max_entries
+        self._lock: threading.Lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._index: Dict[str, dict] = {}
+
+    @staticmethod
+    def compute_key(script_digest: str, source_directory: str, file_list: Iterable[str], compilers: Iterable[str],
+                    file_hashes: Optional[Dict[str, str]] = None) -> str:
+        """
+        Compute the cache key of a build.
+
+        Args:
+            script_digest (str): Digest of the generated installer script.
+            source_directory (str): Directory containing the source files.
+            file_list (Iterable[str]): Files included in the installer, relative to the source directory.
+            compilers (Iterable[str]): Paths of the compiler executables used by the build.
+            file_hashes (Optional[Dict[str, str]]): Already known content digests, keyed by file name.
+
+        Returns:
+            str: The hexadecimal cache key.
+        """
+        file_hashes = file_hashes or {}
+        digest = hashlib.sha256()
+        digest.update(script_digest.encode('utf-8'))
+        for file in sorted(file_list):
+            file_hash = file_hashes.get(file) or hash_file(os.path.join(source_directory, file))
+            digest.update(f"\0file\0{file}\0{file_hash}".encode('utf-8'))
+        for compiler in compilers:
+            digest.update(f"\0compiler\0{compiler}\0{compiler_fingerprint(compiler)}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def restore(self, key: str, destination: str) -> bool:
+        """
+        Copy a cached installer to its destination.
+
+        Args:
+            key (str): The cache key of the build.
+            destination (str): Path the installer should be copied to.
+
+        Returns:
+            bool: True on a cache hit, False if the key is not cached.
+        """
+        with self._locked_index():
+            entry = self._index.get(key)
+            if entry is None:
+                return False
+            cached_path = os.path.join(self.directory, entry['file'])
+            if not os.path.exists(cached_path):
+                del self._index[key]
+                self._save_index()
+                return False
+            entry['last_used'] = time.time()
+            self._save_index()
+
+        try:
+            shutil.copyfile(cached_path, destination)
+        except FileNotFoundError:
+            # Another process evicted the entry after the index was released.
+            return False
+        return True
+
+    def store(self, key: str, artifact_path: str) -> None:
+        """
+        Add a built installer to the cache and evict old entries if the cache is full.
+
+        Args:
+            key (str): The cache key of the build.
+            artifact_path (str): Path of the built installer.
+        """
+        file_name = key + os.path.splitext(artifact_path)[1]
+        cached_path = os.path.join(self.directory, file_name)
+        temporary_path = f"{cached_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(artifact_path, temporary_path)
+        os.replace(temporary_path, cached_path)
+
+        with self._locked_index():
+            self._index[key] = {
+                'file': file_name,
+                'size': os.path.getsize(cached_path),
+                'last_used': time.time(),
+            }
+            self._evict()
+            self._save_index()
+
+    def total_size(self) -> int:
+        """
+        Return the total size of the cached installers.
+
+        Returns:
+            int: Size in bytes.
+        """
+        with self._locked_index():
+            return sum(entry['size'] for entry in self._index.values())
+
+    def _evict(self) -> None:
+        """
+        Remove least recently used entries until the cache is within its limits.
+        """
+        total_size = sum(entry['size'] for entry in self._index.values())
+        by_age: List[str] = sorted(self._index, key=lambda key: self._index[key]['last_used'])
+        for key in by_age:
+            if total_size <= self.max_bytes and len(self._index) <= self.max_entries:
+                break
+            entry = self._index.pop(key)
+            total_size -= entry['size']
+            try:
+                os.remove(os.path.join(self.directory, entry['file']))
+            except OSError:
+                pass
+
+    @contextmanager
+    def _locked_index(self) -> Iterator[None]:
+        """
+        Hold the index lock of this process and of the cache directory, with the index freshly read from disk.
+
+        Reading the index under the lock merges the entries other processes stored since it was
+        last read, so saving it does not drop them.
+        """
+        with self._lock, open(os.path.join(self.directory, self._LOCK_FILE), 'a+b') as lock_file:
+            _lock_file(lock_file)
+            try:
+                self._index = self._load_index()
+                yield
+            finally:
+                _unlock_file(lock_file)
+
+    def _load_index(self) -> Dict[str, dict]:
+        """
+        Read the index from disk, starting empty if it is missing or unreadable.
+        """
+        try:
+            with open(os.path.join(self.directory, self._INDEX_FILE)) as index_file:
+                return json.load(index_file)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self) -> None:
+        """
+        Atomically write the index to disk.
+        """
+        index_path = os.path.join(self.directory, self._INDEX_FILE)
+        temporary_path = f"{index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary_path, 'w') as index_file:
+            json.dump(self._index, index_file)
+        os.replace(temporary_path, index_path)
+
+
+def _lock_file(lock_file) -> None:
+    """
+    Block until this process holds the exclusive lock of an open file.
+    """
+    if os.name == 'nt':
+        import msvcrt
+        lock_file.seek(0)
+        while True:
+            try:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                # LK_LOCK gives up after ten attempts a second apart; keep waiting.
+                continue
+    else:
+        import fcntl
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+
+
+def _unlock_file(lock_file) -> None:
+    """
+    Release the lock taken by _lock_file().
+    """
+    if os.name == 'nt':
+        import msvcrt
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
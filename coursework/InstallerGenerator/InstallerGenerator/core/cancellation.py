@@ -0,0 +1,112 @@
+import os
+import signal
+import subprocess
+import threading
+from typing import Set
+
+
+def terminate_process_tree(process: subprocess.Popen) -> None:
+    """
+    Terminate a process together with every process it started.
+
+    Compiler processes are started in their own process group (POSIX) or process group and
+    console (Windows), so the whole tree can be stopped without touching the GUI process.
+
+    Args:
+        process (subprocess.Popen): The root process of the tree.
+    """
+    if process.poll() is not None:
+        return
+    try:
+        terminate_process_group(process.pid)
+    except (OSError, subprocess.SubprocessError):
+        process.kill()
+
+
+def terminate_process_group(pid: int) -> None:
+    """
+    Terminate the process group started by ``process_group_options`` for a process ID.
+
+    Also used for asyncio subprocesses, which are not subprocess.Popen objects.
+
+    Args:
+        pid (int): ID of the root process of the group.
+
+    Raises:
+        OSError: If the process group cannot be signalled.
+        subprocess.SubprocessError: If taskkill cannot be run.
+    """
+    if os.name == 'nt':
+        subprocess.run(['taskkill', '/T', '/F', '/PID', str(pid)], capture_output=True)
+    else:
+        os.killpg(pid, signal.SIGTERM)
+
+
+def process_group_options() -> dict:
+    """
+    Return the Popen keyword arguments that start a process in a new process group.
+
+    Returns:
+        dict: Keyword arguments for subprocess.Popen.
+    """
+    if os.name == 'nt':
+        return {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {'start_new_session': True}
+
+
+class CancellationToken:
+    """
+    Lets one thread cancel builds running on other threads.
+
+    Running compiler processes register themselves with the token; cancelling it marks the
+    builds as cancelled and terminates the process tree of every registered process.
+    Processes registered after cancellation are terminated straight away.
+    """
+
+    def __init__(self):
+        """
+        Initialize a CancellationToken that is not cancelled.
+        """
+        self._cancelled: bool = False
+        self._processes: Set[subprocess.Popen] = set()
+        self._lock: threading.Lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        """
+        Whether cancel() has been called.
+        """
+        return self._cancelled
+
+    def cancel(self) -> None:
+        """
+        Cancel the builds and terminate every running compiler process.
+        """
+        with self._lock:
+            self._cancelled = True
+            processes = list(self._processes)
+        for process in processes:
+            terminate_process_tree(process)
+
+    def register(self, process: subprocess.Popen) -> None:
+        """
+        Track a running compiler process.
+
+        Args:
+            process (subprocess.Popen): The process to terminate on cancellation.
+        """
+        with self._lock:
+            self._processes.add(process)
+            cancelled = self._cancelled
+        if cancelled:
+            terminate_process_tree(process)
+
+    def unregister(self, process: subprocess.Popen) -> None:
+        """
+        Stop tracking a finished compiler process.
+
+        Args:
+            process (subprocess.Popen): The finished process.
+        """
+        with self._lock:
+            self._processes.discard(process)
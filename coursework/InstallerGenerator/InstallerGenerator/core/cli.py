@@ -0,0 +1,229 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Iterable, List, Optional, Set
+
+from .base_config import build_cache_directory, build_cache_max_bytes
+from .batch import BatchManifest
+from .build_cache import BuildCache
+from .cancellation import CancellationToken
+from .profiles import profile_names
+from .scheduler import BuildJob, BuildResult, BuildScheduler
+
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parse the command line of the headless builder.
+
+    Args:
+        argv (Optional[List[str]]): The arguments, defaulting to sys.argv.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Build the installers described by a batch manifest.")
+    parser.add_argument("manifest", help="Path of the JSON or TOML batch manifest.")
+    parser.add_argument("-j", "--jobs", type=int, help="Maximum number of concurrent tasks. Defaults to the CPU count.")
+    parser.add_argument("--summary", default="-",
+                        help="Where to write the JSON result summary. Defaults to standard output ('-').")
+    parser.add_argument("--no-cache", action="store_true", help="Always run the compilers, ignoring the build cache.")
+    parser.add_argument("--quiet", action="store_true", help="Do not print compiler output.")
+    parser.add_argument("--profile", choices=profile_names(),
+                        help="Build profile of every installer, overriding the manifest and INSTALLER_BUILD_PROFILE.")
+    parser.add_argument("--watch", action="store_true",
+                        help="After the first build, rebuild the installers of a source directory whenever it changes.")
+    parser.add_argument("--debounce", type=float, default=0.5,
+                        help="Seconds without changes before a watch rebuild starts.")
+    parser.add_argument("--farm-workers", type=int, default=0,
+                        help="Build on a farm of this many local worker processes instead of in this process.")
+    parser.add_argument("--farm-listen", metavar="HOST:PORT",
+                        help="Build on a farm, accepting workers started with 'python -m core.farm.worker' "
+                             "at this address.")
+    return parser.parse_args(argv)
+
+
+def build_summary(manifest_path: str, results: List[BuildResult], duration: float,
+                  payload_summary: Optional[dict] = None) -> dict:
+    """
+    Summarize the results of a batch as JSON-serializable data.
+
+    Args:
+        manifest_path (str): Path of the batch manifest.
+        results (List[BuildResult]): The results of the batch.
+        duration (float): Wall-clock seconds the batch took.
+        payload_summary (Optional[dict]): Shared payload statistics of the batch.
+
+    Returns:
+        dict: The summary.
+    """
+    return {
+        'manifest': manifest_path,
+        'total': len(results),
+        'succeeded': sum(1 for result in results if result.success),
+        'failed': sum(1 for result in results if not result.success),
+        'cached': sum(1 for result in results if result.success and result.cached),
+        'duration': duration,
+        'payload': {
+            'shared_files': (payload_summary or {}).get('shared_files', 0),
+            'shared_bytes': (payload_summary or {}).get('shared_bytes', 0),
+            'bytes_saved': sum(result.payload['bytes_saved'] for result in results if result.payload),
+        },
+        'results': [result.to_dict() for result in results],
+    }
+
+
+def write_summary(summary: dict, destination: str) -> None:
+    """
+    Write the JSON result summary to a file, or to standard output if the destination is '-'.
+
+    Args:
+        summary (dict): The summary.
+        destination (str): Path of the summary file or '-'.
+    """
+    if destination == "-":
+        print(json.dumps(summary, indent=2))
+        return
+    summary_directory = os.path.dirname(destination)
+    if summary_directory:
+        os.makedirs(summary_directory, exist_ok=True)
+    with open(destination, 'w') as summary_file:
+        json.dump(summary, summary_file, indent=2)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Build every installer of a batch manifest without the GUI.
+
+    Progress and compiler output are written to standard error and the JSON summary to
+    ``--summary``. Interrupting the process cancels the running compilers.
+
+    With ``--farm-workers`` or ``--farm-listen`` the jobs are distributed over build farm
+    workers (see core.farm) instead of being built in this process, and the summary reports
+    the jobs each worker completed.
+
+    With ``--watch`` the source directories are watched after the first build, and the
+    installers of a changed directory are rebuilt and summarized again until the process
+    is interrupted. Rebuilds reuse the build cache, so only changed outputs are compiled.
+
+    Usage (from the InstallerGenerator directory):
+        python build.py batch.toml [-j 4] [--summary results.json] [--no-cache] [--quiet] [--profile fast] [--watch]
+            [--farm-workers 4] [--farm-listen 127.0.0.1:8765]
+
+    Args:
+        argv (Optional[List[str]]): The arguments, defaulting to sys.argv.
+
+    Returns:
+        int: 0 if every installer was built, 1 if any failed and 2 if the manifest is invalid.
+    """
+    arguments = parse_arguments(argv)
+    try:
+        batch = BatchManifest.load(arguments.manifest)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 2
+
+    scanners = batch.create_scanners()
+    manifests = {source: scanner.scan() for source, scanner in scanners.items()}
+    output_lock = threading.Lock()
+
+    def on_output(job: BuildJob, step_name: str, line: str) -> None:
+        with output_lock:
+            print(f"[{job.installer_name} {job.installer_type} {step_name}] {line}", file=sys.stderr)
+
+    def on_job_finished(result: BuildResult) -> None:
+        status = "cached" if result.cached and result.success else "ok" if result.success else "FAILED"
+        message = f" - {result.error}" if result.error else ""
+        with output_lock:
+            print(f"{status}: {result.job.installer_type} {result.job.installer_name}{message}", file=sys.stderr)
+
+    build_cache = None if arguments.no_cache else BuildCache(build_cache_directory, max_bytes=build_cache_max_bytes)
+    cancellations: List[CancellationToken] = []
+
+    coordinator = None
+    farm_processes: List[subprocess.Popen] = []
+    if arguments.farm_workers or arguments.farm_listen:
+        from .farm.coordinator import FarmCoordinator
+        from .farm.worker import start_local_workers, stop_local_workers
+
+        host, _, port = (arguments.farm_listen or "127.0.0.1:0").rpartition(':')
+        try:
+            coordinator = FarmCoordinator(host or "127.0.0.1", int(port), on_job_finished=on_job_finished,
+                                          on_output=None if arguments.quiet else on_output)
+        except (OSError, ValueError) as error:
+            print(f"Cannot start the build farm coordinator on {arguments.farm_listen}: {error}", file=sys.stderr)
+            return 2
+        coordinator.start()
+        print(f"Build farm coordinator listening on {coordinator.url}", file=sys.stderr)
+        farm_processes = start_local_workers(coordinator.url, arguments.farm_workers,
+                                             None if arguments.no_cache else build_cache_directory)
+
+    def build(sources: Iterable[str]) -> dict:
+        start = time.perf_counter()
+        jobs = [job for job in batch.build_jobs(manifests, arguments.profile) if job.source_directory in sources]
+        for output_directory in {job.output_directory for job in jobs}:
+            os.makedirs(output_directory, exist_ok=True)
+        cancellations.append(CancellationToken())
+        if coordinator is not None:
+            results = coordinator.run(jobs, cancellation=cancellations[-1],
+                                      worker_timeout=coordinator.lease_timeout if farm_processes else None)
+            payload_summary = None
+        else:
+            scheduler = BuildScheduler(max_workers=arguments.jobs, build_cache=build_cache,
+                                       on_output=None if arguments.quiet else on_output,
+                                       on_job_finished=on_job_finished, cancellation=cancellations[-1])
+            results = scheduler.run(jobs)
+            payload_summary = scheduler.payload_summary
+        for source in sources:
+            scanners[source].save()
+        summary = build_summary(arguments.manifest, results, time.perf_counter() - start, payload_summary)
+        if coordinator is not None:
+            summary['farm'] = coordinator.summary()
+        write_summary(summary, arguments.summary)
+        return summary
+
+    summaries: List[dict] = []
+    try:
+        worker = threading.Thread(target=lambda: summaries.append(build(list(scanners))), daemon=True)
+        worker.start()
+        try:
+            while worker.is_alive():
+                worker.join(0.2)
+        except KeyboardInterrupt:
+            print(BuildScheduler.CANCELLED_MESSAGE, file=sys.stderr)
+            cancellations[-1].cancel()
+            worker.join()
+            arguments.watch = False
+
+        if arguments.watch:
+            from .watcher import RebuildLoop, create_watcher
+
+            def rebuild(sources: Set[str]) -> None:
+                with output_lock:
+                    print(f"Rebuilding after changes in {', '.join(sorted(sources))}", file=sys.stderr)
+                for source in sources:
+                    manifests[source] = scanners[source].scan()
+                build(sources)
+
+            output_directories = [installer['output'] for installer in batch.installers]
+            watcher = create_watcher(scanners, ignored=output_directories + [build_cache_directory])
+            loop = RebuildLoop(watcher, rebuild, debounce=arguments.debounce)
+            print(f"Watching {len(scanners)} source director{'y' if len(scanners) == 1 else 'ies'} "
+                  f"with {type(watcher).__name__}; press Ctrl+C to stop.", file=sys.stderr)
+            try:
+                loop.run()
+            except KeyboardInterrupt:
+                cancellations[-1].cancel()
+                loop.join()
+            finally:
+                watcher.close()
+            return 0
+
+        return 0 if summaries and summaries[0]['total'] and summaries[0]['failed'] == 0 else 1
+    finally:
+        if coordinator is not None:
+            coordinator.close()
+            stop_local_workers(farm_processes)
@@ -1,4 +1,16 @@
+import asyncio
+import os
+import time
 from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+from .build_step import BuildStep
+from ..build_cache import BuildCache
+from ..file_table import FileTable
+from ..factories.installer_flyweight import InstallerFlyweightFactory
+from ..preflight import PreflightError, PreflightReport, run_preflight
+from ..profiles import get_profile
+from ..telemetry import BuildRecorder
 
 
 class InstallerCreator(ABC):
@@ -10,9 +22,24 @@ class InstallerCreator(ABC):
         output_directory (str): Output directory for the generated installer.
         file_list (list): List of files to include in the installer.
         installer_name (str): Name of the installer to be created.
+        installer_type (str): Installer type identifier, also used as the flyweight key.
+        build_cache (Optional[BuildCache]): Cache of previously built installers, if any.
+        manifest (Optional[FileManifest]): Scanned manifest of the source directory, if any.
+        telemetry (Optional[BuildRecorder]): Recorder of the current build's measurements, if any.
+        preflight_report (Optional[PreflightReport]): Result of the last pre-flight check of the input files.
+        shared_files (List[str]): Files whose compressed payload is shared with other installers.
+        profile (BuildProfile): Compression settings of the build.
     """
+    installer_type: str = ""
+    payload_bytes_saved: int = 0
+    telemetry: Optional[BuildRecorder] = None
+    preflight_report: Optional[PreflightReport] = None
+    _cache_key: Optional[str] = None
+    _file_table: Optional[FileTable] = None
+    _file_table_source: Optional[List[str]] = None
 
-    def __init__(self, source_directory, output_directory, file_list, installer_name):
+    def __init__(self, source_directory, output_directory, file_list, installer_name, build_cache=None,
+                 manifest=None, shared_files=None, profile=None, preflight_report=None):
         """
         Initializes the InstallerCreator with necessary information.
 
@@ -21,11 +48,21 @@ class InstallerCreator(ABC):
             output_directory (str): Output directory for the installer.
             file_list (list): List of files to include.
             installer_name (str): Name of the installer.
+            build_cache (Optional[BuildCache]): Cache of previously built installers.
+            manifest (Optional[FileManifest]): Scanned manifest of the source directory.
+            shared_files (Optional[List[str]]): Files whose compressed payload is shared with other installers.
+            profile (Optional[str]): Name of the build profile, defaulting to INSTALLER_BUILD_PROFILE.
+            preflight_report (Optional[PreflightReport]): Pre-flight check of the files made earlier in the batch.
         """
         self.source_directory = source_directory
         self.output_directory = output_directory
         self.file_list = file_list
         self.installer_name = installer_name
+        self.build_cache = build_cache
+        self.manifest = manifest
+        self.shared_files = shared_files or []
+        self.profile = get_profile(profile)
+        self.preflight_report = preflight_report
 
     @abstractmethod
     def create_installer(self):
@@ -34,4 +71,316 @@ class InstallerCreator(ABC):
 
         This method must be implemented by subclasses.
         """
-        pass
\ No newline at end of file
+        pass
+
+    def validate(self) -> None:
+        """
+        Checks that the creator has everything it needs to build an installer.
+
+        Every input file is checked and hashed by the pre-flight stage before any script is
+        written, so a missing or unreadable file fails the build before a compiler is started.
+        A report the creator was given for exactly its file list, e.g. by the payload planning
+        of its batch, is reused instead of checking and hashing every file again. The number and size of the input files are recorded in the build's telemetry from the
+        sizes the check found, so no file is stat'ed twice.
+
+        Raises:
+            ValueError: If no files are selected or the installer name is empty.
+            PreflightError: If an input file is missing, not a regular file or unreadable.
+        """
+        if not self.file_list:
+            raise ValueError("No files selected. Please select files to include in the installer.")
+
+        if not self.installer_name:
+            raise ValueError(f"Please enter a name for the {self.installer_type} file.")
+
+        report = self.preflight_report
+        if report is None or report.files.keys() != set(self.file_list):
+            start = time.perf_counter()
+            try:
+                self.preflight_report = run_preflight(self.source_directory, self.file_list, self.manifest)
+            except PreflightError as error:
+                if self.telemetry is not None:
+                    self.telemetry.set_inputs(len(self.file_list), error.report.total_size())
+                raise
+            finally:
+                self.record_phase('preflight', time.perf_counter() - start)
+        self.file_table().record_checked_files(self.preflight_report.files)
+        if self.telemetry is not None:
+            self.telemetry.set_inputs(*self.input_statistics())
+
+    def file_table(self) -> FileTable:
+        """
+        Returns the compact table of the included files, shared by the script emitters.
+
+        The table is built on first use and rebuilt only if the file list is replaced, so the
+        paths are split and sorted once per build rather than once per emitter and pass.
+
+        Returns:
+            FileTable: The table of the file list.
+        """
+        if self._file_table is None or self._file_table_source is not self.file_list \
+                or len(self._file_table) != len(self.file_list):
+            entries = self.manifest.entries() if self.manifest is not None else None
+            self._file_table = FileTable.from_paths(self.file_list, entries)
+            self._file_table_source = self.file_list
+        return self._file_table
+
+    @abstractmethod
+    def output_path(self) -> str:
+        """
+        Returns the path of the installer produced by a successful build.
+
+        This method must be implemented by subclasses.
+
+        Returns:
+            str: Path of the installer file.
+        """
+        pass
+
+    @abstractmethod
+    def prepare_build(self) -> List[BuildStep]:
+        """
+        Generates the installer script and returns the compiler steps needed to build it.
+
+        The steps are returned in an order that satisfies their dependencies, so they can
+        be run one after another, or handed to a scheduler that runs independent steps
+        concurrently. This method must be implemented by subclasses.
+
+        Returns:
+            List[BuildStep]: The compiler invocations of this build.
+
+        Raises:
+            ValueError: If the creator is not configured correctly.
+        """
+        pass
+
+    def file_hashes(self) -> Dict[str, str]:
+        """
+        Returns the content digests of the included files that are already known.
+
+        Digests come from the pre-flight check, or else from the manifest of the source
+        directory, so files are not hashed again when an up-to-date digest is known.
+
+        Returns:
+            Dict[str, str]: Content digests keyed by file name.
+        """
+        if self.preflight_report is not None:
+            return self.preflight_report.file_hashes()
+        if self.manifest is None:
+            return {}
+        return self.manifest.file_hashes(self.file_list)
+
+    def restore_from_cache(self, script_digest: str, compilers: List[str]) -> bool:
+        """
+        Reuse a cached installer if an identical build has been done before.
+
+        On a miss the cache key is remembered, so finish_build() can store the new installer.
+
+        Args:
+            script_digest (str): Digest of the generated installer script.
+            compilers (List[str]): Paths of the compiler executables used by the build.
+
+        Returns:
+            bool: True if the installer was restored from the cache.
+        """
+        self._cache_key = None
+        if self.build_cache is None:
+            return False
+
+        cache_key = BuildCache.compute_key(script_digest, self.source_directory, self.file_list, compilers,
+                                           file_hashes=self.file_hashes())
+        if self.build_cache.restore(cache_key, self.output_path()):
+            if self.telemetry is not None:
+                self.telemetry.cached = True
+            return True
+        self._cache_key = cache_key
+        return False
+
+    def record_phase(self, phase: str, duration: float) -> None:
+        """
+        Records the duration of a build phase in the build's telemetry, if it is being recorded.
+
+        Args:
+            phase (str): Name of the phase (e.g. 'script_generation', 'candle').
+            duration (float): Seconds spent in the phase.
+        """
+        if self.telemetry is not None:
+            self.telemetry.record_phase(phase, duration)
+
+    def record_phases(self, timings: Dict[str, float]) -> None:
+        """
+        Records the durations of several build phases.
+
+        Args:
+            timings (Dict[str, float]): Seconds spent in each phase, keyed by phase name.
+        """
+        for phase, duration in timings.items():
+            self.record_phase(phase, duration)
+
+    def input_statistics(self) -> Tuple[int, int]:
+        """
+        Returns the number and total size of the included files.
+
+        Sizes are taken from the file table, which knows them from the manifest or the pre-flight
+        check; other files are stat'ed. Files that cannot be found are counted but add nothing
+        to the size.
+
+        Returns:
+            Tuple[int, int]: The number of files and their total size in bytes.
+        """
+        table = self.file_table()
+        input_bytes = 0
+        for position, size in enumerate(table.sizes):
+            if size < 0:
+                try:
+                    size = os.path.getsize(os.path.join(self.source_directory, table.path(position)))
+                except OSError:
+                    continue
+            input_bytes += size
+        return len(table), input_bytes
+
+    def payload_report(self) -> Dict[str, int]:
+        """
+        Returns how much of the installer's payload is shared with other installers.
+
+        Returns:
+            Dict[str, int]: 'shared_files' and 'shared_bytes' (files shared with other installers of the batch)
+                and 'bytes_saved' (bytes of those that were reused instead of compressed again).
+        """
+        files = self.preflight_report.files if self.preflight_report is not None else {}
+        return {
+            'shared_files': len(self.shared_files),
+            'shared_bytes': sum(files[file].size for file in self.shared_files if file in files),
+            'bytes_saved': self.payload_bytes_saved,
+        }
+
+    def fail_build(self, error: str) -> None:
+        """
+        Hook called when a build step failed or could not be run.
+
+        Args:
+            error (str): Description of the failure.
+        """
+        pass
+
+    def finish_build(self) -> None:
+        """
+        Hook called after every build step has finished successfully.
+
+        Stores the freshly built installer in the build cache, if one is configured.
+        """
+        if self.build_cache is not None and self._cache_key is not None:
+            self.build_cache.store(self._cache_key, self.output_path())
+            self._cache_key = None
+
+    def run_build_steps(self, steps: List[BuildStep]) -> bool:
+        """
+        Runs build steps one after another through the queue of the shared installer flyweight.
+
+        fail_build() is called as soon as a step fails or cannot be run, finish_build() once
+        every step has succeeded.
+
+        Args:
+            steps (List[BuildStep]): Steps in dependency order.
+
+        Returns:
+            bool: True if every step succeeded and produced its outputs.
+        """
+        flyweight = InstallerFlyweightFactory.get_flyweight(self.installer_type)
+        for step in steps:
+            start = time.perf_counter()
+            try:
+                compile_result = flyweight.submit(step.command).result()
+            except Exception as error:
+                self.fail_build(f"{step.name} could not be run: {error}")
+                raise
+            finally:
+                self.record_phase(step.name, time.perf_counter() - start)
+            error = self._step_error(step, compile_result.returncode)
+            if error is not None:
+                self.fail_build(error)
+                return False
+        self.finish_build()
+        return True
+
+    async def acreate_installer(self, timeout: Optional[float] = None) -> bool:
+        """
+        Creates the installer without blocking the event loop.
+
+        The script is written and the build cache consulted on a worker thread, then the
+        compiler steps run as asyncio subprocesses. Cancelling the awaiting task terminates
+        the running compiler.
+
+        Args:
+            timeout (Optional[float]): Seconds each compiler step may run.
+
+        Returns:
+            bool: True if the installer was built or restored from the build cache.
+        """
+        try:
+            steps = await asyncio.to_thread(self.prepare_build)
+        except ValueError as error:
+            print(error)
+            return False
+
+        if not steps:
+            print(f"{self.installer_type} installer restored from the build cache.")
+            return True
+
+        if not await self.arun_build_steps(steps, timeout):
+            return False
+        print(f"{self.installer_type} installer created successfully in the output directory.")
+        return True
+
+    async def arun_build_steps(self, steps: List[BuildStep], timeout: Optional[float] = None) -> bool:
+        """
+        Runs build steps one after another as asyncio subprocesses.
+
+        Like run_build_steps(), calls fail_build() when a step fails, times out, is cancelled or
+        cannot be run.
+
+        Args:
+            steps (List[BuildStep]): Steps in dependency order.
+            timeout (Optional[float]): Seconds each step may run.
+
+        Returns:
+            bool: True if every step succeeded and produced its outputs.
+        """
+        flyweight = InstallerFlyweightFactory.get_flyweight(self.installer_type)
+        for step in steps:
+            start = time.perf_counter()
+            try:
+                compile_result = await flyweight.acompile_script(step.command, timeout=timeout)
+            except asyncio.TimeoutError:
+                print(f"{step.name} did not finish within {timeout} seconds.")
+                self.fail_build(f"{step.name} did not finish within {timeout} seconds")
+                return False
+            except asyncio.CancelledError:
+                self.fail_build(f"{step.name} was cancelled")
+                raise
+            except Exception as error:
+                self.fail_build(f"{step.name} could not be run: {error}")
+                raise
+            finally:
+                self.record_phase(step.name, time.perf_counter() - start)
+            error = self._step_error(step, compile_result.returncode)
+            if error is not None:
+                self.fail_build(error)
+                return False
+        await asyncio.to_thread(self.finish_build)
+        return True
+
+    @staticmethod
+    def _step_error(step: BuildStep, returncode: int) -> Optional[str]:
+        """
+        Checks the result of a finished step, runs its success hook and returns an error description if it failed.
+        """
+        if returncode != 0:
+            return f"{step.name} exited with code {returncode}"
+        missing_outputs = step.missing_outputs()
+        if missing_outputs:
+            print(f"{os.path.basename(missing_outputs[0])} not created. Compilation may have failed.")
+            return f"{step.name} did not create {missing_outputs[0]}"
+        if step.on_success is not None:
+            step.on_success()
+        return None
@@ -0,0 +1,48 @@
+import os
+from typing import Callable, List, Optional
+
+
+class BuildStep:
+    """
+    A single compiler invocation that is part of an installer build.
+
+    Steps form a small dependency graph: a step may only run once every step named
+    in its ``depends_on`` list has finished successfully.
+
+    Attributes:
+        name (str): Name of the step, unique within one build (e.g. 'candle').
+        command (List[str]): The command line used to run the compiler.
+        depends_on (List[str]): Names of the steps that must finish first.
+        outputs (List[str]): Files the step must produce to be considered successful.
+        on_success (Optional[Callable[[], None]]): Called once the step has succeeded and produced its outputs.
+    """
+
+    def __init__(self, name: str, command: List[str], depends_on: Optional[List[str]] = None,
+                 outputs: Optional[List[str]] = None, on_success: Optional[Callable[[], None]] = None):
+        """
+        Initialize the BuildStep.
+
+        Args:
+            name (str): Name of the step.
+            command (List[str]): The command line used to run the compiler.
+            depends_on (Optional[List[str]]): Names of the steps that must finish first.
+            outputs (Optional[List[str]]): Files the step must produce.
+            on_success (Optional[Callable[[], None]]): Called once the step has succeeded.
+        """
+        self.name: str = name
+        self.command: List[str] = command
+        self.depends_on: List[str] = depends_on or []
+        self.outputs: List[str] = outputs or []
+        self.on_success: Optional[Callable[[], None]] = on_success
+
+    def missing_outputs(self) -> List[str]:
+        """
+        Returns the expected output files that do not exist.
+
+        Returns:
+            List[str]: Paths of the outputs that were not produced.
+        """
+        return [output for output in self.outputs if not os.path.exists(output)]
+
+    def __repr__(self) -> str:
+        return f"BuildStep({self.name!r}, depends_on={self.depends_on!r})"
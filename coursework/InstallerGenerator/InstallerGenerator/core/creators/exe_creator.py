@@ -1,11 +1,18 @@
 import os
-import subprocess
-from typing import List, Iterator
+from typing import Dict, List, Iterator, Optional, Tuple
 
 from .abc_creator import InstallerCreator
-from ..base_config import inno_setup_compiler
+from .build_step import BuildStep
+from .script_writer import write_script
+from ..build_cache import BuildCache
+from ..preflight import PreflightReport
+from ..profiles import BuildProfile, get_profile
+from ..scanner import FileManifest
+from ..templates.builtin import INNO_SETUP_TEMPLATE
+from ..templates.engine import Template, load_template
+from ..templates.escaping import escape_inno
+from ..base_config import inno_setup_compiler, inno_setup_template
 from ..iterator import FileListIterator
-from ..factories.installer_flyweight import InstallerFlyweightFactory
 
 class EXECreator(InstallerCreator):
     """
@@ -16,9 +23,15 @@ class EXECreator(InstallerCreator):
         output_directory (str): Directory where the EXE installer will be created.
         file_list (List[str]): List of files to be included in the installer.
         installer_name (str): Name of the installer.
+        template_path (Optional[str]): Custom Inno Setup template replacing the built-in one.
     """
+    installer_type: str = "EXE"
+    template_path: Optional[str] = inno_setup_template
 
-    def __init__(self, source_directory: str, output_directory: str, file_list: List[str], installer_name: str):
+    def __init__(self, source_directory: str, output_directory: str, file_list: List[str], installer_name: str,
+                 build_cache: Optional[BuildCache] = None, manifest: Optional[FileManifest] = None,
+                 shared_files: Optional[List[str]] = None, profile: Optional[str] = None,
+                 preflight_report: Optional[PreflightReport] = None):
         """
         Initialize the EXECreator.
 
@@ -27,11 +40,24 @@ class EXECreator(InstallerCreator):
             output_directory (str): Output directory for the installer.
             file_list (List[str]): List of files to include in the installer.
             installer_name (str): Name for the EXE file.
+            build_cache (Optional[BuildCache]): Cache of previously built installers.
+            manifest (Optional[FileManifest]): Scanned manifest of the source directory.
+            shared_files (Optional[List[str]]): Files whose compressed payload is shared with other installers.
+            profile (Optional[str]): Name of the build profile, defaulting to INSTALLER_BUILD_PROFILE.
+            preflight_report (Optional[PreflightReport]): Pre-flight check of the files made earlier in the batch.
+
+        Raises:
+            ValueError: If the build profile is unknown.
         """
         self.source_directory: str = source_directory
         self.output_directory: str = output_directory
         self.file_list: List[str] = file_list
         self.installer_name: str = installer_name
+        self.build_cache: Optional[BuildCache] = build_cache
+        self.manifest: Optional[FileManifest] = manifest
+        self.shared_files: List[str] = shared_files or []
+        self.profile: BuildProfile = get_profile(profile)
+        self.preflight_report: Optional[PreflightReport] = preflight_report
 
     def __iter__(self) -> Iterator[str]:
         """
@@ -42,31 +68,60 @@ class EXECreator(InstallerCreator):
         """
         return FileListIterator(self.file_list)
 
-    def create_installer(self) -> None:
+    def create_installer(self) -> bool:
         """
         Creates an EXE installer.
 
         This method handles the logic for generating an EXE installer.
         """
-        if not self.file_list:
-            print("No files selected. Please select files to include in the installer.")
-            return
+        try:
+            steps = self.prepare_build()
+        except ValueError as error:
+            print(error)
+            return False
+
+        if not steps:
+            print("EXE installer restored from the build cache.")
+            return True
+
+        if not self.run_build_steps(steps):
+            return False
+        print("EXE installer created successfully in the output directory.")
+        return True
 
-        if not self.installer_name:
-            print("Please enter a name for the EXE file.")
-            return
+    def output_path(self) -> str:
+        """
+        Returns the path of the EXE installer produced by Inno Setup.
 
-        script_path = os.path.join(self.output_directory, "setup_script.iss")
-        with open(script_path, "w") as script_file:
-            script_file.write(self.generate_inno_setup_script())
+        Returns:
+            str: Path of the EXE file.
+        """
+        return os.path.join(self.output_directory, f"{self.installer_name}_installer.exe")
 
-        inno_setup_compiler = r"C:\Program Files (x86)\Inno Setup 6\ISCC.exe"
-        compile_command = [inno_setup_compiler, script_path]
+    def prepare_build(self) -> List[BuildStep]:
+        """
+        Writes the Inno Setup script and returns the compile step for it.
 
-        flyweight = InstallerFlyweightFactory.get_flyweight("EXE")
-        flyweight.compile_script(compile_command)
+        If an identical build is found in the build cache, the cached installer is restored
+        and no steps are returned.
 
-        print("EXE installer created successfully in the output directory.")
+        Returns:
+            List[BuildStep]: The single ISCC step of the build, or an empty list on a cache hit.
+
+        Raises:
+            ValueError: If no files are selected or the installer name is empty.
+        """
+        self.validate()
+
+        script_path = os.path.join(self.output_directory, f"{self.installer_name}_setup_script.iss")
+        timings = {}
+        script_digest = write_script(script_path, self.iter_inno_setup_script(), timings=timings)
+        self.record_phases(timings)
+        if self.restore_from_cache(script_digest, [inno_setup_compiler]):
+            return []
+
+        compile_command = [inno_setup_compiler, script_path]
+        return [BuildStep("iscc", compile_command, outputs=[self.output_path()])]
 
     def generate_inno_setup_script(self) -> str:
         """
@@ -75,34 +130,56 @@ class EXECreator(InstallerCreator):
         Returns:
             str: A string containing the Inno Setup script.
         """
-        script = f"""
-                    [Setup]
-                    AppName={self.installer_name}
-                    AppVersion=1.0
-                    DefaultDirName={{autopf}}\\{self.installer_name}
-                    OutputDir={self.output_directory}
-                    OutputBaseFilename={self.installer_name}_installer
-                    Compression=lzma
-                    SolidCompression=yes
-                    [Files]
-                    """
-
-        for file in self:
-            script += f"Source: \"{os.path.join(self.source_directory, file)}\"; DestDir: \"{{app}}\"\n"
-        return script
+        return "".join(self.iter_inno_setup_script())
 
-    def compile_exe_script(self, script_path: str) -> None:
+    def iter_inno_setup_script(self) -> Iterator[str]:
         """
-        Compiles the EXE script using Inno Setup Compiler.
+        Generates the Inno Setup script piece by piece.
 
-        Args:
-            script_path (str): Path to the script file.
+        The script is rendered from the compiled Inno Setup template (``INSTALLER_INNO_TEMPLATE``
+        or the built-in one). The [Setup] section is yielded first, followed by one [Files]
+        line per file, in file list order, so the script can be streamed to disk without building
+        it in memory. Values are quoted for Inno Setup, and the compression directives come from
+        the build profile.
+
+        Yields:
+            str: The next part of the Inno Setup script.
+
+        Raises:
+            TemplateError: If the template is invalid or refers to an unknown value.
         """
+        template = load_template(self.template_path) if self.template_path else \
+            Template.from_string(INNO_SETUP_TEMPLATE, 'inno', name='built-in Inno Setup template')
+        yield from template.render({
+            'installer_name': self.installer_name,
+            'output_directory': self.output_directory,
+            'output_base_filename': f"{self.installer_name}_installer",
+            'compression': self.profile.inno_compression,
+            'solid_compression': 'yes' if self.profile.inno_solid_compression else 'no',
+            'files': self.iter_file_contexts(),
+        })
+
+    def iter_file_contexts(self) -> Iterator[dict]:
+        """
+        Generates the template values of each file's [Files] line, in file list order.
 
-        compile_command = [inno_setup_compiler, script_path]
-        compile_result = subprocess.run(compile_command, capture_output=True, text=True)
-        if compile_result.returncode != 0:
-            print(f"Inno Setup error output: {compile_result.stderr}")
-            return
-        print(f"Inno Setup output: {compile_result.stdout}")
-        print("EXE installer created successfully in the output directory.")
+        Each distinct directory of the file table is joined to the source directory once, and a
+        file's source is that prefix followed by its base name. Files are installed into the
+        same subdirectory of {app} they have below the source directory; the destination of a
+        directory is built and quoted for Inno Setup once, when its first file is reached.
+
+        Yields:
+            dict: The 'source' and 'dest_dir' of the next file.
+        """
+        table = self.file_table()
+        sources = [os.path.join(self.source_directory, directory) for directory in table.directories]
+        destinations: Dict[Tuple[str, ...], str] = {}
+        positions = range(len(table))
+        last_parts, dest_dir = None, '{app}'
+        for directory, name, parts in zip(table.directory_indexes, table.names, table.iter_directory_parts(positions)):
+            if parts is not last_parts:
+                dest_dir = destinations.get(parts)
+                if dest_dir is None:
+                    dest_dir = destinations[parts] = '\\'.join(('{app}', *map(escape_inno, parts)))
+                last_parts = parts
+            yield {'source': sources[directory] + name, 'dest_dir': dest_dir}
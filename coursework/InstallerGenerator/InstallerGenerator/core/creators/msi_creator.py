@@ -1,11 +1,57 @@
+import hashlib
 import os
-import subprocess
+import shutil
+import tempfile
 import uuid
-from typing import List
+from array import array
+from typing import Callable, Iterator, List, Optional, Tuple
 
-from ..base_config import candle_exe_path, light_exe_path
-from ..factories.installer_flyweight import InstallerFlyweightFactory
+from ..base_config import candle_exe_path, light_exe_path, wix_template
 from .abc_creator import InstallerCreator
+from .build_step import BuildStep
+from .script_writer import write_script
+from ..build_cache import BuildCache
+from ..file_table import normalize_path
+from ..hashing import hash_file
+from ..payload import cabinet_name
+from ..preflight import PreflightReport
+from ..profiles import BuildProfile, get_profile
+from ..scanner import FileManifest
+from ..templates.builtin import WIX_COMPONENT_REFS_TEMPLATE, WIX_COMPONENTS_TEMPLATE, WIX_TEMPLATE
+from ..templates.engine import Stream, Template, load_template
+from ..wix_ids import IdentifierAllocator
+
+GUID_NAMESPACE = uuid.UUID('6f1c2a4e-9b57-5d0e-8c3a-2e7d41b9f0a6')
+RESERVED_DIRECTORY_IDS = ('TARGETDIR', 'ProgramFilesFolder', 'INSTALLFOLDER')
+
+
+_VARIANT_DIGITS = {digit: '89ab'[int(digit, 16) & 0x3] for digit in '0123456789abcdef'}
+
+
+def name_based_guids(prefix: str) -> Callable[[str], str]:
+    """
+    Returns a function computing the GUIDs of names that share a prefix.
+
+    The function returns ``str(uuid.uuid5(GUID_NAMESPACE, prefix + name)).upper()``, but the
+    namespace and the prefix are hashed only once, and no UUID object is created per name.
+
+    Args:
+        prefix (str): The prefix of every name.
+
+    Returns:
+        Callable[[str], str]: Function returning the upper-case GUID of a name.
+    """
+    prefix_digest = hashlib.sha1(GUID_NAMESPACE.bytes + prefix.encode('utf-8'), usedforsecurity=False)
+
+    def guid(name: str) -> str:
+        digest = prefix_digest.copy()
+        digest.update(name.encode('utf-8'))
+        hex_digest = digest.hexdigest()
+        return f"{hex_digest[:8]}-{hex_digest[8:12]}-5{hex_digest[13:16]}-{_VARIANT_DIGITS[hex_digest[16]]}" \
+               f"{hex_digest[17:20]}-{hex_digest[20:32]}".upper()
+
+    return guid
+
 
 class MSICreator(InstallerCreator):
     """
@@ -16,8 +62,17 @@ class MSICreator(InstallerCreator):
         output_directory (str): Directory where the MSI installer will be created.
         file_list (List[str]): List of files to be included in the installer.
         installer_name (str): Name of the installer.
+        template_path (Optional[str]): Custom WiX template replacing the built-in one.
     """
-    def __init__(self, source_directory: str, output_directory: str, file_list: List[str], installer_name: str):
+    installer_type: str = "MSI"
+    candle_arguments: List[str] = []
+    template_path: Optional[str] = wix_template
+    _build_directory: Optional[str] = None
+
+    def __init__(self, source_directory: str, output_directory: str, file_list: List[str], installer_name: str,
+                 build_cache: Optional[BuildCache] = None, manifest: Optional[FileManifest] = None,
+                 shared_files: Optional[List[str]] = None, profile: Optional[str] = None,
+                 preflight_report: Optional[PreflightReport] = None):
         """
         Initialize the MSICreator.
 
@@ -26,13 +81,26 @@ class MSICreator(InstallerCreator):
             output_directory (str): Output directory for the installer.
             file_list (List[str]): List of files to include in the installer.
             installer_name (str): Name for the MSI file.
+            build_cache (Optional[BuildCache]): Cache of previously built installers.
+            manifest (Optional[FileManifest]): Scanned manifest of the source directory.
+            shared_files (Optional[List[str]]): Files whose compressed payload is shared with other installers.
+            profile (Optional[str]): Name of the build profile, defaulting to INSTALLER_BUILD_PROFILE.
+            preflight_report (Optional[PreflightReport]): Pre-flight check of the files made earlier in the batch.
+
+        Raises:
+            ValueError: If the build profile is unknown.
         """
         self.source_directory: str = source_directory
         self.output_directory: str = output_directory
         self.file_list: List[str] = file_list
         self.installer_name: str = installer_name
+        self.build_cache: Optional[BuildCache] = build_cache
+        self.manifest: Optional[FileManifest] = manifest
+        self.shared_files: List[str] = shared_files or []
+        self.profile: BuildProfile = get_profile(profile)
+        self.preflight_report: Optional[PreflightReport] = preflight_report
 
-    def create_installer(self) -> None:
+    def create_installer(self) -> bool:
         """
         Creates an MSI installer.
 
@@ -40,32 +108,248 @@ class MSICreator(InstallerCreator):
         for the presence of required files and the installer name, and then proceeds
         to compile the MSI installer using WiX Toolset.
         """
-        if not self.file_list:
-            print("No files selected. Please select files to include in the installer.")
+        try:
+            steps = self.prepare_build()
+        except ValueError as error:
+            print(error)
+            return False
+
+        if not steps:
+            print("MSI installer restored from the build cache.")
+            return True
+
+        if not self.run_build_steps(steps):
+            return False
+        print("MSI installer created successfully in the output directory.")
+        return True
+
+    def validate(self) -> None:
+        """
+        Checks that the creator has everything it needs to build an MSI installer.
+
+        Besides the checks of every installer, each file is given its WiX identifier, so a file
+        listed twice is reported before the script is written and candle is started.
+
+        Raises:
+            ValueError: If no files are selected or the installer name is empty.
+            PreflightError: If an input file is missing, not a regular file or unreadable.
+            IdentifierError: If a file is listed more than once.
+        """
+        super().validate()
+        self.file_table().allocate_component_ids()
+
+    def output_path(self) -> str:
+        """
+        Returns the path of the MSI installer produced by light.
+
+        Returns:
+            str: Path of the MSI file.
+        """
+        return os.path.join(self.output_directory, self.installer_name + '.msi')
+
+    def prepare_build(self) -> List[BuildStep]:
+        """
+        Writes the WiX script and returns the candle and light steps for it.
+
+        Light links the object file produced by candle, so it depends on the candle step.
+        Intermediate files are written to a uniquely named build directory, so concurrent
+        builds into the same output directory do not overwrite each other.
+
+        If an identical build is found in the build cache, the cached installer is restored
+        and no steps are returned. If only the candle output is cached (e.g. the source file
+        contents changed while the script stayed the same), the object file is restored and
+        only the light step is returned.
+
+        Returns:
+            List[BuildStep]: The steps of the build, or an empty list on a cache hit.
+
+        Raises:
+            ValueError: If no files are selected, the installer name is empty or a file is listed twice.
+        """
+        self.validate()
+
+        self._build_directory = tempfile.mkdtemp(prefix=f"{self.installer_name}_", suffix=".build",
+                                                 dir=self.output_directory)
+        try:
+            msi_script_path = os.path.join(self._build_directory, 'installer.wxs')
+            timings = {}
+            script_digest = write_script(msi_script_path, self.iter_msi_script(), timings=timings)
+            self.record_phases(timings)
+            if self.restore_from_cache(script_digest, [candle_exe_path, light_exe_path]):
+                self.remove_build_directory()
+                return []
+
+            wixobj_file_path = os.path.join(self._build_directory, 'installer.wixobj')
+            light_command = [light_exe_path, '-b', self.source_directory, wixobj_file_path, '-o', self.output_path()]
+            light_step = BuildStep("light", light_command, outputs=[self.output_path()])
+            self.prepare_shared_cabinet(light_step)
+
+            candle_key = self.candle_cache_key(script_digest)
+            if self.build_cache is not None and self.build_cache.restore(candle_key, wixobj_file_path):
+                return [light_step]
+
+            def store_wixobj() -> None:
+                if self.build_cache is not None:
+                    self.build_cache.store(candle_key, wixobj_file_path)
+
+            candle_command = [candle_exe_path, *self.candle_arguments, msi_script_path, '-o', wixobj_file_path]
+            light_step.depends_on = ["candle"]
+            return [
+                BuildStep("candle", candle_command, outputs=[wixobj_file_path], on_success=store_wixobj),
+                light_step,
+            ]
+        except BaseException:
+            self.remove_build_directory()
+            raise
+
+    def prepare_shared_cabinet(self, light_step: BuildStep) -> None:
+        """
+        Lets light reuse the cabinet of the files shared with other installers.
+
+        Light is pointed at a cabinet cache inside the build directory and told to reuse the
+        cabinets it finds there. If the content-named shared cabinet is in the build cache it
+        is restored into that directory, so light embeds it without compressing the shared
+        files again; otherwise the cabinet light builds is stored once light has succeeded.
+
+        Args:
+            light_step (BuildStep): The light step of the build, which is extended in place.
+        """
+        cabinet = self.shared_cabinet_name()
+        if cabinet is None or self.build_cache is None:
             return
 
-        if not self.installer_name:
-            print("Please enter a name for the MSI file.")
+        cabinet_directory = os.path.join(self._build_directory, 'cabinets')
+        os.makedirs(cabinet_directory, exist_ok=True)
+        cabinet_path = os.path.join(cabinet_directory, cabinet)
+        light_step.command.extend(['-cc', cabinet_directory, '-reusecab'])
+
+        cabinet_key = BuildCache.compute_key("\0".join(["cabinet", cabinet]), self.source_directory, [],
+                                             [light_exe_path])
+        if self.build_cache.restore(cabinet_key, cabinet_path):
+            self.payload_bytes_saved = self.payload_report()['shared_bytes']
             return
 
-        msi_script_path = os.path.join(self.output_directory, "installer.wxs")
-        with open(msi_script_path, "w") as msi_script_file:
-            msi_script_file.write(self.generate_msi_script())
+        def store_cabinet() -> None:
+            if os.path.exists(cabinet_path):
+                self.build_cache.store(cabinet_key, cabinet_path)
 
-        wixobj_file_path = os.path.join(self.output_directory, 'installer.wixobj')
+        light_step.on_success = store_cabinet
 
-        candle_command = [candle_exe_path, msi_script_path, '-o', wixobj_file_path]
-        flyweight = InstallerFlyweightFactory.get_flyweight("MSI")
-        flyweight.compile_script(candle_command)
+    def shared_cabinet_name(self) -> Optional[str]:
+        """
+        Returns the name of the cabinet holding the files shared with other installers.
 
-        if not os.path.exists(wixobj_file_path):
-            print(".wixobj file not created. Compilation may have failed.")
-            return
+        The name is derived from the file IDs and contents of the shared files, so every
+        installer sharing the same files refers to the same cabinet.
 
-        light_command = [light_exe_path, wixobj_file_path, '-o', os.path.join(self.output_directory, self.installer_name + '.msi')]
-        flyweight.compile_script(light_command)
+        Returns:
+            Optional[str]: The cabinet name, or None if no files are shared.
+        """
+        if not self.shared_files:
+            return None
+        shared_files = set(self.shared_files)
+        file_hashes = self.file_hashes()
+        table = self.file_table()
+        component_ids = table.component_ids
+        members = []
+        for position in range(len(table)):
+            file = table.path(position)
+            if file in shared_files:
+                members.append((component_ids[position],
+                                file_hashes.get(file) or hash_file(os.path.join(self.source_directory, file))))
+        return cabinet_name(members, self.profile.compression_id())
 
-        print("MSI installer created successfully in the output directory.")
+    def disk_ids(self) -> Tuple[array, Optional[int]]:
+        """
+        Assigns every file to the cabinet (media disk) that holds it.
+
+        The files are split in sorted order into cabinets of ``files_per_cabinet`` files of the
+        build profile, so light can compress the cabinets in parallel and a change to one file
+        only invalidates its own cabinet. Files shared with other installers go into one more
+        cabinet after the others.
+
+        Returns:
+            Tuple[array, Optional[int]]: The media disk ID of every file by its position in the file
+                table, starting at 1, and the disk ID of the shared cabinet, or None if no file is shared.
+        """
+        table = self.file_table()
+        shared_files = set(self.shared_files)
+        shared_positions = {position for position in range(len(table)) if table.path(position) in shared_files} \
+            if shared_files else set()
+        own_count = len(table) - len(shared_positions)
+        files_per_cabinet = self.profile.files_per_cabinet or max(own_count, 1)
+        disk_ids = array('I', [1]) * len(table)
+        rank = 0
+        for position in table.order:
+            if position not in shared_positions:
+                disk_ids[position] = rank // files_per_cabinet + 1
+                rank += 1
+        if not shared_positions:
+            return disk_ids, None
+        shared_disk_id = (own_count - 1) // files_per_cabinet + 2 if own_count else 1
+        for position in shared_positions:
+            disk_ids[position] = shared_disk_id
+        return disk_ids, shared_disk_id
+
+    def media(self, disk_ids: array, shared_disk_id: Optional[int]) -> List[dict]:
+        """
+        Returns the <Media> of every cabinet, compressed at the profile's level.
+
+        Args:
+            disk_ids (array): The media disk ID of every file by its position in the file table.
+            shared_disk_id (Optional[int]): The disk ID of the shared cabinet, if any.
+
+        Returns:
+            List[dict]: The 'id', 'cabinet' and 'compression_level' of every cabinet.
+        """
+        shared_cabinet = self.shared_cabinet_name()
+        return [{
+            'id': disk_id,
+            'cabinet': shared_cabinet if disk_id == shared_disk_id else f"media{disk_id}.cab",
+            'compression_level': self.profile.wix_compression_level,
+        } for disk_id in range(1, max(disk_ids, default=1) + 1)]
+
+    def candle_cache_key(self, script_digest: str) -> str:
+        """
+        Computes the build cache key of the object file candle produces for a script.
+
+        The object file only references the source files by relative path, so the key depends on
+        the script, the candle arguments and the candle executable, but not on the file contents
+        or on where the sources are located.
+
+        Args:
+            script_digest (str): Digest of the generated WiX script.
+
+        Returns:
+            str: The cache key of the candle output.
+        """
+        candle_input = "\0".join(["candle", script_digest, *self.candle_arguments])
+        return BuildCache.compute_key(candle_input, self.source_directory, [], [candle_exe_path])
+
+    def fail_build(self, error: str) -> None:
+        """
+        Removes the intermediate files of a build whose steps failed or could not be run.
+
+        Args:
+            error (str): Description of the failure.
+        """
+        super().fail_build(error)
+        self.remove_build_directory()
+
+    def finish_build(self) -> None:
+        """
+        Stores the built installer in the build cache and removes the intermediate files.
+        """
+        super().finish_build()
+        self.remove_build_directory()
+
+    def remove_build_directory(self) -> None:
+        """
+        Removes the directory holding the intermediate files of the current build.
+        """
+        if self._build_directory is not None:
+            shutil.rmtree(self._build_directory, ignore_errors=True)
+            self._build_directory = None
 
     def generate_msi_script(self) -> str:
         """
@@ -74,30 +358,79 @@ class MSICreator(InstallerCreator):
         Returns:
             str: A string containing the WiX XML script necessary to create the MSI installer.
         """
-        new_guid = str(uuid.uuid4()).upper()
-        components_xml = self.generate_components()
-        component_refs_xml = self.generate_component_refs()
-
-        msi_script = f"""<?xml version="1.0" encoding="UTF-8"?>
-                        <Wix xmlns="http://schemas.microsoft.com/wix/2006/wi">
-                            <Product Id="*" Name="{self.installer_name}" Language="1033" Version="1.0.0.0" Manufacturer
-                            ="MyCompany" UpgradeCode="{new_guid}">       
-                                <Package InstallerVersion="200" Compressed="yes" InstallScope="perMachine" />
-                                <Media Id="1" Cabinet="media1.cab" EmbedCab="yes" />
-                                <Directory Id="TARGETDIR" Name="SourceDir">
-                                    <Directory Id="ProgramFilesFolder">
-                                        <Directory Id="INSTALLFOLDER" Name="{self.installer_name}">
-                                            {components_xml}
-                                        </Directory>
-                                    </Directory>
-                                </Directory>
-                                <Feature Id="ProductFeature" Title="{self.installer_name}" Level="1">
-                                    {component_refs_xml}
-                                </Feature>
-                            </Product>
-                        </Wix>
-                        """
-        return msi_script
+        return "".join(self.iter_msi_script())
+
+    def iter_msi_script(self) -> Iterator[str]:
+        """
+        Generates the WiX XML script piece by piece.
+
+        The script is rendered from the compiled WiX template (``INSTALLER_WIX_TEMPLATE`` or the
+        built-in one), which yields the components and component references one element at a
+        time, so the script can be streamed to disk without building it in memory. Components
+        are nested in <Directory> elements mirroring the source tree. Values are escaped for XML
+        attributes.
+
+        The script is deterministic: the UpgradeCode and the component GUIDs are name-based
+        UUIDs, files are listed in sorted order, and every element is on its own line with
+        indentation that only depends on its depth. Identical inputs therefore produce byte-identical scripts, which
+        lets the build cache reuse their output across builds and machines.
+
+        Yields:
+            str: The next part of the WiX XML script.
+
+        Raises:
+            TemplateError: If the template is invalid or refers to an unknown value.
+        """
+        disk_ids, shared_disk_id = self.disk_ids()
+        template = load_template(self.template_path) if self.template_path else \
+            Template.from_string(WIX_TEMPLATE, 'xml', name='built-in WiX template')
+        yield from template.render({
+            'installer_name': self.installer_name,
+            'upgrade_code': self.upgrade_code(),
+            'media': self.media(disk_ids, shared_disk_id),
+            'directory_tree': Stream(lambda: self.iter_directory_tree_contexts(disk_ids)),
+            'components': Stream(lambda: self.iter_component_contexts(disk_ids)),
+            'component_refs': Stream(self.iter_component_ref_contexts),
+        })
+
+    def upgrade_code(self) -> str:
+        """
+        Returns the UpgradeCode of the product, derived from the installer name.
+
+        Returns:
+            str: The UpgradeCode GUID in upper case.
+        """
+        return str(uuid.uuid5(GUID_NAMESPACE, f"upgrade:{self.installer_name}")).upper()
+
+    def component_guid(self, file: str) -> str:
+        """
+        Returns the GUID of a file's component, derived from the installer name and the file's relative path.
+
+        Args:
+            file (str): Path of the file relative to the source directory.
+
+        Returns:
+            str: The component GUID in upper case.
+        """
+        return self.component_guids()(normalize_path(file))
+
+    def component_guids(self) -> Callable[[str], str]:
+        """
+        Returns a function computing the component GUID of a file from its normalized relative path.
+
+        Returns:
+            Callable[[str], str]: Function returning the upper-case component GUID of a normalized path.
+        """
+        return name_based_guids(f"component:{self.installer_name}:")
+
+    def sorted_files(self) -> List[str]:
+        """
+        Returns the file list in the stable order the script lists it in.
+
+        Returns:
+            List[str]: The files sorted by their normalized relative path.
+        """
+        return self.file_table().sorted_paths()
 
     def generate_components(self) -> str:
         """
@@ -109,17 +442,101 @@ class MSICreator(InstallerCreator):
         Returns:
             str: A string containing XML components for the installer script.
         """
-        components_xml = ""
-        for file in self.file_list:
-            file_id = os.path.basename(file)
-            source_path = os.path.join(self.source_directory, file)
-            component_xml = f"""
-            <Component Id="{file_id}" Guid="{str(uuid.uuid4())}">
-                <File Id="{file_id}" Source="{source_path}" KeyPath="yes" />
-            </Component>
-            """
-            components_xml += component_xml
-        return components_xml
+        return "".join(self.iter_components())
+
+    def iter_components(self, disk_ids: Optional[array] = None) -> Iterator[str]:
+        """
+        Generates the XML component of each file, one file at a time.
+
+        Sources are written relative to the source directory and resolved by light through
+        its bind path, so the script does not depend on where the sources are checked out.
+
+        Args:
+            disk_ids (Optional[array]): The media disk ID of every file by its position in the file table,
+                computed if not given.
+
+        Yields:
+            str: The <Component> element of the next file.
+        """
+        if disk_ids is None:
+            disk_ids = self.disk_ids()[0]
+        template = Template.from_string(WIX_COMPONENTS_TEMPLATE, 'xml', name='built-in WiX components template')
+        yield from template.render({'components': self.iter_component_contexts(disk_ids)})
+
+    def iter_component_contexts(self, disk_ids: array) -> Iterator[dict]:
+        """
+        Generates the template values of each file's component, one file at a time.
+
+        The names, directories and WiX identifiers come from the file table, so a file's path is
+        not split or normalized again here, and every ID is valid and unique.
+
+        Args:
+            disk_ids (array): The media disk ID of every file by its position in the file table.
+
+        Yields:
+            dict: The 'id', 'guid', 'source' and 'disk_id' of the next component.
+        """
+        table = self.file_table()
+        directories, normalized_directories = table.directories, table.normalized_directories
+        directory_indexes, names, component_ids = table.directory_indexes, table.names, table.component_ids
+        component_guid = self.component_guids()
+        order = table.order
+        for position, name, component_id in zip(order, names.select(order), component_ids.select(order)):
+            directory = directory_indexes[position]
+            disk_id = disk_ids[position]
+            yield {
+                'id': component_id,
+                'guid': component_guid(normalized_directories[directory] + normalize_path(name)),
+                'source': directories[directory] + name,
+                'disk_id': disk_id if disk_id != 1 else '',
+            }
+
+    def iter_directory_tree_contexts(self, disk_ids: array) -> Iterator[dict]:
+        """
+        Generates the template values of the directories and components below INSTALLFOLDER, depth first.
+
+        In sorted order the files below a directory follow each other, so the tree is built in
+        the same single pass that produces the components: between two files, the directories
+        their paths do not share are closed and the new ones opened. Every directory is opened
+        once, and the output and the time taken grow linearly with the number of files.
+
+        Directory IDs come from an allocator of their own, as 'dir_' followed by the directory
+        name where that is free, so they cannot clash with the standard directories.
+
+        Args:
+            disk_ids (array): The media disk ID of every file by its position in the file table.
+
+        Yields:
+            dict: An item that 'opens' a directory with its 'id' and 'name', one that 'closes' it,
+                or a component as generated by iter_component_contexts(); each with its 'indent'.
+        """
+        table = self.file_table()
+        directory_ids = IdentifierAllocator(RESERVED_DIRECTORY_IDS)
+        open_parts: Tuple[str, ...] = ()
+        indent = ''
+        for component, parts in zip(self.iter_component_contexts(disk_ids), table.iter_directory_parts(table.order)):
+            if parts is not open_parts and parts != open_parts:
+                common = 0
+                for open_part, part in zip(open_parts, parts):
+                    if open_part != part:
+                        break
+                    common += 1
+                for depth in range(len(open_parts) - 1, common - 1, -1):
+                    yield {'opens': False, 'closes': True, 'indent': '  ' * depth}
+                for depth in range(common, len(parts)):
+                    yield {
+                        'opens': True,
+                        'closes': False,
+                        'indent': '  ' * depth,
+                        'id': directory_ids.allocate(f"dir_{parts[depth]}", '/'.join(parts[:depth + 1])),
+                        'name': parts[depth],
+                    }
+                indent = '  ' * len(parts)
+            open_parts = parts
+            component.update(opens=False, closes=False, indent=indent)
+            yield component
+        for depth in range(len(open_parts) - 1, -1, -1):
+            yield {'opens': False, 'closes': True, 'indent': '  ' * depth}
 
     def generate_component_refs(self) -> str:
         """
@@ -131,43 +548,26 @@ class MSICreator(InstallerCreator):
         Returns:
             str: A string containing XML component references.
         """
-        component_refs_xml = ""
-        for file in self.file_list:
-            file_id = os.path.basename(file)
-            component_ref_xml = f"<ComponentRef Id=\"{file_id}\" />"
-            component_refs_xml += component_ref_xml
-        return component_refs_xml
+        return "".join(self.iter_component_refs())
 
-    def compile_msi_script(self, msi_script_path: str) -> None:
+    def iter_component_refs(self) -> Iterator[str]:
         """
-        Compiles the MSI script using WiX Toolset's candle and light applications.
-
-        This method first uses 'candle' to compile the WiX script into an object file and
-        then uses 'light' to link and bind the object file into an MSI package.
+        Generates the XML component reference of each file, one file at a time.
 
-        Args:
-            msi_script_path (str): Path to the WiX script file.
+        Yields:
+            str: The <ComponentRef> element of the next file.
         """
-        candle_exe_path = r'C:\Program Files (x86)\WiX Toolset v3.14\bin\candle.exe'
-        light_exe_path = r'C:\Program Files (x86)\WiX Toolset v3.14\bin\light.exe'
-
-        wixobj_file_path = os.path.join(self.output_directory, 'installer.wixobj')
+        template = Template.from_string(WIX_COMPONENT_REFS_TEMPLATE, 'xml',
+                                        name='built-in WiX component references template')
+        yield from template.render({'component_refs': self.iter_component_ref_contexts()})
 
-        candle_command = [candle_exe_path, msi_script_path, '-o', wixobj_file_path]
-        candle_result = subprocess.run(candle_command, capture_output=True, text=True)
-        if candle_result.returncode != 0:
-            print(f"Candle error output: {candle_result.stderr}")
-            return
-        print(f"Candle output: {candle_result.stdout}")
-
-        if not os.path.exists(wixobj_file_path):
-            print(".wixobj file not created. Compilation may have failed.")
-            return
+    def iter_component_ref_contexts(self) -> Iterator[dict]:
+        """
+        Generates the template values of each file's component reference, one file at a time.
 
-        light_command = [light_exe_path, wixobj_file_path, '-o', os.path.join(self.output_directory, self.installer_name + '.msi')]
-        light_result = subprocess.run(light_command, capture_output=True, text=True)
-        if light_result.returncode != 0:
-            print(f"Light error output: {light_result.stderr}")
-            return
-        print(f"Light output: {light_result.stdout}")
-        print("MSI installer created successfully in the output directory.")
+        Yields:
+            dict: The 'id' of the next component.
+        """
+        table = self.file_table()
+        for component_id in table.component_ids.select(table.order):
+            yield {'id': component_id}
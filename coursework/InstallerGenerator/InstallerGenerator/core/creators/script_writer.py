@@ -0,0 +1,57 @@
+import hashlib
+import time
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_BUFFER_SIZE: int = 64 * 1024
+
+
+def write_script(script_path: str, chunks: Iterable[str], buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 timings: Optional[Dict[str, float]] = None) -> str:
+    """
+    Stream script chunks to a file in buffered batches.
+
+    Chunks are collected until ``buffer_size`` characters are pending and are then joined and
+    written in one call, so the script is never held in memory as a whole and no quadratic
+    string concatenation takes place. The written text is hashed on the way, so callers get
+    the digest of the script without reading it back.
+
+    Args:
+        script_path (str): Path of the script file to write.
+        chunks (Iterable[str]): The script, in pieces of any size.
+        buffer_size (int): Number of characters to collect before writing.
+        timings (Optional[Dict[str, float]]): If given, receives the seconds spent producing the chunks
+            ('script_generation') and writing and hashing them ('script_write').
+
+    Returns:
+        str: The SHA-256 digest of the UTF-8 encoded script.
+    """
+    digest = hashlib.sha256()
+    pending: List[str] = []
+    pending_size = 0
+    write_time = 0.0
+    start = time.perf_counter()
+
+    with open(script_path, "w") as script_file:
+        def write_pending() -> float:
+            write_start = time.perf_counter()
+            data = "".join(pending)
+            script_file.write(data)
+            digest.update(data.encode("utf-8"))
+            pending.clear()
+            return time.perf_counter() - write_start
+
+        for chunk in chunks:
+            pending.append(chunk)
+            pending_size += len(chunk)
+            if pending_size >= buffer_size:
+                write_time += write_pending()
+                pending_size = 0
+
+        if pending:
+            write_time += write_pending()
+
+    if timings is not None:
+        total_time = time.perf_counter() - start
+        timings["script_generation"] = total_time - write_time
+        timings["script_write"] = write_time
+    return digest.hexdigest()
@@ -0,0 +1,89 @@
+import importlib
+from typing import Dict, List, Optional, Tuple, Type
+
+from ..build_cache import BuildCache
+from ..creators.abc_creator import InstallerCreator
+from ..preflight import PreflightReport
+from ..proxy import InstallerCreatorProxy
+from ..scanner import FileManifest
+
+
+class InstallerCreatorFactory:
+    """
+    Factory for creating logged installer creators by installer type.
+
+    The factory maps installer type identifiers ('MSI', 'EXE') to their creator classes and
+    wraps every created creator in an InstallerCreatorProxy. Creator modules are imported the
+    first time an installer of their type is created.
+    """
+    _creators: Dict[str, Tuple[str, str]] = {
+        'MSI': ('..creators.msi_creator', 'MSICreator'),
+        'EXE': ('..creators.exe_creator', 'EXECreator'),
+    }
+    _creator_classes: Dict[str, Type[InstallerCreator]] = {}
+
+    @classmethod
+    def installer_types(cls) -> List[str]:
+        """
+        Return the installer types the factory can create.
+
+        Returns:
+            List[str]: The supported installer type identifiers.
+        """
+        return list(cls._creators)
+
+    @classmethod
+    def creator_class(cls, installer_type: str) -> Type[InstallerCreator]:
+        """
+        Return the creator class of an installer type, importing its module on first use.
+
+        Args:
+            installer_type (str): The type of installer (MSI or EXE).
+
+        Returns:
+            Type[InstallerCreator]: The creator class.
+
+        Raises:
+            ValueError: If the installer type is unknown.
+        """
+        creator_class = cls._creator_classes.get(installer_type)
+        if creator_class is None:
+            if installer_type not in cls._creators:
+                raise ValueError("Unknown installer type")
+            module_name, class_name = cls._creators[installer_type]
+            creator_class = getattr(importlib.import_module(module_name, __package__), class_name)
+            cls._creator_classes[installer_type] = creator_class
+        return creator_class
+
+    @classmethod
+    def create(cls, installer_type: str, source_directory: str, output_directory: str, file_list: List[str],
+               installer_name: str, build_cache: Optional[BuildCache] = None,
+               manifest: Optional[FileManifest] = None,
+               shared_files: Optional[List[str]] = None, profile: Optional[str] = None,
+               preflight_report: Optional[PreflightReport] = None) -> InstallerCreatorProxy:
+        """
+        Create an installer creator for the given installer type.
+
+        Args:
+            installer_type (str): The type of installer to create (MSI or EXE).
+            source_directory (str): The source directory of files.
+            output_directory (str): The output directory for the installer.
+            file_list (List[str]): List of files to include in the installer.
+            installer_name (str): Name of the installer.
+            build_cache (Optional[BuildCache]): Cache of previously built installers.
+            manifest (Optional[FileManifest]): Scanned manifest of the source directory.
+            shared_files (Optional[List[str]]): Files whose compressed payload is shared with other installers.
+            profile (Optional[str]): Name of the build profile, defaulting to INSTALLER_BUILD_PROFILE.
+            preflight_report (Optional[PreflightReport]): Pre-flight check of the files made earlier in the batch.
+
+        Returns:
+            InstallerCreatorProxy: A proxy around the real installer creator.
+
+        Raises:
+            ValueError: If the installer type or the build profile is unknown.
+        """
+        creator_class = cls.creator_class(installer_type)
+        real_creator = creator_class(source_directory, output_directory, file_list, installer_name,
+                                     build_cache=build_cache, manifest=manifest, shared_files=shared_files,
+                                     profile=profile, preflight_report=preflight_report)
+        return InstallerCreatorProxy(real_creator, installer_type)
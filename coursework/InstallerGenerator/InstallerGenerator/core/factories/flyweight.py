@@ -1,4 +1,14 @@
+import asyncio
+import locale
+import shutil
 import subprocess
+import threading
+import weakref
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from ..cancellation import CancellationToken, process_group_options, terminate_process_group
 
 class InstallerFlyweight:
     """
@@ -6,30 +16,242 @@ class InstallerFlyweight:
 
     This class represents an installer flyweight used to compile installer scripts efficiently.
     Installer flyweights are shared objects that optimize memory usage when compiling similar scripts.
+
+    Each flyweight is the compiler pool of one toolchain. The paths of its executables are
+    resolved once, at most ``max_concurrency`` compilers of the toolchain run at the same time,
+    and submitted compilations wait in a queue of at most ``max_pending`` entries; when the queue
+    is full, ``submit`` blocks the caller until a compiler finishes.
+
+    Attributes:
+        max_concurrency (int): Maximum number of compilers of the toolchain running at once.
+        max_pending (int): Maximum number of submitted compilations waiting for a compiler.
+        spawned (int): Number of compiler processes started so far.
     """
-    def __init__(self, script: str):
+    OUTPUT_TAIL_LINES: int = 200
+    SLOT_POLL_INTERVAL: float = 0.1
+
+    def __init__(self, script: str, executables: Optional[Dict[str, str]] = None, max_concurrency: int = 4,
+                 max_pending: int = 64):
         """
         Initialize the InstallerFlyweight.
 
         Args:
             script (str): The script type identifier.
+            executables (Optional[Dict[str, str]]): Configured paths of the toolchain's executables, keyed by tool name.
+            max_concurrency (int): Maximum number of compilers running at once.
+            max_pending (int): Maximum number of submitted compilations waiting for a compiler.
         """
         self._script: str = script
+        self.max_concurrency: int = max(1, max_concurrency)
+        self.max_pending: int = max(0, max_pending)
+        self.spawned: int = 0
+        self._lock: threading.Lock = threading.Lock()
+        self._slots: threading.BoundedSemaphore = threading.BoundedSemaphore(self.max_concurrency)
+        self._queue_slots: threading.BoundedSemaphore = threading.BoundedSemaphore(self.max_concurrency +
+                                                                                    self.max_pending)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._async_slots: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._resolved: Dict[str, str] = {}
+        for path in (executables or {}).values():
+            self.resolve_executable(path)
+
+    def resolve_executable(self, path: str) -> str:
+        """
+        Resolve an executable against PATH once and remember the result.
+
+        Args:
+            path (str): The configured executable path or name.
+
+        Returns:
+            str: The absolute path of the executable, or the path unchanged if it cannot be found.
+        """
+        resolved = self._resolved.get(path)
+        if resolved is None:
+            resolved = shutil.which(path) or path
+            self._resolved[path] = resolved
+        return resolved
 
-    def compile_script(self, compile_command: list) -> None:
+    def resolve_command(self, compile_command: list) -> List[str]:
+        """
+        Return the command with its executable replaced by the resolved path.
+        """
+        return [self.resolve_executable(compile_command[0]), *compile_command[1:]]
+
+    def compile_script(self, compile_command: list, on_output: Optional[Callable[[str], None]] = None,
+                       cancellation: Optional[CancellationToken] = None) -> subprocess.CompletedProcess:
         """
         Compile an installer script using the specified compile command.
 
-        This method compiles an installer script using a given compile command and handles the output.
+        The compiler's stdout and stderr are merged and handed to ``on_output`` line by line while
+        the compiler runs; by default every line is printed. The compiler runs in its own process
+        group, so cancelling the token terminates the compiler and anything it started. If all of
+        the toolchain's compilers are busy, the call waits for one to finish; a compilation that is
+        cancelled while waiting is not started and fails.
 
         Args:
             compile_command (list): The command used to compile the script.
+            on_output (Optional[Callable[[str], None]]): Receives each output line without its line break.
+            cancellation (Optional[CancellationToken]): Token that can terminate the compiler.
+
+        Returns:
+            subprocess.CompletedProcess: The finished compiler process. Its stdout holds the last
+            OUTPUT_TAIL_LINES lines of output.
+        """
+        if on_output is None:
+            on_output = print
+
+        while not self._slots.acquire(timeout=self.SLOT_POLL_INTERVAL):
+            if cancellation is not None and cancellation.cancelled:
+                return subprocess.CompletedProcess(compile_command, 1, "", "")
+        try:
+            return self._compile(compile_command, on_output, cancellation)
+        finally:
+            self._slots.release()
+
+    async def acompile_script(self, compile_command: list, on_output: Optional[Callable[[str], None]] = None,
+                              timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+        """
+        Compile an installer script without blocking the event loop.
+
+        The asyncio counterpart of compile_script: the compiler is started with
+        asyncio.create_subprocess_exec and its output is read as it arrives. At most
+        ``max_concurrency`` compilers of the toolchain run at once per event loop. If the
+        compilation times out or the awaiting task is cancelled, the compiler's process group
+        is terminated.
+
+        Args:
+            compile_command (list): The command used to compile the script.
+            on_output (Optional[Callable[[str], None]]): Receives each output line without its line break.
+            timeout (Optional[float]): Seconds the compiler may run, not counting the wait for a free slot.
+
+        Returns:
+            subprocess.CompletedProcess: The finished compiler process. Its stdout holds the last
+            OUTPUT_TAIL_LINES lines of output.
 
         Raises:
-            RuntimeError: If the compilation fails with a non-zero return code.
+            asyncio.TimeoutError: If the compiler ran longer than ``timeout``.
+        """
+        if on_output is None:
+            on_output = print
+
+        async with self._async_slot():
+            self._count_spawn()
+            process = await asyncio.create_subprocess_exec(*self.resolve_command(compile_command),
+                                                           stdout=asyncio.subprocess.PIPE,
+                                                           stderr=asyncio.subprocess.STDOUT,
+                                                           **process_group_options())
+            try:
+                output_tail = await asyncio.wait_for(self._read_output(process, on_output), timeout)
+            except BaseException:
+                if process.returncode is None:
+                    try:
+                        terminate_process_group(process.pid)
+                    except (OSError, subprocess.SubprocessError):
+                        process.kill()
+                    await process.wait()
+                raise
+
+        return subprocess.CompletedProcess(compile_command, process.returncode, "\n".join(output_tail), "")
+
+    async def _read_output(self, process: asyncio.subprocess.Process, on_output: Callable[[str], None]) -> deque:
         """
-        compile_result = subprocess.run(compile_command, capture_output=True, text=True)
-        if compile_result.returncode != 0:
-            print(f"Error output: {compile_result.stderr}")
-            return
-        print(f"Output: {compile_result.stdout}")
+        Hand the output of an asyncio compiler process to ``on_output`` and wait for it to exit.
+        """
+        encoding = locale.getpreferredencoding(False)
+        output_tail = deque(maxlen=self.OUTPUT_TAIL_LINES)
+        async for raw_line in process.stdout:
+            line = raw_line.decode(encoding, errors='replace').rstrip('\r\n')
+            output_tail.append(line)
+            on_output(line)
+        await process.wait()
+        return output_tail
+
+    def _async_slot(self) -> asyncio.Semaphore:
+        """
+        Return the semaphore limiting the toolchain's compilers on the running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._async_slots.get(loop)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self.max_concurrency)
+                self._async_slots[loop] = semaphore
+            return semaphore
+
+    def submit(self, compile_command: list, on_output: Optional[Callable[[str], None]] = None,
+               cancellation: Optional[CancellationToken] = None) -> Future:
+        """
+        Queue a compilation on the toolchain's worker threads.
+
+        Blocks while ``max_pending`` compilations are already waiting, so producers cannot run
+        arbitrarily far ahead of the compilers.
+
+        Args:
+            compile_command (list): The command used to compile the script.
+            on_output (Optional[Callable[[str], None]]): Receives each output line without its line break.
+            cancellation (Optional[CancellationToken]): Token that can terminate the compiler.
+
+        Returns:
+            Future: Resolves to the subprocess.CompletedProcess of the compiler.
+        """
+        self._queue_slots.acquire()
+        try:
+            future = self._worker_pool().submit(self.compile_script, compile_command, on_output, cancellation)
+        except BaseException:
+            self._queue_slots.release()
+            raise
+        future.add_done_callback(lambda _: self._queue_slots.release())
+        return future
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the toolchain's worker threads once the queued compilations have finished.
+
+        Args:
+            wait (bool): Whether to wait for the queued compilations.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _worker_pool(self) -> ThreadPoolExecutor:
+        """
+        Return the toolchain's worker threads, starting them on first use.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                    thread_name_prefix=f"{self._script}-compiler")
+            return self._executor
+
+    def _count_spawn(self) -> None:
+        """
+        Count a started compiler process.
+        """
+        with self._lock:
+            self.spawned += 1
+
+    def _compile(self, compile_command: list, on_output: Callable[[str], None],
+                 cancellation: Optional[CancellationToken]) -> subprocess.CompletedProcess:
+        """
+        Run the compiler and stream its output. The caller holds a compiler slot.
+        """
+        output_tail = deque(maxlen=self.OUTPUT_TAIL_LINES)
+        self._count_spawn()
+        process = subprocess.Popen(self.resolve_command(compile_command), stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT, text=True, bufsize=1, **process_group_options())
+        if cancellation is not None:
+            cancellation.register(process)
+        try:
+            for line in process.stdout:
+                line = line.rstrip('\r\n')
+                output_tail.append(line)
+                on_output(line)
+            returncode = process.wait()
+        finally:
+            process.stdout.close()
+            if cancellation is not None:
+                cancellation.unregister(process)
+
+        return subprocess.CompletedProcess(compile_command, returncode, "\n".join(output_tail), "")
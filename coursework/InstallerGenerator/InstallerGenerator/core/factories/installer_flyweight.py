@@ -1,4 +1,7 @@
+import threading
 from .flyweight import InstallerFlyweight
+from ..base_config import (candle_exe_path, compiler_max_concurrency, compiler_max_pending, inno_setup_compiler,
+                           light_exe_path)
 from typing import Dict
 
 class InstallerFlyweightFactory:
@@ -7,8 +10,16 @@ class InstallerFlyweightFactory:
 
     This class acts as a flyweight factory responsible for creating and managing installer flyweights.
     Installer flyweights are shared objects used to optimize memory usage when creating similar installers.
+
+    Every flyweight is the compiler pool of one toolchain, created with the executables configured
+    in base_config and the configured concurrency and queue limits.
     """
     _flyweights: Dict[str, InstallerFlyweight] = {}
+    _toolchains: Dict[str, Dict[str, str]] = {
+        'MSI': {'candle': candle_exe_path, 'light': light_exe_path},
+        'EXE': {'iscc': inno_setup_compiler},
+    }
+    _lock: threading.Lock = threading.Lock()
 
     @classmethod
     def get_flyweight(cls, key: str) -> InstallerFlyweight:
@@ -23,6 +34,19 @@ class InstallerFlyweightFactory:
         Returns:
             InstallerFlyweight: An installer flyweight instance.
         """
-        if not cls._flyweights.get(key):
-            cls._flyweights[key] = InstallerFlyweight(key)
-        return cls._flyweights[key]
+        with cls._lock:
+            if not cls._flyweights.get(key):
+                cls._flyweights[key] = InstallerFlyweight(key, cls._toolchains.get(key),
+                                                          max_concurrency=compiler_max_concurrency,
+                                                          max_pending=compiler_max_pending)
+            return cls._flyweights[key]
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """
+        Stop the worker threads of every flyweight once their queued compilations have finished.
+        """
+        with cls._lock:
+            flyweights = list(cls._flyweights.values())
+        for flyweight in flyweights:
+            flyweight.shutdown()
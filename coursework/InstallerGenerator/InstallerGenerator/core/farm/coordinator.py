@@ -0,0 +1,512 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import urllib.parse
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from ..cancellation import CancellationToken
+from ..scheduler import BuildJob, BuildResult, BuildScheduler
+from .protocol import PROTOCOL_VERSION, job_to_dict, log_entries
+
+logger = logging.getLogger(__name__)
+
+
+class _Task:
+    """
+    Bookkeeping for a job while the coordinator is distributing it.
+    """
+
+    def __init__(self, job: BuildJob, cancellation: CancellationToken):
+        self.task_id: str = uuid.uuid4().hex
+        self.job: BuildJob = job
+        self.cancellation: CancellationToken = cancellation
+        self.attempts: int = 0
+        self.worker_id: Optional[str] = None
+        self.lease_expires: float = 0.0
+        self.upload: Optional[Tuple[str, str, str]] = None
+        self.result: Optional[BuildResult] = None
+        self.log: List[List[str]] = []
+
+    def discard_upload(self) -> None:
+        """
+        Delete the installer uploaded for the current attempt, if any.
+        """
+        if self.upload is not None:
+            try:
+                os.remove(self.upload[0])
+            except OSError:
+                pass
+            self.upload = None
+
+
+class _Worker:
+    """
+    A worker known to the coordinator and the tasks sharded to it.
+    """
+
+    def __init__(self, name: str):
+        self.worker_id: str = uuid.uuid4().hex
+        self.name: str = name
+        self.last_seen: float = time.monotonic()
+        self.queue: Deque[_Task] = deque()
+        self.released: bool = False
+        self.completed: int = 0
+        self.stolen: int = 0
+
+
+class FarmCoordinator:
+    """
+    Distributes a batch of installer jobs over build farm workers and gathers their results.
+
+    The coordinator serves the protocol of core.farm.protocol over HTTP. When a batch is
+    started, its jobs are sharded over the registered workers, keeping the jobs of one source
+    directory together so a worker can reuse its scans and build cache. A worker takes the
+    jobs of its own shard first; once its shard is empty it steals the last job of the
+    longest remaining shard, so a slow or late worker does not hold the batch up.
+
+    Every job is leased to one worker at a time. Leases are renewed by heartbeats; if a worker
+    stops sending them for ``lease_timeout`` seconds, or reports an error of its own rather
+    than a failed build, the job is handed to another worker, up to ``max_attempts`` times.
+    Built installers are uploaded to the coordinator and moved into the output directory of
+    their job once their checksum has been verified, and the compiler output and log of each
+    job are passed to ``on_output`` when its result arrives.
+
+    Attributes:
+        lease_timeout (float): Seconds a lease lasts without a heartbeat.
+        max_attempts (int): Number of times a job is tried before it fails.
+        on_output (Optional[Callable[[BuildJob, str, str], None]]): Receives the job, the step name and
+            each line of compiler output or log gathered from the workers.
+        on_job_finished (Optional[Callable[[BuildResult], None]]): Receives the result of each finished job.
+        retries (int): Number of times a job was handed to another worker.
+    """
+    NO_WORKER_MESSAGE: str = "No build farm worker is available."
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, lease_timeout: float = 30.0, max_attempts: int = 3,
+                 on_output: Optional[Callable[[BuildJob, str, str], None]] = None,
+                 on_job_finished: Optional[Callable[[BuildResult], None]] = None):
+        """
+        Initialize the FarmCoordinator and bind its HTTP server.
+
+        Args:
+            host (str): Address to listen on. Only local workers can connect to the default.
+            port (int): Port to listen on, or 0 for a free port.
+            lease_timeout (float): Seconds a lease lasts without a heartbeat.
+            max_attempts (int): Number of times a job is tried before it fails.
+            on_output (Optional[Callable[[BuildJob, str, str], None]]): Receives the gathered output.
+            on_job_finished (Optional[Callable[[BuildResult], None]]): Receives the result of each finished job.
+
+        Raises:
+            OSError: If the address cannot be bound.
+        """
+        self.lease_timeout: float = lease_timeout
+        self.max_attempts: int = max_attempts
+        self.on_output: Optional[Callable[[BuildJob, str, str], None]] = on_output
+        self.on_job_finished: Optional[Callable[[BuildResult], None]] = on_job_finished
+        self.retries: int = 0
+        self._condition: threading.Condition = threading.Condition()
+        self._tasks: Dict[str, _Task] = {}
+        self._unassigned: Deque[_Task] = deque()
+        self._workers: Dict[str, _Worker] = {}
+        self._finished: List[_Task] = []
+        self._shutdown: bool = False
+        self._server: ThreadingHTTPServer = ThreadingHTTPServer((host, port), _handler_class(self))
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """
+        The base URL workers connect to.
+        """
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> None:
+        """
+        Start serving workers on a background thread.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, name="FarmCoordinator", daemon=True)
+            self._thread.start()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        Tell the workers to exit and stop the HTTP server.
+
+        Workers learn about the shutdown the next time they ask for a job, so the server keeps
+        running for up to ``timeout`` seconds until every live worker has been told.
+
+        Args:
+            timeout (float): Seconds to wait for the workers to be told.
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            self._shutdown = True
+            self._condition.notify_all()
+            while self._thread is not None and self._live_workers(time.monotonic()):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> 'FarmCoordinator':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def run(self, jobs: Iterable[BuildJob], cancellation: Optional[CancellationToken] = None,
+            worker_timeout: Optional[float] = None) -> List[BuildResult]:
+        """
+        Distribute every job to the workers and wait until all of them have finished.
+
+        Args:
+            jobs (Iterable[BuildJob]): The installers to build.
+            cancellation (Optional[CancellationToken]): Token that cancels the batch. Jobs that have not
+                been leased fail at once, and workers stop the running ones at their next heartbeat.
+            worker_timeout (Optional[float]): Fail the remaining jobs if no worker has been in contact
+                for this many seconds. By default the coordinator waits for workers indefinitely.
+
+        Returns:
+            List[BuildResult]: One result per job, in the order the jobs were given.
+        """
+        cancellation = cancellation or CancellationToken()
+        tasks = [_Task(job, cancellation) for job in jobs]
+        with self._condition:
+            for task in tasks:
+                self._tasks[task.task_id] = task
+                self._unassigned.append(task)
+            self._shard()
+            self._condition.notify_all()
+        last_contact = time.monotonic()
+
+        while True:
+            with self._condition:
+                now = time.monotonic()
+                self._expire_leases(now)
+                if self._live_workers(now):
+                    last_contact = now
+                pending = [task for task in tasks if task.result is None]
+                for task in pending:
+                    if task.worker_id is None and cancellation.cancelled:
+                        self._fail(task, BuildScheduler.CANCELLED_MESSAGE)
+                    elif task.worker_id is None and worker_timeout is not None and now - last_contact > worker_timeout:
+                        self._fail(task, self.NO_WORKER_MESSAGE)
+                done = all(task.result is not None for task in tasks)
+                if not done and not self._finished:
+                    self._condition.wait(min(1.0, self.lease_timeout / 4))
+            self._announce()
+            if done:
+                break
+
+        with self._condition:
+            for task in tasks:
+                del self._tasks[task.task_id]
+        return [task.result for task in tasks]
+
+    def summary(self) -> dict:
+        """
+        Summarize the work done by the workers as JSON-serializable data.
+
+        Returns:
+            dict: The jobs completed and stolen by every worker and the number of retries.
+        """
+        with self._condition:
+            return {
+                'workers': [{'name': worker.name, 'completed': worker.completed, 'stolen': worker.stolen}
+                            for worker in self._workers.values()],
+                'retries': self.retries,
+            }
+
+    def _live_workers(self, now: float) -> List[_Worker]:
+        """
+        Return the workers that have been in contact recently and were not released.
+        """
+        return [worker for worker in self._workers.values()
+                if not worker.released and now - worker.last_seen <= self.lease_timeout]
+
+    def _shard(self) -> None:
+        """
+        Distribute the unassigned tasks over the live workers, one source directory at a time.
+        """
+        workers = self._live_workers(time.monotonic())
+        if not workers or not self._unassigned:
+            return
+        groups: Dict[str, List[_Task]] = {}
+        for task in self._unassigned:
+            groups.setdefault(task.job.source_directory, []).append(task)
+        self._unassigned.clear()
+        for group in sorted(groups.values(), key=len, reverse=True):
+            min(workers, key=lambda worker: len(worker.queue)).queue.extend(group)
+
+    def _next_task(self, worker: _Worker) -> Optional[_Task]:
+        """
+        Take the next task for a worker: from its own shard, the unassigned tasks or another shard.
+        """
+        if worker.queue:
+            return worker.queue.popleft()
+        if self._unassigned:
+            return self._unassigned.popleft()
+        victim = max((other for other in self._workers.values() if other.queue),
+                     key=lambda other: len(other.queue), default=None)
+        if victim is None:
+            return None
+        worker.stolen += 1
+        return victim.queue.pop()
+
+    def _expire_leases(self, now: float) -> None:
+        """
+        Retry the tasks of workers whose lease ran out and unassign the shards of lost workers.
+        """
+        for task in list(self._tasks.values()):
+            if task.result is None and task.worker_id is not None and task.lease_expires < now:
+                worker = self._workers.get(task.worker_id)
+                task.worker_id = None
+                self._retry(task, f"Worker {worker.name if worker else '?'} stopped responding.")
+        for worker in self._workers.values():
+            if worker.queue and now - worker.last_seen > self.lease_timeout:
+                self._unassigned.extend(worker.queue)
+                worker.queue.clear()
+
+    def _retry(self, task: _Task, error: str) -> None:
+        """
+        Hand a task to another worker after an attempt failed for a reason other than the build.
+        """
+        task.discard_upload()
+        if task.cancellation.cancelled:
+            self._fail(task, BuildScheduler.CANCELLED_MESSAGE)
+        elif task.attempts >= self.max_attempts:
+            self._fail(task, f"{error} Gave up after {task.attempts} attempts.")
+        else:
+            logger.warning(f"Farm: retrying {task.job.installer_type} {task.job.installer_name} - {error}")
+            self.retries += 1
+            self._unassigned.appendleft(task)
+            self._condition.notify_all()
+
+    def _fail(self, task: _Task, error: str) -> None:
+        """
+        Finish a task as failed.
+        """
+        result = BuildResult(task.job)
+        result.error = error
+        self._complete(task, result)
+
+    def _complete(self, task: _Task, result: BuildResult) -> None:
+        """
+        Record the result of a task and queue it for the callbacks.
+        """
+        task.discard_upload()
+        for queue in [self._unassigned] + [worker.queue for worker in self._workers.values()]:
+            if task in queue:
+                queue.remove(task)
+        task.worker_id = None
+        task.result = result
+        self._finished.append(task)
+        self._condition.notify_all()
+
+    def _announce(self) -> None:
+        """
+        Pass the output and results of the finished tasks to the callbacks, outside the lock.
+        """
+        with self._condition:
+            finished, self._finished = self._finished, []
+        for task in finished:
+            if self.on_output is not None:
+                for step_name, line in task.log:
+                    self.on_output(task.job, step_name, line)
+            if self.on_job_finished is not None:
+                self.on_job_finished(task.result)
+
+    def _worker(self, worker_id: str) -> _Worker:
+        """
+        Return a registered worker and note that it has been in contact.
+        """
+        worker = self._workers.get(worker_id)
+        if worker is None:
+            raise LookupError(f"Unknown worker '{worker_id}'; register again.")
+        worker.last_seen = time.monotonic()
+        return worker
+
+    def _handle_register(self, payload: dict) -> dict:
+        """
+        Register a new worker and give it a share of the unassigned tasks.
+        """
+        if payload.get('protocol') != PROTOCOL_VERSION:
+            raise ValueError(f"Unsupported protocol version {payload.get('protocol')}; expected {PROTOCOL_VERSION}.")
+        worker = _Worker(str(payload.get('worker') or 'worker'))
+        with self._condition:
+            self._workers[worker.worker_id] = worker
+            self._shard()
+        logger.info(f"Farm: worker {worker.name} registered.")
+        return {'worker_id': worker.worker_id, 'lease_timeout': self.lease_timeout}
+
+    def _handle_lease(self, payload: dict) -> dict:
+        """
+        Lease the next task to a worker, waiting up to the requested number of seconds for one.
+        """
+        deadline = time.monotonic() + min(max(float(payload.get('wait') or 0.0), 0.0), self.lease_timeout / 2)
+        with self._condition:
+            while True:
+                worker = self._worker(payload.get('worker_id'))
+                if self._shutdown:
+                    worker.released = True
+                    self._condition.notify_all()
+                    return {'task': None, 'shutdown': True}
+                self._expire_leases(worker.last_seen)
+                task = self._next_task(worker)
+                if task is not None:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return {'task': None, 'shutdown': False}
+                self._condition.wait(remaining)
+            task.attempts += 1
+            task.worker_id = worker.worker_id
+            task.lease_expires = worker.last_seen + self.lease_timeout
+            return {'task': {'task_id': task.task_id, 'attempt': task.attempts, 'job': job_to_dict(task.job)},
+                    'shutdown': False}
+
+    def _handle_heartbeat(self, payload: dict) -> dict:
+        """
+        Renew the lease of a task and tell the worker whether to cancel it.
+        """
+        with self._condition:
+            worker = self._worker(payload.get('worker_id'))
+            task = self._tasks.get(payload.get('task_id'))
+            if task is None or task.worker_id != worker.worker_id:
+                return {'cancelled': True}
+            task.lease_expires = worker.last_seen + self.lease_timeout
+            return {'cancelled': task.cancellation.cancelled}
+
+    def _handle_upload(self, task_id: str, name: str, worker_id: str, body, length: int) -> dict:
+        """
+        Store the installer a worker built for its current task next to the final output.
+        """
+        if not name or name != os.path.basename(name) or name in ('.', '..'):
+            raise ValueError(f"Invalid artifact name '{name}'.")
+        with self._condition:
+            worker = self._worker(worker_id)
+            task = self._tasks.get(task_id)
+            if task is None or task.worker_id != worker.worker_id:
+                raise LookupError(f"Task '{task_id}' is not leased to this worker.")
+            output_directory = task.job.output_directory
+        os.makedirs(output_directory, exist_ok=True)
+        temporary_path = os.path.join(output_directory, f".{name}.{task_id}.part")
+        digest = hashlib.sha256()
+        with open(temporary_path, 'wb') as artifact:
+            remaining = length
+            while remaining > 0:
+                chunk = body.read(min(remaining, 1024 * 1024))
+                if not chunk:
+                    break
+                artifact.write(chunk)
+                digest.update(chunk)
+                remaining -= len(chunk)
+        with self._condition:
+            if remaining > 0 or task.worker_id != worker_id or task.result is not None:
+                os.remove(temporary_path)
+                raise ValueError("The upload was incomplete or the lease has ended.")
+            task.discard_upload()
+            task.upload = (temporary_path, name, digest.hexdigest())
+        return {'sha256': digest.hexdigest(), 'size': length}
+
+    def _handle_result(self, payload: dict) -> dict:
+        """
+        Record the result a worker reports for its task, or retry the task elsewhere.
+        """
+        with self._condition:
+            worker = self._worker(payload.get('worker_id'))
+            task = self._tasks.get(payload.get('task_id'))
+            if task is None or task.worker_id != worker.worker_id or task.result is not None:
+                return {'accepted': False}
+            task.worker_id = None
+            data = payload.get('result') or {}
+            if payload.get('retryable') and not data.get('success'):
+                self._retry(task, f"Worker {worker.name} failed: {data.get('error')}")
+            else:
+                result = BuildResult.from_dict(task.job, data)
+                artifact = payload.get('artifact')
+                if result.success:
+                    if (task.upload is None or not isinstance(artifact, dict)
+                            or task.upload[1:] != (artifact.get('name'), artifact.get('sha256'))):
+                        self._retry(task, f"The installer uploaded by worker {worker.name} is missing or corrupt.")
+                        return {'accepted': False}
+                    result.output_path = os.path.join(task.job.output_directory, task.upload[1])
+                    os.replace(task.upload[0], result.output_path)
+                    task.upload = None
+                task.log = log_entries(payload.get('log'))
+                worker.completed += 1
+                self._complete(task, result)
+        return {'accepted': True}
+
+
+def _handler_class(coordinator: FarmCoordinator) -> type:
+    """
+    Create the request handler class serving a coordinator.
+    """
+
+    class FarmRequestHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self) -> None:
+            handlers = {
+                '/register': coordinator._handle_register,
+                '/lease': coordinator._handle_lease,
+                '/heartbeat': coordinator._handle_heartbeat,
+                '/result': coordinator._handle_result,
+            }
+            handler = handlers.get(self.path)
+            if handler is None:
+                self._respond(404, {'error': f"Unknown endpoint {self.path}"})
+                return
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+                payload = json.loads(self.rfile.read(length).decode('utf-8') or '{}')
+                if not isinstance(payload, dict):
+                    raise ValueError("The request body must be a JSON object.")
+                self._respond(200, handler(payload))
+            except LookupError as error:
+                self._respond(404, {'error': str(error)})
+            except ValueError as error:
+                self._respond(400, {'error': str(error)})
+
+        def do_PUT(self) -> None:
+            url = urllib.parse.urlsplit(self.path)
+            parts = url.path.split('/')
+            if len(parts) != 4 or parts[1] != 'artifacts':
+                self._respond(404, {'error': f"Unknown endpoint {url.path}"})
+                return
+            worker_id = urllib.parse.parse_qs(url.query).get('worker_id', [''])[0]
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+                self._respond(200, coordinator._handle_upload(parts[2], urllib.parse.unquote(parts[3]), worker_id,
+                                                             self.rfile, length))
+            except LookupError as error:
+                self._respond(404, {'error': str(error)})
+            except (ValueError, OSError) as error:
+                self._respond(400, {'error': str(error)})
+
+        def _respond(self, status: int, body: dict) -> None:
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format: str, *args) -> None:
+            logger.debug(f"Farm: {self.address_string()} {format % args}")
+
+    return FarmRequestHandler
@@ -0,0 +1,152 @@
+"""
+The HTTP protocol between the build farm coordinator and its workers.
+
+Workers poll the coordinator; the coordinator never connects to a worker. Every call is a
+POST of a JSON object answered with a JSON object, except artifact uploads, which PUT the
+raw installer file:
+
+    POST /register                  {worker}                          -> {worker_id, lease_timeout}
+    POST /lease                     {worker_id}                       -> {task, shutdown}
+    POST /heartbeat                 {worker_id, task_id}              -> {cancelled}
+    PUT  /artifacts/<task_id>/<name>?worker_id=<id>   installer bytes -> {sha256, size}
+    POST /result                    {worker_id, task_id, result, log, artifact, retryable} -> {accepted}
+
+A task is one BuildJob, leased to one worker at a time. A worker keeps its lease alive with
+heartbeats; when a lease expires, the coordinator assumes the worker is gone and hands the
+task to another worker.
+"""
+import json
+import os
+import urllib.error
+import urllib.request
+from typing import List, Optional
+
+from ..scheduler import BuildJob
+
+PROTOCOL_VERSION = 1
+
+
+class FarmError(Exception):
+    """
+    Raised when the coordinator cannot be reached or rejects a request.
+
+    Attributes:
+        status (Optional[int]): The HTTP status of a rejected request, None if there was no response.
+    """
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status: Optional[int] = status
+
+
+def job_to_dict(job: BuildJob) -> dict:
+    """
+    Convert a job into the JSON form sent to workers.
+
+    The scanned manifest and the shared payload plan stay with the coordinator; workers
+    rescan what they need, and every job is compiled on its own.
+
+    Args:
+        job (BuildJob): The job.
+
+    Returns:
+        dict: The job as plain data.
+    """
+    return {
+        'installer_type': job.installer_type,
+        'source_directory': job.source_directory,
+        'file_list': list(job.file_list),
+        'installer_name': job.installer_name,
+        'profile': job.profile,
+    }
+
+
+def job_from_dict(data: dict, output_directory: str) -> BuildJob:
+    """
+    Recreate a job received from the coordinator, building into a directory of the worker.
+
+    Args:
+        data (dict): The job as sent by job_to_dict.
+        output_directory (str): Directory the worker builds the installer in.
+
+    Returns:
+        BuildJob: The job.
+    """
+    return BuildJob(data['installer_type'], data['source_directory'], list(data['file_list']),
+                    data['installer_name'], output_directory, profile=data.get('profile'))
+
+
+def post_json(url: str, payload: dict, timeout: float = 30.0) -> dict:
+    """
+    POST a JSON object and return the JSON object of the response.
+
+    Args:
+        url (str): The endpoint.
+        payload (dict): The request body.
+        timeout (float): Seconds to wait for the response.
+
+    Returns:
+        dict: The response body.
+
+    Raises:
+        FarmError: If the request fails or the response is not JSON.
+    """
+    request = urllib.request.Request(url, data=json.dumps(payload).encode('utf-8'), method='POST',
+                                     headers={'Content-Type': 'application/json'})
+    return _send(request, timeout)
+
+
+def upload_file(url: str, path: str, timeout: float = 300.0) -> dict:
+    """
+    PUT a file, streaming it from disk, and return the JSON object of the response.
+
+    Args:
+        url (str): The endpoint.
+        path (str): The file to upload.
+        timeout (float): Seconds to wait for each network operation.
+
+    Returns:
+        dict: The response body.
+
+    Raises:
+        FarmError: If the file cannot be read or the upload fails.
+    """
+    try:
+        with open(path, 'rb') as upload:
+            request = urllib.request.Request(url, data=upload, method='PUT', headers={
+                'Content-Type': 'application/octet-stream',
+                'Content-Length': str(os.fstat(upload.fileno()).st_size),
+            })
+            return _send(request, timeout)
+    except OSError as error:
+        raise FarmError(f"Cannot upload {path}: {error}")
+
+
+def _send(request: urllib.request.Request, timeout: float) -> dict:
+    """
+    Send a request and decode its JSON response.
+    """
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+    except urllib.error.HTTPError as error:
+        raise FarmError(f"{request.get_method()} {request.full_url} failed with HTTP {error.code}: "
+                        f"{error.read().decode('utf-8', 'replace').strip()}", error.code)
+    except (urllib.error.URLError, OSError) as error:
+        raise FarmError(f"{request.get_method()} {request.full_url} failed: {error}")
+    except ValueError as error:
+        raise FarmError(f"{request.get_method()} {request.full_url} returned invalid JSON: {error}")
+
+
+def log_entries(entries: Optional[List[list]]) -> List[List[str]]:
+    """
+    Validate the log a worker sent with a result.
+
+    Args:
+        entries (Optional[List[list]]): [step name, line] pairs.
+
+    Returns:
+        List[List[str]]: The pairs, with anything malformed dropped.
+    """
+    return [[str(entry[0]), str(entry[1])] for entry in entries or []
+            if isinstance(entry, (list, tuple)) and len(entry) == 2]
@@ -0,0 +1,301 @@
+import argparse
+import hashlib
+import logging
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from typing import List, Optional
+
+from ..base_config import build_cache_directory, build_cache_max_bytes
+from ..build_cache import BuildCache
+from ..cancellation import CancellationToken, process_group_options, terminate_process_tree
+from ..hashing import hash_file
+from ..scheduler import BuildJob, BuildResult, BuildScheduler
+from .protocol import PROTOCOL_VERSION, FarmError, job_from_dict, post_json, upload_file
+
+logger = logging.getLogger(__name__)
+
+
+class _LogCollector(logging.Handler):
+    """
+    Collects the log records of a job so they can be sent to the coordinator with its result.
+    """
+
+    def __init__(self, log: List[List[str]], lock: threading.Lock):
+        super().__init__(logging.INFO)
+        self.log: List[List[str]] = log
+        self.log_lock: threading.Lock = lock
+
+    def emit(self, record: logging.LogRecord) -> None:
+        with self.log_lock:
+            self.log.append(['log', f"{record.levelname}: {record.getMessage()}"])
+
+
+class FarmWorker:
+    """
+    Builds the jobs leased from a build farm coordinator, one at a time.
+
+    Every job goes through the same BuildScheduler, InstallerCreatorProxy and creator stack as
+    a local build, into an output directory below ``work_directory``. The installer is then
+    uploaded to the coordinator together with the result, the compiler output and the log of
+    the job. While a job is building, heartbeats keep its lease alive and tell the worker if
+    the batch was cancelled.
+
+    Source directories are read at the paths the coordinator sends, so every worker needs the
+    sources at the same location, as is the case on one machine or with a shared drive.
+
+    Attributes:
+        coordinator_url (str): Base URL of the coordinator.
+        work_directory (str): Directory the installers are built in.
+        build_cache (Optional[BuildCache]): Cache used to skip jobs whose inputs did not change.
+        name (str): Name the worker registers with.
+        poll_interval (float): Seconds a lease request waits for a job before asking again.
+        max_workers (Optional[int]): Maximum number of concurrent tasks of the scheduler.
+        connect_timeout (float): Seconds the coordinator may be unreachable before the worker gives up.
+    """
+    REQUEST_ATTEMPTS: int = 3
+    HEARTBEAT_INTERVAL: float = 2.0
+
+    def __init__(self, coordinator_url: str, work_directory: Optional[str] = None,
+                 build_cache: Optional[BuildCache] = None, name: Optional[str] = None, poll_interval: float = 2.0,
+                 max_workers: Optional[int] = None, connect_timeout: float = 30.0):
+        """
+        Initialize the FarmWorker.
+
+        Args:
+            coordinator_url (str): Base URL of the coordinator, e.g. 'http://127.0.0.1:8765'.
+            work_directory (Optional[str]): Directory the installers are built in. Defaults to a directory
+                named after the worker in the temporary directory, so repeated builds keep their cache keys.
+            build_cache (Optional[BuildCache]): Cache used to skip jobs whose inputs did not change.
+            name (Optional[str]): Name the worker registers with. Defaults to the host name and process ID.
+            poll_interval (float): Seconds a lease request waits for a job before asking again.
+            max_workers (Optional[int]): Maximum number of concurrent tasks of the scheduler.
+            connect_timeout (float): Seconds the coordinator may be unreachable before the worker gives up.
+        """
+        self.coordinator_url: str = coordinator_url.rstrip('/')
+        self.name: str = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.work_directory: str = work_directory or os.path.join(tempfile.gettempdir(), "installer_farm",
+                                                                  re.sub(r'[^A-Za-z0-9_.-]', '_', self.name))
+        self.build_cache: Optional[BuildCache] = build_cache
+        self.poll_interval: float = poll_interval
+        self.max_workers: Optional[int] = max_workers
+        self.connect_timeout: float = connect_timeout
+        self.worker_id: Optional[str] = None
+        self.lease_timeout: float = 30.0
+
+    def run(self, stop: Optional[threading.Event] = None) -> int:
+        """
+        Build leased jobs until the coordinator shuts down or ``stop`` is set.
+
+        Args:
+            stop (Optional[threading.Event]): Set to stop after the current job.
+
+        Returns:
+            int: The number of jobs finished, whether they succeeded or not.
+
+        Raises:
+            FarmError: If the coordinator cannot be reached for ``connect_timeout`` seconds.
+        """
+        stop = stop or threading.Event()
+        finished = 0
+        self._register()
+        while not stop.is_set():
+            try:
+                lease = self._call('lease', {'worker_id': self.worker_id, 'wait': self.poll_interval},
+                                   timeout=self.poll_interval + 30.0)
+            except FarmError as error:
+                if error.status != 404:
+                    raise
+                self._register()
+                continue
+            if lease.get('shutdown'):
+                break
+            if lease.get('task'):
+                self._execute(lease['task'])
+                finished += 1
+        return finished
+
+    def _register(self) -> None:
+        """
+        Register with the coordinator, waiting for it to come up.
+        """
+        response = self._call('register', {'worker': self.name, 'protocol': PROTOCOL_VERSION})
+        self.worker_id = response['worker_id']
+        self.lease_timeout = float(response['lease_timeout'])
+        logger.info(f"Farm: worker {self.name} registered with {self.coordinator_url}.")
+
+    def _call(self, endpoint: str, payload: dict, timeout: float = 30.0) -> dict:
+        """
+        Call the coordinator, retrying for up to ``connect_timeout`` seconds while it cannot be reached.
+        """
+        deadline = time.monotonic() + self.connect_timeout
+        delay = 0.2
+        while True:
+            try:
+                return post_json(f"{self.coordinator_url}/{endpoint}", payload, timeout=timeout)
+            except FarmError as error:
+                if error.status is not None or time.monotonic() + delay > deadline:
+                    raise
+            time.sleep(delay)
+            delay = min(delay * 2, 5.0)
+
+    def _execute(self, task: dict) -> None:
+        """
+        Build one leased job and report its result.
+        """
+        task_id = task['task_id']
+        job_key = '\0'.join(str(task['job'].get(key)) for key in ('installer_type', 'installer_name',
+                                                                    'source_directory'))
+        output_directory = os.path.join(self.work_directory, hashlib.sha256(job_key.encode('utf-8')).hexdigest()[:16])
+        shutil.rmtree(output_directory, ignore_errors=True)
+        os.makedirs(output_directory)
+        job = job_from_dict(task['job'], output_directory)
+
+        log: List[List[str]] = []
+        log_lock = threading.Lock()
+        cancellation = CancellationToken()
+        finished = threading.Event()
+        heartbeat = threading.Thread(target=self._send_heartbeats, args=(task_id, cancellation, finished),
+                                     name="FarmHeartbeat", daemon=True)
+        collector = _LogCollector(log, log_lock)
+
+        def on_output(_job: BuildJob, step_name: str, line: str) -> None:
+            with log_lock:
+                log.append([step_name, line])
+
+        report = {'worker_id': self.worker_id, 'task_id': task_id, 'artifact': None, 'retryable': False}
+        logging.getLogger().addHandler(collector)
+        heartbeat.start()
+        try:
+            result = BuildScheduler(max_workers=self.max_workers, build_cache=self.build_cache, on_output=on_output,
+                                    cancellation=cancellation).run([job])[0]
+            if result.success:
+                name = os.path.basename(result.output_path)
+                digest = hash_file(result.output_path)
+                upload_file(f"{self.coordinator_url}/artifacts/{task_id}/{urllib.parse.quote(name)}"
+                            f"?worker_id={self.worker_id}", result.output_path)
+                report['artifact'] = {'name': name, 'sha256': digest}
+        except Exception as error:
+            result = BuildResult(job)
+            result.error = f"{type(error).__name__}: {error}"
+            report['retryable'] = True
+        finally:
+            finished.set()
+            heartbeat.join()
+            logging.getLogger().removeHandler(collector)
+
+        report['result'] = result.to_dict()
+        report['log'] = log
+        for attempt in range(self.REQUEST_ATTEMPTS):
+            try:
+                self._call('result', report)
+                break
+            except FarmError as error:
+                if error.status is not None or attempt + 1 == self.REQUEST_ATTEMPTS:
+                    logger.error(f"Farm: could not report task {task_id} - {error}")
+                    break
+        shutil.rmtree(output_directory, ignore_errors=True)
+
+    def _send_heartbeats(self, task_id: str, cancellation: CancellationToken, finished: threading.Event) -> None:
+        """
+        Renew the lease of a task until it is finished, cancelling it when the coordinator says so.
+        """
+        while not finished.wait(min(self.HEARTBEAT_INTERVAL, self.lease_timeout / 3)):
+            try:
+                response = post_json(f"{self.coordinator_url}/heartbeat",
+                                     {'worker_id': self.worker_id, 'task_id': task_id}, timeout=self.lease_timeout / 3)
+            except FarmError as error:
+                logger.warning(f"Farm: heartbeat for task {task_id} failed - {error}")
+                continue
+            if response.get('cancelled'):
+                cancellation.cancel()
+
+
+def start_local_workers(coordinator_url: str, count: int,
+                        cache_directory: Optional[str] = None) -> List[subprocess.Popen]:
+    """
+    Start worker processes on this machine.
+
+    The workers print to standard error, so standard output stays free for the summary. They
+    run in their own process groups, so an interrupt of this process does not kill them; they
+    stop their jobs when the coordinator cancels the batch and exit when it shuts down.
+
+    Args:
+        coordinator_url (str): Base URL of the coordinator.
+        count (int): Number of worker processes.
+        cache_directory (Optional[str]): Build cache of the workers, or None to build without one.
+
+    Returns:
+        List[subprocess.Popen]: The worker processes.
+    """
+    package_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    processes = []
+    for number in range(1, count + 1):
+        command = [sys.executable, '-m', 'core.farm.worker', coordinator_url, '--name', f"local-{number}"]
+        command += ['--cache', cache_directory] if cache_directory else ['--no-cache']
+        processes.append(subprocess.Popen(command, cwd=package_root, stdout=sys.stderr, **process_group_options()))
+    return processes
+
+
+def stop_local_workers(processes: List[subprocess.Popen], timeout: float = 10.0) -> None:
+    """
+    Wait for local worker processes to exit after their coordinator shut down, terminating stragglers.
+
+    Args:
+        processes (List[subprocess.Popen]): The worker processes.
+        timeout (float): Seconds to wait for each process.
+    """
+    for process in processes:
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            terminate_process_tree(process)
+            process.wait()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run a build farm worker until its coordinator shuts down.
+
+    Usage (from the InstallerGenerator directory):
+        python -m core.farm.worker http://127.0.0.1:8765 [--name NAME] [--work-dir DIR] [--cache DIR | --no-cache]
+
+    Args:
+        argv (Optional[List[str]]): The arguments, defaulting to sys.argv.
+
+    Returns:
+        int: 0 once the coordinator shut down, 1 if it could not be reached.
+    """
+    parser = argparse.ArgumentParser(description="Build installers for a build farm coordinator.")
+    parser.add_argument("coordinator", help="Base URL of the coordinator.")
+    parser.add_argument("--name", help="Name of the worker. Defaults to the host name and process ID.")
+    parser.add_argument("--work-dir", help="Directory the installers are built in. Defaults to a directory named "
+                                           "after the worker in the temporary directory.")
+    parser.add_argument("--cache", default=build_cache_directory, help="Build cache directory.")
+    parser.add_argument("--no-cache", action="store_true", help="Always run the compilers.")
+    parser.add_argument("-j", "--jobs", type=int, help="Maximum number of concurrent compiler tasks.")
+    arguments = parser.parse_args(argv)
+
+    build_cache = None if arguments.no_cache else BuildCache(arguments.cache, max_bytes=build_cache_max_bytes)
+    worker = FarmWorker(arguments.coordinator, arguments.work_dir, build_cache, arguments.name,
+                        max_workers=arguments.jobs)
+    try:
+        finished = worker.run()
+    except FarmError as error:
+        print(f"{worker.name}: {error}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 1
+    print(f"{worker.name}: finished {finished} job{'' if finished == 1 else 's'}.", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,355 @@
+import io
+import os
+from array import array
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from .preflight import CheckedFile
+from .scanner import ManifestEntry
+from .wix_ids import IdentifierAllocator, IdentifierError
+
+DIGEST_SIZE: int = 32
+_UNKNOWN_DIGEST: bytes = bytes(DIGEST_SIZE)
+
+
+def normalize_path(path: str) -> str:
+    """
+    Returns a relative path with forward slashes, so it is the same on every platform.
+
+    Args:
+        path (str): A path relative to the source directory.
+
+    Returns:
+        str: The normalized path.
+    """
+    return path.replace('\\', '/')
+
+
+class PackedStrings:
+    """
+    An immutable sequence of strings stored back to back in a single string.
+
+    A list holds a separate string object of about 50 bytes plus a pointer for every value;
+    packed, a value costs its characters and a 4-byte offset, and is sliced out when read.
+    """
+    __slots__ = ('_text', '_offsets')
+
+    def __init__(self, values: Iterable[str]):
+        """
+        Initialize the PackedStrings.
+
+        Args:
+            values (Iterable[str]): The strings, consumed once.
+        """
+        buffer = io.StringIO()
+        offsets = array('I', [0])
+        end = 0
+        for value in values:
+            buffer.write(value)
+            end += len(value)
+            offsets.append(end)
+        self._text: str = buffer.getvalue()
+        self._offsets: array = offsets
+
+    @classmethod
+    def from_parts(cls, text: str, offsets: array) -> 'PackedStrings':
+        """
+        Create the sequence from already packed strings.
+
+        Args:
+            text (str): The strings back to back.
+            offsets (array): The start of every string in ``text``, followed by the end of the last one.
+
+        Returns:
+            PackedStrings: The sequence.
+        """
+        packed = cls(())
+        packed._text = text
+        packed._offsets = offsets
+        return packed
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return self._text[self._offsets[index]:self._offsets[index + 1]]
+
+    def __iter__(self) -> Iterator[str]:
+        text = self._text
+        start = 0
+        for end in self._offsets[1:]:
+            yield text[start:end]
+            start = end
+
+    def select(self, positions: Iterable[int]) -> Iterator[str]:
+        """
+        Iterate over the strings at the given positions, in the order given.
+
+        Args:
+            positions (Iterable[int]): The positions.
+
+        Yields:
+            str: The string at the next position.
+        """
+        text, offsets = self._text, self._offsets
+        for position in positions:
+            yield text[offsets[position]:offsets[position + 1]]
+
+    def nbytes(self) -> int:
+        """
+        Returns the approximate memory used by the strings.
+
+        Returns:
+            int: Bytes of the packed text and the offsets.
+        """
+        return self._text.__sizeof__() + self._offsets.buffer_info()[1] * self._offsets.itemsize
+
+
+class FileTable:
+    """
+    A compact table of the files of an installer, built once and shared by its script emitters.
+
+    Every path is split into a directory prefix and a base name. Each distinct prefix is kept
+    once and referred to by index, and the base names, component IDs, sizes and digests are
+    parallel columns indexed by the position of the file in the file list. ``order`` holds the
+    positions sorted by normalized path, the order the WiX script lists the files in, so the
+    emitters neither split nor sort the paths again on every pass.
+
+    Attributes:
+        directories (List[str]): Distinct directory prefixes including their trailing separator, '' for the root.
+        normalized_directories (List[str]): The prefixes with forward slashes.
+        directory_indexes (array): Index into ``directories`` of every file.
+        names (PackedStrings): Base name of every file.
+        sizes (array): Size of every file in bytes, -1 if not known.
+        digests (bytearray): SHA-256 digest of every file, DIGEST_SIZE bytes each, or empty if none is known.
+    """
+    __slots__ = ('directories', 'normalized_directories', 'directory_indexes', 'names', 'sizes', 'digests', '_order',
+                 '_component_ids', '_directory_parts')
+
+    def __init__(self, directories: List[str], directory_indexes: array, names: PackedStrings, sizes: array):
+        """
+        Initialize the FileTable from its columns.
+
+        Use from_paths() to build a table from a file list.
+
+        Args:
+            directories (List[str]): Distinct directory prefixes including their trailing separator.
+            directory_indexes (array): Index into ``directories`` of every file.
+            names (PackedStrings): Base name of every file.
+            sizes (array): Size of every file in bytes, -1 if not known.
+        """
+        self.directories: List[str] = directories
+        self.normalized_directories: List[str] = [normalize_path(directory) for directory in directories]
+        self.directory_indexes: array = directory_indexes
+        self.names: PackedStrings = names
+        self.sizes: array = sizes
+        self.digests: bytearray = bytearray()
+        self._order: Optional[array] = None
+        self._component_ids: Optional[PackedStrings] = None
+        self._directory_parts: Optional[List[Tuple[str, ...]]] = None
+
+    @classmethod
+    def from_paths(cls, paths: Sequence[str],
+                   manifest_entries: Optional[Mapping[str, ManifestEntry]] = None) -> 'FileTable':
+        """
+        Build the table of a file list.
+
+        Args:
+            paths (Sequence[str]): Paths of the files relative to the source directory, in file list order.
+            manifest_entries (Optional[Mapping[str, ManifestEntry]]): Scanned entries to take the sizes from.
+
+        Returns:
+            FileTable: The table.
+        """
+        directory_positions: Dict[str, int] = {}
+        directories: List[str] = []
+        directory_indexes = array('I')
+        offsets = array('I', [0])
+        buffer = io.StringIO()
+        write, append_index, append_offset = buffer.write, directory_indexes.append, offsets.append
+        # Where '/' is the only separator a path is split at its last one; elsewhere basename()
+        # also knows the alternative separator and drive letters.
+        separator = os.sep if os.altsep is None else None
+        end = 0
+        for path in paths:
+            cut = path.rfind(separator) + 1 if separator else len(path) - len(os.path.basename(path))
+            directory = path[:cut]
+            index = directory_positions.get(directory)
+            if index is None:
+                index = directory_positions[directory] = len(directories)
+                directories.append(directory)
+            append_index(index)
+            end += write(path[cut:])
+            append_offset(end)
+
+        if manifest_entries:
+            sizes = array('q', (entry.size if entry is not None else -1
+                                for entry in map(manifest_entries.get, paths)))
+        else:
+            sizes = array('q', [-1]) * len(directory_indexes)
+        return cls(directories, directory_indexes, PackedStrings.from_parts(buffer.getvalue(), offsets), sizes)
+
+    def __len__(self) -> int:
+        return len(self.directory_indexes)
+
+    @property
+    def order(self) -> array:
+        """
+        The positions of the files sorted by normalized path, computed on first use.
+
+        Emitters that list the files in file list order never pay for the sort.
+        """
+        if self._order is None:
+            normalized_directories = self.normalized_directories
+            sort_keys = [normalized_directories[directory] + normalize_path(name)
+                         for directory, name in zip(self.directory_indexes, self.names)]
+            self._order = array('I', sorted(range(len(sort_keys)), key=sort_keys.__getitem__))
+        return self._order
+
+    @property
+    def component_ids(self) -> PackedStrings:
+        """
+        The WiX component (and file) ID of every file, allocated on first use.
+
+        Raises:
+            IdentifierError: If a file is listed more than once.
+        """
+        return self.allocate_component_ids()
+
+    def allocate_component_ids(self) -> PackedStrings:
+        """
+        Gives every file a unique, valid WiX identifier, unless that was done before.
+
+        The files are visited in sorted order, so the IDs only depend on the file list. A file
+        whose base name is a valid identifier not taken by an earlier file keeps it as its ID;
+        the others get a sanitized name with a suffix derived from their normalized path (see
+        IdentifierAllocator). Since equal paths sort next to each other, a file listed twice,
+        the one case in which no unique ID exists, is found while visiting.
+
+        Returns:
+            PackedStrings: The ID of every file, by position.
+
+        Raises:
+            IdentifierError: If a file is listed more than once.
+        """
+        if self._component_ids is not None:
+            return self._component_ids
+
+        allocator = IdentifierAllocator()
+        normalized_directories, directory_indexes = self.normalized_directories, self.directory_indexes
+        identifiers: List[str] = [''] * len(self)
+        renamed = False
+        previous_path = None
+        order = self.order
+        for position, name in zip(order, self.names.select(order)):
+            path = normalized_directories[directory_indexes[position]] + normalize_path(name)
+            if path == previous_path:
+                raise IdentifierError(f"'{self.path(position)}' is listed more than once.")
+            previous_path = path
+            identifier = allocator.allocate(name, path)
+            renamed = renamed or identifier != name
+            identifiers[position] = identifier
+        self._component_ids = PackedStrings(identifiers) if renamed else self.names
+        return self._component_ids
+
+    def iter_directory_parts(self, positions: Sequence[int]) -> Iterator[Tuple[str, ...]]:
+        """
+        Iterate over the names of the directories leading to each file, from the top down.
+
+        The parts are split once per distinct directory prefix, and files in the same directory
+        share the same tuple. Backslashes count as separators, as they do on Windows where the
+        installers run, and empty and '.' parts are dropped.
+
+        Args:
+            positions (Sequence[int]): Positions of the files in the file list.
+
+        Yields:
+            Tuple[str, ...]: The directory names of the next file, empty for a file at the top.
+        """
+        if self._directory_parts is None:
+            self._directory_parts = [tuple(part for part in directory.split('/') if part not in ('', '.'))
+                                     for directory in self.normalized_directories]
+        directory_parts, directory_indexes = self._directory_parts, self.directory_indexes
+        for position, name in zip(positions, self.names.select(positions)):
+            parts = directory_parts[directory_indexes[position]]
+            if '\\' in name:
+                parts += tuple(part for part in normalize_path(name).split('/')[:-1] if part not in ('', '.'))
+            yield parts
+
+    def path(self, position: int) -> str:
+        """
+        Returns the path of a file as it appears in the file list.
+
+        Args:
+            position (int): Position of the file in the file list.
+
+        Returns:
+            str: Path of the file relative to the source directory.
+        """
+        return self.directories[self.directory_indexes[position]] + self.names[position]
+
+    def normalized_path(self, position: int) -> str:
+        """
+        Returns the path of a file with forward slashes.
+
+        Args:
+            position (int): Position of the file in the file list.
+
+        Returns:
+            str: The normalized path of the file.
+        """
+        return self.normalized_directories[self.directory_indexes[position]] + normalize_path(self.names[position])
+
+    def content_hash(self, position: int) -> Optional[str]:
+        """
+        Returns the content digest of a file, if known.
+
+        Args:
+            position (int): Position of the file in the file list.
+
+        Returns:
+            Optional[str]: The hexadecimal SHA-256 digest, or None if the file has not been hashed.
+        """
+        digest = self.digests[position * DIGEST_SIZE:(position + 1) * DIGEST_SIZE]
+        if not digest or digest == _UNKNOWN_DIGEST:
+            return None
+        return digest.hex()
+
+    def record_checked_files(self, checked_files: Mapping[str, CheckedFile]) -> None:
+        """
+        Stores the sizes and digests found by a pre-flight check of the files.
+
+        Args:
+            checked_files (Mapping[str, CheckedFile]): The checked files, keyed by path.
+        """
+        digests = bytearray(DIGEST_SIZE * len(self))
+        for position in range(len(self)):
+            checked = checked_files.get(self.path(position))
+            if checked is None:
+                continue
+            self.sizes[position] = checked.size
+            if checked.content_hash:
+                digests[position * DIGEST_SIZE:(position + 1) * DIGEST_SIZE] = bytes.fromhex(checked.content_hash)
+        self.digests = digests
+
+    def sorted_paths(self) -> List[str]:
+        """
+        Returns the paths of the files in sorted order.
+
+        Returns:
+            List[str]: The paths, sorted by their normalized form.
+        """
+        return [self.path(position) for position in self.order]
+
+    def nbytes(self) -> int:
+        """
+        Returns the approximate memory used by the table.
+
+        Returns:
+            int: Bytes of the columns, the directory prefixes and the sort order.
+        """
+        arrays = (self.directory_indexes, self.sizes) + ((self._order,) if self._order is not None else ())
+        size = sum(column.buffer_info()[1] * column.itemsize for column in arrays) + len(self.digests)
+        size += self.names.nbytes()
+        if self._component_ids is not None and self._component_ids is not self.names:
+            size += self._component_ids.nbytes()
+        return size + sum(directory.__sizeof__() for directory in self.directories)
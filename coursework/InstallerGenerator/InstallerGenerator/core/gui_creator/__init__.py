@@ -1,3 +0,0 @@
-from InstallerGenerator.core.logging_config import setup_logging
-
-setup_logging()
\ No newline at end of file
@@ -0,0 +1,246 @@
+import queue
+import threading
+import tkinter as tk
+from typing import Callable, List, Optional, Set
+
+from .prefix_index import PrefixIndex
+from ..scanner import DirectoryScanner, FileManifest
+
+
+class VirtualFileList:
+    """
+    A virtualized, filterable list of files for the installer GUI.
+
+    Only the rows that fit into the visible Listbox are inserted into the widget; scrolling
+    re-renders that window over the filtered list. Directories are scanned on a background
+    thread, which queues the paths of every directory as soon as it has been scanned; the Tk
+    main thread picks them up through ``root.after``, so the list fills while large trees are
+    still being walked and the window stays responsive. The filter box searches an in-memory
+    PrefixIndex, and the view is only filtered again when paths arrive or the filter changes.
+
+    Attributes:
+        frame (tk.Frame): The frame holding the filter box, the list and its scrollbar.
+        visible_rows (int): Number of rows shown at once.
+    """
+    BATCH_SIZE: int = 2000
+    POLL_INTERVAL_MS: int = 30
+    PATHS_PER_POLL: int = 10000
+
+    def __init__(self, parent: tk.Widget, visible_rows: int = 15, entry_style_args: Optional[dict] = None,
+                 listbox_style_args: Optional[dict] = None, label_style_args: Optional[dict] = None):
+        """
+        Initialize the VirtualFileList.
+
+        Args:
+            parent (tk.Widget): The widget the file list is placed in.
+            visible_rows (int): Number of rows shown at once.
+            entry_style_args (Optional[dict]): Style options of the filter entry.
+            listbox_style_args (Optional[dict]): Style options of the Listbox.
+            label_style_args (Optional[dict]): Style options of the labels.
+        """
+        self.visible_rows: int = visible_rows
+        self.frame = tk.Frame(parent, bg=(label_style_args or {}).get('bg'))
+
+        filter_frame = tk.Frame(self.frame, bg=(label_style_args or {}).get('bg'))
+        filter_frame.pack(fill='x')
+        tk.Label(filter_frame, text="Filter:", **(label_style_args or {})).pack(side=tk.LEFT)
+        self.filter_text = tk.StringVar()
+        self.filter_text.trace_add('write', lambda *args: self.apply_filter())
+        tk.Entry(filter_frame, textvariable=self.filter_text, **(entry_style_args or {})).pack(side=tk.LEFT, fill='x',
+                                                                                             expand=True)
+
+        list_frame = tk.Frame(self.frame)
+        list_frame.pack(fill='both', expand=True)
+        self.listbox = tk.Listbox(list_frame, selectmode=tk.MULTIPLE, height=visible_rows, exportselection=False,
+                                  **(listbox_style_args or {}))
+        self.scrollbar = tk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.yview)
+        self.listbox.pack(side=tk.LEFT, fill='both', expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill='y')
+        self.listbox.bind('<<ListboxSelect>>', self.on_select)
+        self.listbox.bind('<MouseWheel>', self.on_mouse_wheel)
+        self.listbox.bind('<Button-4>', lambda event: self.scroll(-3))
+        self.listbox.bind('<Button-5>', lambda event: self.scroll(3))
+
+        self.status_label = tk.Label(self.frame, text="", **(label_style_args or {}))
+        self.status_label.pack(anchor='w')
+
+        self._index: PrefixIndex = PrefixIndex()
+        self._view: List[str] = []
+        self._offset: int = 0
+        self._selected: Set[str] = set()
+        self._batches: queue.Queue = queue.Queue()
+        self._loading: bool = False
+        self._on_loaded: Optional[Callable[[FileManifest], None]] = None
+
+    def pack(self, **kwargs) -> None:
+        """
+        Pack the file list into its parent.
+        """
+        self.frame.pack(**kwargs)
+
+    def load(self, scanner: DirectoryScanner, on_loaded: Optional[Callable[[FileManifest], None]] = None) -> None:
+        """
+        Replace the listed files with the contents of a directory, scanned in the background.
+
+        Every load gets its own batch queue, so batches of a scan that is still running for a
+        previously loaded directory are dropped.
+
+        Args:
+            scanner (DirectoryScanner): Scanner of the directory to list.
+            on_loaded (Optional[Callable[[FileManifest], None]]): Called on the Tk thread with the manifest
+                once every path has been listed.
+        """
+        self._index = PrefixIndex()
+        self._view = []
+        self._offset = 0
+        self._selected = set()
+        self._on_loaded = on_loaded
+        self._batches = queue.Queue()
+        self.render()
+        self.status_label.config(text="Scanning...")
+
+        thread = threading.Thread(target=self._scan, args=(scanner, self._batches), daemon=True)
+        thread.start()
+        if not self._loading:
+            self._loading = True
+            self.frame.after(self.POLL_INTERVAL_MS, self._poll)
+
+    def _scan(self, scanner: DirectoryScanner, batches: queue.Queue) -> None:
+        """
+        Scan the directory, queueing the paths of every directory as it is scanned, in batches of at most
+        BATCH_SIZE paths. Runs on a background thread.
+        """
+        def queue_directory(paths: List[str]) -> None:
+            for start in range(0, len(paths), self.BATCH_SIZE):
+                batches.put(paths[start:start + self.BATCH_SIZE])
+
+        try:
+            manifest = scanner.scan(on_directory=queue_directory)
+        except OSError as error:
+            batches.put(error)
+            return
+        batches.put(manifest)
+
+    def _poll(self) -> None:
+        """
+        Move queued batches into the index and refresh the view. Runs on the Tk thread.
+
+        At most about PATHS_PER_POLL paths are taken per call, and the view is only filtered
+        again if any arrived.
+        """
+        added = 0
+        while added < self.PATHS_PER_POLL:
+            try:
+                item = self._batches.get_nowait()
+            except queue.Empty:
+                break
+
+            if isinstance(item, FileManifest):
+                self._loading = False
+                if added:
+                    self.apply_filter()
+                self.status_label.config(text=f"{len(self._index)} files")
+                if self._on_loaded is not None:
+                    self._on_loaded(item)
+                return
+            if isinstance(item, Exception):
+                self._loading = False
+                self.status_label.config(text=f"Scan failed: {item}")
+                return
+            self._index.add(item)
+            added += len(item)
+
+        if added:
+            self.status_label.config(text=f"Scanning... {len(self._index)} files")
+            self.apply_filter()
+        self.frame.after(self.POLL_INTERVAL_MS, self._poll)
+
+    def apply_filter(self) -> None:
+        """
+        Narrow the view to the paths matching the filter box.
+        """
+        self._view = self._index.search(self.filter_text.get().strip())
+        self._offset = min(self._offset, self._max_offset())
+        self.render()
+
+    def render(self) -> None:
+        """
+        Insert the currently visible rows into the Listbox and update the scrollbar.
+        """
+        rows = self._view[self._offset:self._offset + self.visible_rows]
+        self.listbox.delete(0, tk.END)
+        if rows:
+            self.listbox.insert(tk.END, *rows)
+        for row, path in enumerate(rows):
+            if path in self._selected:
+                self.listbox.selection_set(row)
+
+        if self._view:
+            first = self._offset / len(self._view)
+            last = min(1.0, (self._offset + self.visible_rows) / len(self._view))
+        else:
+            first, last = 0.0, 1.0
+        self.scrollbar.set(first, last)
+
+    def yview(self, *args) -> None:
+        """
+        Scroll the view in response to the scrollbar.
+        """
+        if not args:
+            return
+        if args[0] == 'moveto':
+            self._scroll_to(int(float(args[1]) * len(self._view)))
+        elif args[0] == 'scroll':
+            step = self.visible_rows if args[2] == 'pages' else 1
+            self.scroll(int(args[1]) * step)
+
+    def scroll(self, rows: int) -> None:
+        """
+        Scroll the view by a number of rows.
+
+        Args:
+            rows (int): Number of rows to scroll, negative to scroll up.
+        """
+        self._scroll_to(self._offset + rows)
+
+    def on_mouse_wheel(self, event: tk.Event) -> str:
+        """
+        Scroll the view with the mouse wheel.
+        """
+        self.scroll(-1 if event.delta > 0 else 1)
+        return 'break'
+
+    def on_select(self, event: tk.Event) -> None:
+        """
+        Record the selection state of the visible rows.
+        """
+        selected_rows = set(self.listbox.curselection())
+        for row, path in enumerate(self._view[self._offset:self._offset + self.visible_rows]):
+            if row in selected_rows:
+                self._selected.add(path)
+            else:
+                self._selected.discard(path)
+
+    def selected_paths(self) -> List[str]:
+        """
+        Return the selected paths, including selected paths hidden by the filter.
+
+        Returns:
+            List[str]: The selected relative paths in sorted order.
+        """
+        return sorted(self._selected)
+
+    def _scroll_to(self, offset: int) -> None:
+        """
+        Move the first visible row to the given offset and re-render.
+        """
+        offset = max(0, min(offset, self._max_offset()))
+        if offset != self._offset:
+            self._offset = offset
+            self.render()
+
+    def _max_offset(self) -> int:
+        """
+        Return the largest offset that still fills the visible rows.
+        """
+        return max(0, len(self._view) - self.visible_rows)
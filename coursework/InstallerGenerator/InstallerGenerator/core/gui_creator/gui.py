@@ -1,16 +1,25 @@
 import os
+import queue
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import filedialog, ttk
-import winshell
-from ..creators.exe_creator import EXECreator
-from ..creators.msi_creator import MSICreator
-from ..proxy import InstallerCreatorProxy
+from ..base_config import build_cache_directory, build_cache_max_bytes, manifest_index_directory
+from ..build_cache import BuildCache
+from ..cancellation import CancellationToken
+from ..factories.creator_factory import InstallerCreatorFactory
+from ..profiles import PROFILES, get_profile
+from ..scanner import DirectoryScanner
+from .file_browser import VirtualFileList
+from ..scheduler import BuildJob, BuildScheduler
 class InstallerCreatorGUI:
     """
     Graphical User Interface for creating installers.
 
     This class provides a user-friendly interface for configuring and generating MSI and EXE installers.
     """
+    BUILD_POLL_INTERVAL_MS = 50
+    MAX_LOG_LINES = 5000
+
     def __init__(self, root):
         """
         Initialize the InstallerCreatorGUI instance.
@@ -25,6 +34,12 @@ class InstallerCreatorGUI:
         self.source_directory = tk.StringVar()
         self.selected_output_directory = tk.StringVar()
         self.installer_filename = tk.StringVar()
+        self.build_profile = tk.StringVar(value=get_profile().name)
+        self.scanner = None
+        self.manifest = None
+        self.build_executor = ThreadPoolExecutor(max_workers=1)
+        self.build_events = queue.Queue()
+        self.cancellation = None
         self.setup_ui()
 
     def setup_ui(self):
@@ -40,6 +55,7 @@ class InstallerCreatorGUI:
         self.setup_output_controls()
         self.setup_installer_controls()
         self.setup_action_controls()
+        self.setup_progress_controls()
 
     def setup_styles(self):
         """
@@ -59,11 +75,15 @@ class InstallerCreatorGUI:
         """
         Set up the GUI layout.
 
-        This method creates a left frame with a black background.
+        This method creates a left frame for the controls and a right frame for the build progress,
+        both with a black background.
         """
         self.left_frame = tk.Frame(self.root, bg='black')
         self.left_frame.pack(side=tk.LEFT, padx=10, pady=10)
 
+        self.right_frame = tk.Frame(self.root, bg='black')
+        self.right_frame.pack(side=tk.LEFT, fill='both', expand=True, padx=10, pady=10)
+
     def setup_directory_controls(self):
         """
         Set up controls for selecting the source directory.
@@ -83,13 +103,16 @@ class InstallerCreatorGUI:
         """
         Set up the file list control.
 
-        This method creates a Listbox with multiple selection mode for selecting files to include in the installer.
+        This method creates a virtualized, filterable list with multiple selection mode for selecting files
+        to include in the installer.
         """
         file_list_label = tk.Label(self.left_frame, text="Select files to include:", **self.style_args)
         file_list_label.pack(anchor='w', pady=(5, 0))
 
-        self.file_listbox = tk.Listbox(self.left_frame, selectmode=tk.MULTIPLE, **self.listbox_style_args)
-        self.file_listbox.pack(fill='both', expand=True, padx=5, pady=5)
+        self.file_browser = VirtualFileList(self.left_frame, entry_style_args=self.entry_style_args,
+                                            listbox_style_args=self.listbox_style_args,
+                                            label_style_args=self.style_args)
+        self.file_browser.pack(fill='both', expand=True, padx=5, pady=5)
 
     def setup_output_controls(self):
         """
@@ -127,18 +150,49 @@ class InstallerCreatorGUI:
         exe_checkbox = ttk.Checkbutton(self.left_frame, text="Create EXE", style="TCheckbutton", variable=self.create_exe)
         exe_checkbox.pack(anchor='w', padx=5, pady=(0, 5))
 
+        build_profile_label = tk.Label(self.left_frame, text="Build profile:", **self.style_args)
+        build_profile_label.pack(anchor='w', pady=(5, 0))
+
+        build_profile_combobox = ttk.Combobox(self.left_frame, textvariable=self.build_profile, values=list(PROFILES),
+                                              state='readonly')
+        build_profile_combobox.pack(fill='x', padx=5, pady=5)
+
     def setup_action_controls(self):
         """
         Set up controls for actions like creating the installer.
 
         This method includes a button to create the installer and a label for displaying the result.
         """
-        create_installer_button = tk.Button(self.left_frame, text="Create Installer", command=self.create_installer, **self.button_style_args)
-        create_installer_button.pack(anchor='w', padx=5, pady=5)
+        self.create_installer_button = tk.Button(self.left_frame, text="Create Installer", command=self.create_installer, **self.button_style_args)
+        self.create_installer_button.pack(anchor='w', padx=5, pady=5)
+
+        self.cancel_button = tk.Button(self.left_frame, text="Cancel", command=self.cancel_build, state=tk.DISABLED, **self.button_style_args)
+        self.cancel_button.pack(anchor='w', padx=5, pady=5)
 
         self.result_label = tk.Label(self.left_frame, text="", **self.style_args)
         self.result_label.pack(anchor='w', pady=(5, 0))
 
+    def setup_progress_controls(self):
+        """
+        Set up the build progress controls.
+
+        This method includes a progress bar counting finished installers and a log pane showing the
+        compiler output while the installers are built.
+        """
+        progress_label = tk.Label(self.right_frame, text="Build progress:", **self.style_args)
+        progress_label.pack(anchor='w', pady=(5, 0))
+
+        self.progress_bar = ttk.Progressbar(self.right_frame, orient=tk.HORIZONTAL, mode='determinate')
+        self.progress_bar.pack(fill='x', padx=5, pady=5)
+
+        log_frame = tk.Frame(self.right_frame, bg='black')
+        log_frame.pack(fill='both', expand=True, padx=5, pady=5)
+        self.log_text = tk.Text(log_frame, height=20, width=80, state=tk.DISABLED, **self.listbox_style_args)
+        log_scrollbar = tk.Scrollbar(log_frame, orient=tk.VERTICAL, command=self.log_text.yview)
+        self.log_text.configure(yscrollcommand=log_scrollbar.set)
+        self.log_text.pack(side=tk.LEFT, fill='both', expand=True)
+        log_scrollbar.pack(side=tk.RIGHT, fill='y')
+
     def browse_directory(self):
         """
         Open a directory dialog to select the source directory.
@@ -156,12 +210,25 @@ class InstallerCreatorGUI:
         """
         Update the file list based on the selected source directory.
 
+        The whole directory tree is scanned on a background thread, and files in subdirectories are
+        listed by their path relative to the source directory as the scan results arrive.
+
         Args:
             directory_path (str): The path of the selected source directory.
         """
-        self.file_listbox.delete(0, tk.END)
-        for filename in os.listdir(directory_path):
-            self.file_listbox.insert(tk.END, filename)
+        index_path = DirectoryScanner.default_index_path(directory_path, manifest_index_directory)
+        self.scanner = DirectoryScanner(directory_path, index_path)
+        self.manifest = None
+        self.file_browser.load(self.scanner, on_loaded=self.set_manifest)
+
+    def set_manifest(self, manifest):
+        """
+        Store the manifest of the scanned source directory.
+
+        Args:
+            manifest (FileManifest): The manifest produced by the background scan.
+        """
+        self.manifest = manifest
 
     def browse_output_directory(self):
         """
@@ -189,21 +256,16 @@ class InstallerCreatorGUI:
         Returns:
             InstallerCreatorProxy: An instance of an installer creator factory.
         """
-        if installer_type == 'MSI':
-            real_creator = MSICreator(source_directory, output_directory, file_list, installer_name)
-        elif installer_type == 'EXE':
-            real_creator = EXECreator(source_directory, output_directory, file_list, installer_name)
-        else:
-            raise ValueError("Unknown installer type")
-
-        return InstallerCreatorProxy(real_creator, installer_type)
+        return InstallerCreatorFactory.create(installer_type, source_directory, output_directory, file_list,
+                                              installer_name)
 
     def create_installer(self):
         """
         Create the installer based on user inputs.
 
-        Calls the appropriate installer creator based on selected checkboxes (MSI or EXE).
-        Creates a desktop shortcut if the corresponding checkbox is selected.
+        Builds the installers selected with the checkboxes (MSI and/or EXE) concurrently on a
+        background thread, so the window stays responsive. Compiler output is shown in the log pane
+        as it arrives. Creates a desktop shortcut if the corresponding checkbox is selected.
         Displays the result in the GUI.
         """
         installer_name = self.installer_filename.get()
@@ -218,28 +280,153 @@ class InstallerCreatorGUI:
             self.result_label.config(text="Please select both source and output directories.")
             return
 
-        file_list = [self.file_listbox.get(idx) for idx in self.file_listbox.curselection()]
+        file_list = self.file_browser.selected_paths()
 
-        if self.create_msi.get():
-            msi_creator = self.create_installer_factory('MSI', source_directory, output_directory, file_list, installer_name)
-            msi_creator.create_installer()
+        selected_types = [('MSI', self.create_msi.get()), ('EXE', self.create_exe.get())]
+        manifest = self.manifest if self.manifest is not None and self.manifest.root == source_directory else None
+        jobs = [BuildJob(installer_type, source_directory, file_list, installer_name, output_directory, manifest,
+                         profile=self.build_profile.get())
+                for installer_type, selected in selected_types if selected]
 
-        if self.create_exe.get():
-            exe_creator = self.create_installer_factory('EXE', source_directory, output_directory, file_list, installer_name)
-            exe_creator.create_installer()
+        self.cancellation = CancellationToken()
+        self.create_installer_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.progress_bar.config(maximum=max(len(jobs), 1), value=0)
+        self.clear_log()
+        self.result_label.config(text="Creating installers...")
+
+        # The scanner is captured now: browsing another folder during the build replaces self.scanner.
+        scanner = self.scanner if manifest is not None else None
+        self.build_executor.submit(self.run_builds, jobs, scanner, self.cancellation)
+        self.root.after(self.BUILD_POLL_INTERVAL_MS, self.poll_build_events, installer_name)
+
+    def run_builds(self, jobs, scanner, cancellation):
+        """
+        Build the installers on the background build thread.
+
+        Compiler output and finished jobs are passed to the Tk thread through the build event queue.
+
+        Args:
+            jobs (list): The BuildJobs to run.
+            scanner (DirectoryScanner): Scanner of the source directory whose manifest the jobs use, or None.
+            cancellation (CancellationToken): Token cancelled by the Cancel button.
+        """
+        def on_output(job, step_name, line):
+            self.build_events.put(('output', f"[{job.installer_type} {step_name}] {line}"))
+
+        def on_job_finished(result):
+            self.build_events.put(('job', result))
+
+        try:
+            build_cache = BuildCache(build_cache_directory, max_bytes=build_cache_max_bytes)
+            scheduler = BuildScheduler(build_cache=build_cache, on_output=on_output, on_job_finished=on_job_finished,
+                                       cancellation=cancellation)
+            results = scheduler.run(jobs)
+            if scanner is not None:
+                scanner.save()
+        except Exception as e:
+            self.build_events.put(('error', str(e)))
+            return
+        self.build_events.put(('done', results))
+
+    def poll_build_events(self, installer_name):
+        """
+        Show queued build events in the GUI until the build has finished.
+
+        Args:
+            installer_name (str): Name of the installer being built.
+        """
+        while True:
+            try:
+                kind, payload = self.build_events.get_nowait()
+            except queue.Empty:
+                break
+
+            if kind == 'output':
+                self.append_log(payload)
+            elif kind == 'job':
+                self.progress_bar.step(1)
+                status = "cached" if payload.cached else ("done" if payload.success else "failed")
+                self.append_log(f"{payload.job.installer_type} installer {status} in {payload.duration:.1f}s")
+            else:
+                self.show_build_result(kind, payload, installer_name)
+                return
+
+        self.root.after(self.BUILD_POLL_INTERVAL_MS, self.poll_build_events, installer_name)
+
+    def show_build_result(self, kind, payload, installer_name):
+        """
+        Show the outcome of a build and re-enable the controls.
+
+        Args:
+            kind (str): 'done' if the scheduler finished, 'error' if it raised.
+            payload: The list of BuildResults, or the error message.
+            installer_name (str): Name of the installer that was built.
+        """
+        self.create_installer_button.config(state=tk.NORMAL)
+        self.cancel_button.config(state=tk.DISABLED)
+
+        if kind == 'error':
+            self.result_label.config(text=f"Installer creation failed: {payload}")
+            return
+
+        if self.cancellation.cancelled:
+            self.result_label.config(text="Installer creation cancelled.")
+            return
 
         if self.create_shortcut.get():
             self.create_desktop_shortcut(installer_name)
 
+        failed_results = [result for result in payload if not result.success]
+        if failed_results:
+            self.result_label.config(text="\n".join(f"{result.job.installer_type} installer failed: {result.error}"
+                                                    for result in failed_results))
+            return
+
         self.result_label.config(text="Installer creation completed.")
 
+    def cancel_build(self):
+        """
+        Cancel the running build and terminate its compiler processes.
+        """
+        if self.cancellation is not None:
+            self.cancellation.cancel()
+            self.result_label.config(text="Cancelling...")
+
+    def append_log(self, line):
+        """
+        Append a line to the log pane, dropping the oldest lines once it grows too long.
+
+        Args:
+            line (str): The line to append.
+        """
+        self.log_text.config(state=tk.NORMAL)
+        self.log_text.insert(tk.END, line + "\n")
+        line_count = int(self.log_text.index('end-1c').split('.')[0])
+        if line_count > self.MAX_LOG_LINES:
+            self.log_text.delete('1.0', f"{line_count - self.MAX_LOG_LINES}.0")
+        self.log_text.see(tk.END)
+        self.log_text.config(state=tk.DISABLED)
+
+    def clear_log(self):
+        """
+        Remove every line from the log pane.
+        """
+        self.log_text.config(state=tk.NORMAL)
+        self.log_text.delete('1.0', tk.END)
+        self.log_text.config(state=tk.DISABLED)
+
     def create_desktop_shortcut(self, installer_name):
         """
         Create a desktop shortcut for the installer.
 
+        winshell is imported here rather than with the module, so the window opens without loading it.
+
         Args:
             installer_name (str): Name of the installer.
         """
+        import winshell
+
         output_directory = self.selected_output_directory.get()
 
         shortcut_path = os.path.join(winshell.desktop(), installer_name + '.lnk')
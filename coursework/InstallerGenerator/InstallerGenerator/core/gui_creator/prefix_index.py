@@ -0,0 +1,74 @@
+import os
+from bisect import bisect_left
+from typing import Iterable, List, Tuple
+
+
+class PrefixIndex:
+    """
+    An in-memory index for case-insensitive prefix search over file paths.
+
+    Every path is indexed twice, by its full relative path and by its file name, so typing
+    either 'bin/app' or 'app' finds 'bin/app.exe'. Keys are kept in a sorted list and a
+    search is two binary searches plus a slice, which keeps filtering interactive for
+    hundreds of thousands of paths.
+
+    Keys of newly added paths go into a second, smaller sorted list that is searched as well,
+    and are merged into the main list only once they make up a sizeable part of it. Filtering
+    while paths are still being loaded therefore does not sort every key again per batch.
+    """
+    MERGE_FRACTION: int = 4
+
+    def __init__(self):
+        """
+        Initialize an empty PrefixIndex.
+        """
+        self._paths: List[str] = []
+        self._keys: List[Tuple[str, int]] = []
+        self._new_keys: List[Tuple[str, int]] = []
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def add(self, paths: Iterable[str]) -> None:
+        """
+        Add paths to the index.
+
+        Args:
+            paths (Iterable[str]): Paths to add, in the order they should be listed.
+        """
+        new_keys = self._new_keys
+        for path in paths:
+            position = len(self._paths)
+            self._paths.append(path)
+            path_key = path.lower()
+            new_keys.append((path_key, position))
+            name_key = os.path.basename(path_key)
+            if name_key != path_key:
+                new_keys.append((name_key, position))
+        new_keys.sort()
+        if len(new_keys) * self.MERGE_FRACTION > len(self._keys):
+            # Both lists are sorted, so this sort merges two runs.
+            self._keys.extend(new_keys)
+            self._keys.sort()
+            self._new_keys = []
+
+    def search(self, prefix: str) -> List[str]:
+        """
+        Return the paths whose relative path or file name starts with the prefix.
+
+        Args:
+            prefix (str): The prefix to search for. An empty prefix matches every path.
+
+        Returns:
+            List[str]: Matching paths, in the order they were added.
+        """
+        if not prefix:
+            return list(self._paths)
+
+        prefix = prefix.lower()
+        positions = set()
+        for keys in (self._keys, self._new_keys):
+            start = bisect_left(keys, (prefix,))
+            end = bisect_left(keys, (prefix + '\uffff',), start)
+            positions.update(position for _, position in keys[start:end])
+        return [self._paths[position] for position in sorted(positions)]
@@ -0,0 +1,77 @@
+import hashlib
+import mmap
+import os
+from typing import Dict, Tuple
+
+_CHUNK_SIZE: int = 1024 * 1024
+MMAP_THRESHOLD: int = 16 * 1024 * 1024
+
+_compiler_fingerprints: Dict[Tuple[str, int, int], str] = {}
+
+
+def hash_bytes(data: bytes) -> str:
+    """
+    Compute the SHA-256 digest of a byte string.
+
+    Args:
+        data (bytes): The data to hash.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: str) -> str:
+    """
+    Compute the SHA-256 digest of a file's contents.
+
+    Files of at least MMAP_THRESHOLD bytes are memory-mapped and hashed in place, which
+    avoids copying them through a read buffer; smaller files are read in chunks.
+
+    Args:
+        path (str): Path of the file to hash.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size >= MMAP_THRESHOLD:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+                view = memoryview(mapped_file)
+                try:
+                    for start in range(0, len(view), _CHUNK_SIZE * 16):
+                        digest.update(view[start:start + _CHUNK_SIZE * 16])
+                finally:
+                    view.release()
+            return digest.hexdigest()
+        for chunk in iter(lambda: file.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def compiler_fingerprint(path: str) -> str:
+    """
+    Identify the version of a compiler executable.
+
+    The toolchains do not share a common way to report their version, so the executable
+    itself is hashed. The digest is cached per path, size and modification time, which
+    means an upgraded compiler is picked up without hashing it on every build.
+
+    Args:
+        path (str): Path of the compiler executable.
+
+    Returns:
+        str: A digest of the executable, or 'missing' if it does not exist.
+    """
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        return 'missing'
+    cache_key = (path, stat_result.st_size, stat_result.st_mtime_ns)
+    fingerprint = _compiler_fingerprints.get(cache_key)
+    if fingerprint is None:
+        fingerprint = hash_file(path)
+        _compiler_fingerprints[cache_key] = fingerprint
+    return fingerprint
@@ -0,0 +1,351 @@
+import argparse
+import datetime
+import json
+import re
+import sqlite3
+import sys
+import time
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from .base_config import log_database, log_max_rows, log_retention_days
+
+LEVELS: List[str] = ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']
+
+_DURATION_PATTERN = re.compile(r'(\d+(?:\.\d+)?)([smhd])$')
+_DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+class LogStore:
+    """
+    The ``logs`` table of the log database: schema, retention and queries.
+
+    Every record is stored with its formatted ``time``, its ``level`` and ``message``, its Unix
+    time ``created`` and the ``build_id`` of the build it belongs to, if any. Records are
+    indexed by time, by level and time, and by build, so filtered queries do not scan the
+    table. Databases written before these columns existed are migrated when opened, and the
+    Unix time of their records is derived from the formatted time.
+
+    Retention deletes records older than ``retention_days`` and the oldest records beyond
+    ``max_rows``, in small batches so the log writer is never locked out for long. The same
+    policy applies to the ``builds`` table of the build telemetry in the same database, and
+    the ``build_phases`` rows of every deleted build are deleted with it. The freed pages are
+    then returned to the file system with an incremental vacuum.
+
+    Attributes:
+        db (str): Path of the SQLite database.
+        retention_days (float): Age in days after which records and builds are deleted; 0 keeps them forever.
+        max_rows (int): Number of records, and of builds, kept at most; 0 for no limit.
+    """
+    DELETE_BATCH_SIZE: int = 5000
+    VACUUM_BATCH_PAGES: int = 1000
+
+    def __init__(self, db: str = log_database, retention_days: float = log_retention_days,
+                 max_rows: int = log_max_rows):
+        """
+        Initialize the LogStore, creating or migrating the ``logs`` table.
+
+        Args:
+            db (str): Path of the SQLite database.
+            retention_days (float): Age in days after which records and builds are deleted; 0 keeps them forever.
+            max_rows (int): Number of records, and of builds, kept at most; 0 for no limit.
+        """
+        self.db: str = db
+        self.retention_days: float = retention_days
+        self.max_rows: int = max_rows
+        conn = self.connect()
+        try:
+            self.create_schema(conn)
+        finally:
+            conn.close()
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        Open a connection to the database that waits for other writers instead of failing.
+
+        Returns:
+            sqlite3.Connection: The connection.
+        """
+        return sqlite3.connect(self.db, timeout=30.0)
+
+    @staticmethod
+    def create_schema(conn: sqlite3.Connection) -> None:
+        """
+        Create the ``logs`` table and its indexes, migrating a table of an older version.
+
+        Args:
+            conn (sqlite3.Connection): Connection to the database.
+        """
+        # Only takes effect on a new database; older ones are converted by reclaim_space().
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS logs (
+                time TEXT,
+                level TEXT,
+                message TEXT,
+                created REAL,
+                build_id TEXT
+            )
+        """)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(logs)")}
+        if 'created' not in columns:
+            conn.execute("ALTER TABLE logs ADD COLUMN created REAL")
+            # The formatted time is local time with milliseconds, e.g. '2024-05-01 12:00:00,123'.
+            conn.execute("UPDATE logs SET created = CAST(strftime('%s', substr(time, 1, 19), 'utc') AS REAL) "
+                         "+ COALESCE(CAST(substr(time, 21, 3) AS REAL) / 1000, 0)")
+        if 'build_id' not in columns:
+            conn.execute("ALTER TABLE logs ADD COLUMN build_id TEXT")
+        conn.executescript("""
+            CREATE INDEX IF NOT EXISTS idx_logs_created ON logs (created);
+            CREATE INDEX IF NOT EXISTS idx_logs_level_created ON logs (level, created);
+            CREATE INDEX IF NOT EXISTS idx_logs_build ON logs (build_id) WHERE build_id IS NOT NULL;
+        """)
+        conn.commit()
+
+    @staticmethod
+    def insert(conn: sqlite3.Connection, rows: Sequence[Tuple[str, str, str, float, Optional[str]]]) -> None:
+        """
+        Insert records in a single transaction.
+
+        Args:
+            conn (sqlite3.Connection): Connection to the database.
+            rows (Sequence[Tuple[str, str, str, float, Optional[str]]]): (time, level, message, created,
+                build_id) of every record.
+        """
+        conn.executemany("INSERT INTO logs (time, level, message, created, build_id) VALUES (?, ?, ?, ?, ?)", rows)
+        conn.commit()
+
+    def query(self, min_level: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None,
+              build_id: Optional[str] = None, contains: Optional[str] = None, limit: Optional[int] = 100,
+              newest_first: bool = True) -> List[dict]:
+        """
+        Find log records, using the indexes on time, level and build.
+
+        Args:
+            min_level (Optional[str]): Only records of this level or a more severe one.
+            since (Optional[float]): Only records created at or after this Unix time.
+            until (Optional[float]): Only records created before this Unix time.
+            build_id (Optional[str]): Only records of this build.
+            contains (Optional[str]): Only records whose message contains this text.
+            limit (Optional[int]): Maximum number of records, or None for all of them.
+            newest_first (bool): Return the newest records first instead of the oldest.
+
+        Returns:
+            List[dict]: The records with 'time', 'level', 'message', 'created' and 'build_id'.
+
+        Raises:
+            ValueError: If the level is unknown.
+        """
+        conditions: List[str] = []
+        parameters: List[object] = []
+        if min_level is not None:
+            if min_level.upper() not in LEVELS:
+                raise ValueError(f"Unknown log level '{min_level}'. Choose one of: {', '.join(LEVELS)}.")
+            levels = LEVELS[LEVELS.index(min_level.upper()):]
+            conditions.append(f"level IN ({', '.join('?' * len(levels))})")
+            parameters.extend(levels)
+        if since is not None:
+            conditions.append("created >= ?")
+            parameters.append(since)
+        if until is not None:
+            conditions.append("created < ?")
+            parameters.append(until)
+        if build_id is not None:
+            conditions.append("build_id = ?")
+            parameters.append(build_id)
+        if contains:
+            conditions.append("instr(message, ?) > 0")
+            parameters.append(contains)
+
+        query = "SELECT time, level, message, created, build_id FROM logs"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" ORDER BY created {'DESC' if newest_first else 'ASC'}"
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters.append(limit)
+
+        conn = self.connect()
+        try:
+            rows = conn.execute(query, parameters).fetchall()
+        finally:
+            conn.close()
+        return [{'time': row[0], 'level': row[1], 'message': row[2], 'created': row[3], 'build_id': row[4]}
+                for row in rows]
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """
+        Delete the log records and builds that are older than the retention period or beyond the row limit.
+
+        Args:
+            now (Optional[float]): The current Unix time, defaulting to time.time().
+
+        Returns:
+            int: The number of deleted log records, builds and build phases.
+        """
+        deleted = 0
+        conn = self.connect()
+        try:
+            tables = [('logs', 'created')]
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'builds'").fetchone():
+                tables.append(('builds', 'started_at'))
+            for table, created in tables:
+                if self.retention_days > 0:
+                    cutoff = (now if now is not None else time.time()) - self.retention_days * 86400
+                    deleted += self._delete_batches(
+                        conn, table, f"SELECT rowid FROM {table} WHERE {created} < ? ORDER BY rowid LIMIT ?", (cutoff,))
+                if self.max_rows > 0:
+                    # Rows are appended, so their rowids grow with their age; the newest max_rows
+                    # rows are the ones above the highest rowid minus max_rows.
+                    newest = conn.execute(f"SELECT MAX(rowid) FROM {table}").fetchone()[0] or 0
+                    deleted += self._delete_batches(
+                        conn, table, f"SELECT rowid FROM {table} WHERE rowid <= ? ORDER BY rowid LIMIT ?",
+                        (newest - self.max_rows,))
+        finally:
+            conn.close()
+        return deleted
+
+    def _delete_batches(self, conn: sqlite3.Connection, table: str, select: str, parameters: tuple) -> int:
+        """
+        Delete the rows of a table a query selects, committing every DELETE_BATCH_SIZE rows.
+
+        The phases of deleted builds are deleted in the same transaction.
+        """
+        deleted = 0
+        parameters += (self.DELETE_BATCH_SIZE,)
+        while True:
+            if table == 'builds':
+                deleted += conn.execute(f"DELETE FROM build_phases WHERE build_id IN "
+                                        f"(SELECT build_id FROM builds WHERE rowid IN ({select}))", parameters).rowcount
+            cursor = conn.execute(f"DELETE FROM {table} WHERE rowid IN ({select})", parameters)
+            conn.commit()
+            deleted += cursor.rowcount
+            if cursor.rowcount < self.DELETE_BATCH_SIZE:
+                return deleted
+
+    def reclaim_space(self, full: bool = False) -> int:
+        """
+        Return the pages freed by deleted records to the file system.
+
+        Databases created with incremental auto-vacuum are shrunk VACUUM_BATCH_PAGES pages at a
+        time, so the writer only waits for one small step. Older databases are converted with a
+        single full VACUUM once at least a quarter of their pages are free, or when ``full`` is set.
+
+        Args:
+            full (bool): Run a full VACUUM regardless of the auto-vacuum mode and free pages.
+
+        Returns:
+            int: The number of pages released.
+        """
+        conn = self.connect()
+        try:
+            free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+            incremental = conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+            if full or (not incremental and free_pages * 4 >= page_count and free_pages > self.VACUUM_BATCH_PAGES):
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                conn.execute("VACUUM")
+            elif incremental:
+                while free_pages:
+                    conn.execute(f"PRAGMA incremental_vacuum({self.VACUUM_BATCH_PAGES})").fetchall()
+                    remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                    if remaining >= free_pages:
+                        break
+                    free_pages = remaining
+            else:
+                return 0
+            return page_count - conn.execute("PRAGMA page_count").fetchone()[0]
+        finally:
+            conn.close()
+
+
+def parse_time(value: str, now: Optional[float] = None) -> float:
+    """
+    Parse a point in time given as an ISO date/time or as a duration before now, e.g. '90m', '2h' or '7d'.
+
+    Args:
+        value (str): The point in time.
+        now (Optional[float]): The current Unix time, defaulting to time.time().
+
+    Returns:
+        float: The Unix time.
+
+    Raises:
+        ValueError: If the value is neither a duration nor an ISO date/time.
+    """
+    match = _DURATION_PATTERN.match(value.strip())
+    if match is not None:
+        return (now if now is not None else time.time()) - float(match.group(1)) * _DURATION_UNITS[match.group(2)]
+    try:
+        return datetime.datetime.fromisoformat(value.strip()).timestamp()
+    except ValueError:
+        raise ValueError(f"'{value}' is neither a duration such as '2h' nor an ISO date/time.") from None
+
+
+def _print_records(records: Iterable[dict]) -> None:
+    for record in records:
+        build = f" [{record['build_id'][:8]}]" if record['build_id'] else ""
+        print(f"{record['time']} {record['level']:<8}{build} {record['message']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Query or maintain the log records of a log database.
+
+    Usage (from the InstallerGenerator directory):
+        python -m core.log_store query [--level ERROR] [--since 2h] [--until 2024-05-01T12:00] [--build ID]
+            [--grep TEXT] [--limit 100] [--oldest-first] [--json]
+        python -m core.log_store prune [--days 90] [--max-rows 1000000] [--vacuum]
+
+    Args:
+        argv (Optional[List[str]]): The arguments, defaulting to sys.argv.
+
+    Returns:
+        int: 0 on success, 2 if an argument is invalid.
+    """
+    parser = argparse.ArgumentParser(description="Query and maintain the installer log database.")
+    parser.add_argument("--db", default=log_database, help="Path of the log database.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    query_parser = commands.add_parser("query", help="Print log records.")
+    query_parser.add_argument("--level", choices=LEVELS, type=str.upper, help="Minimum level.")
+    query_parser.add_argument("--since", help="Start time: ISO date/time or a duration before now such as 2h or 7d.")
+    query_parser.add_argument("--until", help="End time: ISO date/time or a duration before now.")
+    query_parser.add_argument("--build", help="Only records of this build ID.")
+    query_parser.add_argument("--grep", help="Only records whose message contains this text.")
+    query_parser.add_argument("--limit", type=int, default=100, help="Maximum number of records; 0 for all.")
+    query_parser.add_argument("--oldest-first", action="store_true", help="Print the oldest records first.")
+    query_parser.add_argument("--json", action="store_true", help="Print the records as JSON.")
+
+    prune_parser = commands.add_parser("prune", help="Apply the retention policy now.")
+    prune_parser.add_argument("--days", type=float, default=log_retention_days,
+                              help="Delete records and builds older than this many days; 0 keeps them.")
+    prune_parser.add_argument("--max-rows", type=int, default=log_max_rows,
+                              help="Keep at most this many records and builds; 0 for no limit.")
+    prune_parser.add_argument("--vacuum", action="store_true", help="Run a full VACUUM afterwards.")
+    arguments = parser.parse_args(argv)
+
+    if arguments.command == "query":
+        try:
+            since = parse_time(arguments.since) if arguments.since else None
+            until = parse_time(arguments.until) if arguments.until else None
+        except ValueError as error:
+            print(error, file=sys.stderr)
+            return 2
+        records = LogStore(arguments.db).query(arguments.level, since, until, arguments.build, arguments.grep,
+                                               arguments.limit or None, newest_first=not arguments.oldest_first)
+        if arguments.json:
+            print(json.dumps(records, indent=2))
+        else:
+            _print_records(records)
+        return 0
+
+    store = LogStore(arguments.db, arguments.days, arguments.max_rows)
+    deleted = store.prune()
+    released = store.reclaim_space(full=arguments.vacuum)
+    print(f"Deleted {deleted} log records, builds and build phases and released {released} pages.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,52 +1,197 @@
 import logging
+import logging.handlers
+import queue
 import sqlite3
+import sys
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from .base_config import (log_database, log_file, log_file_backups, log_file_max_bytes, log_maintenance_interval,
+                          log_max_rows, log_retention_days)
+from .log_store import LogStore
 
 
 class SQLiteLogHandler(logging.Handler):
     """
     A custom logging handler that stores log records in a SQLite database.
 
-    :param db: Path to the SQLite database file (default: '.\\installer_logs.db')
+    Records are not written on the calling thread. ``emit`` only formats the record and puts it
+    on a queue; a background writer thread owns the SQLite connection and inserts the queued
+    records in batches with ``executemany``, committing once per batch. A batch is written as
+    soon as ``batch_size`` records are pending or ``flush_interval`` seconds after its first
+    record, and pending records are written on ``flush`` and ``close``. The database runs in
+    WAL mode, so readers do not block the writer.
+
+    Records are stored with their Unix time and the ``build_id`` passed in the ``extra`` of
+    the logging call, if any (see core.log_store for the schema and queries). Every
+    ``maintenance_interval`` seconds a third thread applies the retention policy and
+    releases the freed pages, so neither ``emit`` nor the writer waits for it.
+
+    :param db: Path to the SQLite database file (default: INSTALLER_LOG_DATABASE)
     :type db: str
+    :param batch_size: Number of records written per transaction at most.
+    :type batch_size: int
+    :param flush_interval: Maximum number of seconds a record waits before it is written.
+    :type flush_interval: float
+    :param max_queue_size: Number of pending records after which ``emit`` blocks.
+    :type max_queue_size: int
+    :param retention_days: Age in days after which records are deleted; 0 keeps them forever.
+    :type retention_days: float
+    :param max_rows: Number of records kept at most; 0 for no limit.
+    :type max_rows: int
+    :param maintenance_interval: Seconds between two retention runs; 0 disables them.
+    :type maintenance_interval: float
     """
-    def __init__(self, db: str = r'.\installer_logs.db'):
+    _STOP = object()
+
+    def __init__(self, db: str = log_database, batch_size: int = 500, flush_interval: float = 1.0,
+                 max_queue_size: int = 100000, retention_days: float = log_retention_days,
+                 max_rows: int = log_max_rows, maintenance_interval: float = log_maintenance_interval):
         """
-        Initialize the SQLiteLogHandler.
+        Initialize the SQLiteLogHandler and start its writer and maintenance threads.
 
-        :param db: Path to the SQLite database file (default: '.\\installer_logs.db')
+        :param db: Path to the SQLite database file (default: INSTALLER_LOG_DATABASE)
         :type db: str
+        :param batch_size: Number of records written per transaction at most.
+        :type batch_size: int
+        :param flush_interval: Maximum number of seconds a record waits before it is written.
+        :type flush_interval: float
+        :param max_queue_size: Number of pending records after which ``emit`` blocks.
+        :type max_queue_size: int
+        :param retention_days: Age in days after which records are deleted; 0 keeps them forever.
+        :type retention_days: float
+        :param max_rows: Number of records kept at most; 0 for no limit.
+        :type max_rows: int
+        :param maintenance_interval: Seconds between two retention runs; 0 disables them.
+        :type maintenance_interval: float
         """
         super().__init__()
         self.db: str = db
-        self.conn: sqlite3.Connection = sqlite3.connect(self.db)
-        self.cur: sqlite3.Cursor = self.conn.cursor()
-        self.cur.execute("""
-            CREATE TABLE IF NOT EXISTS logs (
-                time TEXT,
-                level TEXT,
-                message TEXT
-            )
-        """)
-        self.conn.commit()
+        self.batch_size: int = batch_size
+        self.flush_interval: float = flush_interval
+        self.maintenance_interval: float = maintenance_interval
+        self.store: LogStore = LogStore(db, retention_days, max_rows)
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._closed: bool = False
+        self._stop_maintenance: threading.Event = threading.Event()
+
+        self._writer: threading.Thread = threading.Thread(target=self._write_records, name="SQLiteLogHandler",
+                                                          daemon=True)
+        self._writer.start()
+        if maintenance_interval > 0 and (retention_days > 0 or max_rows > 0):
+            threading.Thread(target=self._maintain, name="SQLiteLogHandler maintenance", daemon=True).start()
 
     def emit(self, record: logging.LogRecord) -> None:
         """
-        Emit a log record by inserting it into the SQLite database.
+        Queue a log record for insertion into the SQLite database.
 
         :param record: The log record to be emitted.
         :type record: logging.LogRecord
         """
-        log_entry: str = self.format(record)
-        self.cur.execute("INSERT INTO logs (time, level, message) VALUES (?, ?, ?)",
-                         (record.asctime, record.levelname, log_entry))
-        self.conn.commit()
+        if self._closed:
+            return
+        try:
+            log_entry: str = self.format(record)
+            log_time: str = getattr(record, 'asctime', None) or logging.Formatter().formatTime(record)
+            self._queue.put((log_time, record.levelname, log_entry, record.created,
+                             getattr(record, 'build_id', None)))
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        """
+        Block until every record queued so far has been written to the database.
+        """
+        if self._closed or not self._writer.is_alive():
+            return
+        flushed = threading.Event()
+        self._queue.put(flushed)
+        flushed.wait(timeout=max(self.flush_interval, 1.0) * 10)
+
+    def close(self) -> None:
+        """
+        Write the pending records, stop the writer thread and close the handler.
+        """
+        if not self._closed:
+            self._closed = True
+            self._stop_maintenance.set()
+            if self._writer.is_alive():
+                self._queue.put(self._STOP)
+                self._writer.join()
+        super().close()
+
+    def _write_records(self) -> None:
+        """
+        Write queued records in batches. Runs on the writer thread, which owns the connection.
+        """
+        conn = self.store.connect()
+        conn.execute("PRAGMA synchronous=NORMAL")
+        batch: List[Tuple[str, str, str, float, Optional[str]]] = []
+        deadline: Optional[float] = None
+        try:
+            while True:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+
+                if isinstance(item, tuple):
+                    batch.append(item)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+                    if len(batch) < self.batch_size:
+                        continue
+
+                if batch:
+                    self._insert(conn, batch)
+                    batch = []
+                deadline = None
+
+                if isinstance(item, threading.Event):
+                    item.set()
+                elif item is self._STOP:
+                    return
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, batch: List[Tuple[str, str, str, float, Optional[str]]]) -> None:
+        """
+        Insert a batch of records in a single transaction.
+        """
+        try:
+            LogStore.insert(conn, batch)
+        except sqlite3.Error as e:
+            sys.stderr.write(f"SQLiteLogHandler: could not write {len(batch)} log records - {e}\n")
+
+    def _maintain(self) -> None:
+        """
+        Apply the retention policy and release free pages periodically. Runs on the maintenance thread.
+        """
+        while not self._stop_maintenance.is_set():
+            try:
+                self.store.prune()
+                self.store.reclaim_space()
+            except sqlite3.Error as e:
+                sys.stderr.write(f"SQLiteLogHandler: log maintenance failed - {e}\n")
+            self._stop_maintenance.wait(self.maintenance_interval)
+
+
+_logging_configured: bool = False
+_logging_lock: threading.Lock = threading.Lock()
+
 
 def setup_logging() -> None:
     """
-    Configure the logging system to use a SQLiteLogHandler and save logs to a file.
+    Configure the logging system to use a SQLiteLogHandler and save logs to a rotating file.
 
-    This function sets up the logging system to store logs in a file named 'installer_creator.log' and
-    also adds the SQLiteLogHandler to store logs in an SQLite database.
+    This function sets up the logging system to store logs in INSTALLER_LOG_FILE ('installer_creator.log'),
+    which is rotated once it reaches INSTALLER_LOG_FILE_MAX_BYTES with INSTALLER_LOG_FILE_BACKUPS old
+    files kept, and also adds the SQLiteLogHandler to store logs in an SQLite database. Nothing is
+    configured at import time; the first call sets the handlers up and later calls do nothing, so it
+    can be called wherever logging is first used.
 
     Usage:
     ```
@@ -57,10 +202,19 @@ def setup_logging() -> None:
 
     :return: None
     """
-    logging.basicConfig(filename='.\installer_creator.log', level=logging.INFO,
-                        format='%(asctime)s - %(levelname)s - %(message)s')
-    sqlite_handler: SQLiteLogHandler = SQLiteLogHandler()
-    sqlite_handler.setLevel(logging.INFO)
-    formatter: logging.Formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    sqlite_handler.setFormatter(formatter)
-    logging.getLogger().addHandler(sqlite_handler)
+    global _logging_configured
+    with _logging_lock:
+        if _logging_configured:
+            return
+        _logging_configured = True
+        formatter: logging.Formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+        root_logger = logging.getLogger()
+        root_logger.setLevel(logging.INFO)
+        file_handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=log_file_max_bytes,
+                                                            backupCount=log_file_backups, encoding='utf-8')
+        file_handler.setFormatter(formatter)
+        root_logger.addHandler(file_handler)
+        sqlite_handler: SQLiteLogHandler = SQLiteLogHandler()
+        sqlite_handler.setLevel(logging.INFO)
+        sqlite_handler.setFormatter(formatter)
+        root_logger.addHandler(sqlite_handler)
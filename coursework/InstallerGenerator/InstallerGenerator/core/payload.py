@@ -0,0 +1,82 @@
+import hashlib
+from typing import Dict, Iterable, List, Tuple
+
+from .base_config import payload_share_min_bytes
+from .preflight import run_preflight
+from .profiles import get_profile
+
+SHARED_PAYLOAD_TYPES: List[str] = ['MSI']
+
+
+def plan_shared_payloads(jobs: Iterable['BuildJob'], min_size: int = payload_share_min_bytes) -> Dict[str, int]:
+    """
+    Find the large files that several installers of a batch ship with identical contents.
+
+    A file is shared when at least two MSI jobs with the same build profile include it under
+    the same relative path with the same contents and it is at least ``min_size`` bytes large. Each job's shared files are
+    stored in ``job.shared_files``; the MSI creator packs them into a content-named cabinet
+    that is compressed once and reused from the build cache by every other installer. The
+    pre-flight report made while hashing a job's files is kept in ``job.preflight_report``,
+    so its creator does not check and hash them a second time.
+
+    EXE jobs take part in the report only: Inno Setup compresses every file into its own
+    archive, so their ``shared_files`` stay empty.
+
+    Args:
+        jobs (Iterable[BuildJob]): The jobs of the batch.
+        min_size (int): Smallest file size worth sharing, in bytes.
+
+    Returns:
+        Dict[str, int]: 'shared_files' (distinct shared files) and 'shared_bytes' (bytes that only need
+            to be compressed once instead of once per installer).
+    """
+    contents_by_job: List[Tuple['BuildJob', str, Dict[str, Tuple[str, int]]]] = []
+    installers_by_content: Dict[Tuple[str, str, str], int] = {}
+    for job in jobs:
+        if job.installer_type not in SHARED_PAYLOAD_TYPES or not job.file_list:
+            continue
+        try:
+            profile = get_profile(job.profile).name
+            report = run_preflight(job.source_directory, job.file_list, job.manifest)
+        except ValueError:
+            continue
+        job.preflight_report = report
+        contents = {path: (checked.content_hash, checked.size) for path, checked in report.files.items()
+                    if checked.size >= min_size}
+        contents_by_job.append((job, profile, contents))
+        for path, (content_hash, _) in contents.items():
+            key = (profile, path, content_hash)
+            installers_by_content[key] = installers_by_content.get(key, 0) + 1
+
+    shared_sizes: Dict[Tuple[str, str, str], int] = {}
+    for job, profile, contents in contents_by_job:
+        job.shared_files = sorted(path for path, (content_hash, size) in contents.items()
+                                  if installers_by_content[(profile, path, content_hash)] > 1)
+        for path in job.shared_files:
+            content_hash, size = contents[path]
+            shared_sizes[(profile, path, content_hash)] = size
+
+    return {
+        'shared_files': len(shared_sizes),
+        'shared_bytes': sum(size * (installers_by_content[key] - 1) for key, size in shared_sizes.items()),
+    }
+
+
+def cabinet_name(members: Iterable[Tuple[str, str]], compression: str = "") -> str:
+    """
+    Return the content-derived name of a cabinet holding the given files.
+
+    Two installers that pack the same files with the same contents and compression produce
+    the same name, so a cabinet found under that name can be reused as is.
+
+    Args:
+        members (Iterable[Tuple[str, str]]): (file ID, content digest) of every file in the cabinet.
+        compression (str): Identifier of the compression settings.
+
+    Returns:
+        str: The cabinet file name.
+    """
+    digest = hashlib.sha256(compression.encode('utf-8'))
+    for file_id, content_hash in sorted(members):
+        digest.update(f"\0{file_id}\0{content_hash}".encode('utf-8'))
+    return f"payload_{digest.hexdigest()[:16]}.cab"
@@ -0,0 +1,264 @@
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from .hashing import hash_file
+from .scanner import FileManifest
+
+
+class PreflightIssue:
+    """
+    A problem with one input file found by the pre-flight check.
+
+    Attributes:
+        path (str): Path of the file relative to the source directory.
+        kind (str): 'missing', 'not_a_file' or 'unreadable'.
+        message (str): Description of the problem.
+    """
+    __slots__ = ('path', 'kind', 'message')
+
+    def __init__(self, path: str, kind: str, message: str):
+        """
+        Initialize the PreflightIssue.
+
+        Args:
+            path (str): Path of the file relative to the source directory.
+            kind (str): 'missing', 'not_a_file' or 'unreadable'.
+            message (str): Description of the problem.
+        """
+        self.path: str = path
+        self.kind: str = kind
+        self.message: str = message
+
+    def to_dict(self) -> dict:
+        return {'path': self.path, 'kind': self.kind, 'message': self.message}
+
+    def __repr__(self) -> str:
+        return f"PreflightIssue({self.path!r}, {self.kind!r})"
+
+
+class CheckedFile:
+    """
+    An input file that passed the pre-flight check.
+
+    Attributes:
+        path (str): Path of the file relative to the source directory.
+        size (int): Size of the file in bytes.
+        mtime_ns (int): Modification time of the file in nanoseconds.
+        content_hash (Optional[str]): SHA-256 digest of the file, once it has been hashed.
+    """
+    __slots__ = ('path', 'size', 'mtime_ns', 'content_hash')
+
+    def __init__(self, path: str, size: int, mtime_ns: int, content_hash: Optional[str] = None):
+        """
+        Initialize the CheckedFile.
+
+        Args:
+            path (str): Path of the file relative to the source directory.
+            size (int): Size of the file in bytes.
+            mtime_ns (int): Modification time of the file in nanoseconds.
+            content_hash (Optional[str]): SHA-256 digest of the file, if known.
+        """
+        self.path: str = path
+        self.size: int = size
+        self.mtime_ns: int = mtime_ns
+        self.content_hash: Optional[str] = content_hash
+
+
+class PreflightReport:
+    """
+    The outcome of checking every input file of a build.
+
+    Attributes:
+        files (Dict[str, CheckedFile]): The files that passed, keyed by relative path.
+        issues (List[PreflightIssue]): Problems that prevent the build.
+        duplicates (List[List[str]]): Groups of files with identical contents.
+    """
+
+    def __init__(self, files: Dict[str, CheckedFile], issues: List[PreflightIssue],
+                 duplicates: Optional[List[List[str]]] = None):
+        """
+        Initialize the PreflightReport.
+
+        Args:
+            files (Dict[str, CheckedFile]): The files that passed, keyed by relative path.
+            issues (List[PreflightIssue]): Problems that prevent the build.
+            duplicates (Optional[List[List[str]]]): Groups of files with identical contents.
+        """
+        self.files: Dict[str, CheckedFile] = files
+        self.issues: List[PreflightIssue] = issues
+        self.duplicates: List[List[str]] = duplicates or []
+
+    @property
+    def ok(self) -> bool:
+        """
+        Whether every input file can be built.
+        """
+        return not self.issues
+
+    def file_hashes(self) -> Dict[str, str]:
+        """
+        Return the content digests of the checked files, for reuse by later build stages.
+
+        Returns:
+            Dict[str, str]: Content digests keyed by relative path.
+        """
+        return {path: checked.content_hash for path, checked in self.files.items()
+                if checked.content_hash is not None}
+
+    def total_size(self) -> int:
+        """
+        Return the total size of the checked files.
+
+        Returns:
+            int: Size in bytes.
+        """
+        return sum(checked.size for checked in self.files.values())
+
+    def duplicate_bytes(self) -> int:
+        """
+        Return the number of bytes taken up by the second and later copies of duplicated files.
+
+        Returns:
+            int: Size in bytes.
+        """
+        return sum(self.files[group[0]].size * (len(group) - 1) for group in self.duplicates)
+
+    def to_dict(self) -> dict:
+        """
+        Convert the report into a JSON-serializable dictionary.
+
+        Returns:
+            dict: The report as plain data, without the per-file details.
+        """
+        return {
+            'ok': self.ok,
+            'checked_files': len(self.files),
+            'total_bytes': self.total_size(),
+            'issues': [issue.to_dict() for issue in self.issues],
+            'duplicates': self.duplicates,
+            'duplicate_bytes': self.duplicate_bytes(),
+        }
+
+
+class PreflightError(ValueError):
+    """
+    Raised when input files of a build are missing or unreadable.
+
+    Attributes:
+        report (PreflightReport): The report listing every problem.
+    """
+    MAX_LISTED_ISSUES: int = 10
+
+    def __init__(self, report: PreflightReport):
+        """
+        Initialize the PreflightError.
+
+        Args:
+            report (PreflightReport): The report listing every problem.
+        """
+        self.report: PreflightReport = report
+        lines = [f"Pre-flight check failed for {len(report.issues)} file(s):"]
+        lines.extend(f"  {issue.kind}: {issue.path} ({issue.message})"
+                     for issue in report.issues[:self.MAX_LISTED_ISSUES])
+        if len(report.issues) > self.MAX_LISTED_ISSUES:
+            lines.append(f"  ... and {len(report.issues) - self.MAX_LISTED_ISSUES} more")
+        super().__init__("\n".join(lines))
+
+
+def run_preflight(source_directory: str, file_list: List[str], manifest: Optional[FileManifest] = None,
+                  max_workers: Optional[int] = None) -> PreflightReport:
+    """
+    Check that every input file of a build exists and is readable, then hash it.
+
+    Files are stat'ed in parallel first, and the check fails before any file is hashed if
+    one of them is missing or unreadable. The remaining files are hashed in parallel; digests
+    the manifest holds for unchanged files are reused, and new digests are recorded in the
+    manifest so the next scan and the build cache do not read the files again.
+
+    Args:
+        source_directory (str): Directory containing the source files.
+        file_list (List[str]): Files included in the installer, relative to the source directory.
+        manifest (Optional[FileManifest]): Scanned manifest of the source directory.
+        max_workers (Optional[int]): Number of worker threads. Defaults to ThreadPoolExecutor's default.
+
+    Returns:
+        PreflightReport: The report of a successful check, including duplicate contents.
+
+    Raises:
+        PreflightError: If any file is missing, not a regular file or unreadable.
+    """
+    entries = manifest.entries() if manifest is not None and manifest.root == source_directory else {}
+    unique_files = list(dict.fromkeys(file_list))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        stat_results = list(executor.map(lambda file: _stat_file(source_directory, file), unique_files))
+        issues = [result for result in stat_results if isinstance(result, PreflightIssue)]
+        if issues:
+            raise PreflightError(PreflightReport({}, issues))
+
+        files = {checked.path: checked for checked in stat_results}
+        for checked in files.values():
+            entry = entries.get(checked.path)
+            if entry is not None:
+                checked.content_hash = entry.known_hash(checked.size, checked.mtime_ns)
+
+        to_hash = [checked for checked in files.values() if checked.content_hash is None]
+        hash_results = list(executor.map(lambda checked: _hash_file(source_directory, checked), to_hash))
+
+    issues = [result for result in hash_results if isinstance(result, PreflightIssue)]
+    if issues:
+        raise PreflightError(PreflightReport(files, issues))
+
+    for checked in to_hash:
+        entry = entries.get(checked.path)
+        if entry is not None:
+            entry.record_hash(checked.size, checked.mtime_ns, checked.content_hash)
+
+    return PreflightReport(files, [], find_duplicates(files))
+
+
+def find_duplicates(files: Dict[str, CheckedFile]) -> List[List[str]]:
+    """
+    Group the files with identical contents.
+
+    Args:
+        files (Dict[str, CheckedFile]): Hashed files, keyed by relative path.
+
+    Returns:
+        List[List[str]]: Sorted groups of two or more paths with the same digest.
+    """
+    by_content: Dict[Tuple[int, str], List[str]] = {}
+    for checked in files.values():
+        by_content.setdefault((checked.size, checked.content_hash), []).append(checked.path)
+    return sorted(sorted(paths) for paths in by_content.values() if len(paths) > 1)
+
+
+def _stat_file(source_directory: str, file: str):
+    """
+    Stat one input file, returning a CheckedFile or the PreflightIssue that prevents its use.
+    """
+    path = os.path.join(source_directory, file)
+    try:
+        stat_result = os.stat(path)
+    except FileNotFoundError:
+        return PreflightIssue(file, 'missing', "file does not exist")
+    except OSError as error:
+        return PreflightIssue(file, 'unreadable', error.strerror or str(error))
+    if not stat.S_ISREG(stat_result.st_mode):
+        return PreflightIssue(file, 'not_a_file', "not a regular file")
+    if not os.access(path, os.R_OK):
+        return PreflightIssue(file, 'unreadable', "permission denied")
+    return CheckedFile(file, stat_result.st_size, stat_result.st_mtime_ns)
+
+
+def _hash_file(source_directory: str, checked: CheckedFile):
+    """
+    Hash one input file, returning None or the PreflightIssue raised while reading it.
+    """
+    try:
+        checked.content_hash = hash_file(os.path.join(source_directory, checked.path))
+    except OSError as error:
+        return PreflightIssue(checked.path, 'unreadable', error.strerror or str(error))
+    return None
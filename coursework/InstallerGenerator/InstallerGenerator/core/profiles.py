@@ -0,0 +1,102 @@
+from typing import Dict, List, Optional
+
+from .base_config import build_profile
+
+
+class BuildProfile:
+    """
+    Named compression settings for both toolchains.
+
+    Attributes:
+        name (str): Identifier of the profile.
+        description (str): What the profile is meant for.
+        inno_compression (str): Value of the Inno Setup ``Compression`` directive.
+        inno_solid_compression (bool): Whether Inno Setup compresses all files as one solid block.
+        wix_compression_level (str): ``CompressionLevel`` of the WiX cabinets (none, low, medium, high or mszip).
+        files_per_cabinet (int): Number of files per WiX cabinet, or 0 to put every file into one cabinet.
+    """
+    __slots__ = ('name', 'description', 'inno_compression', 'inno_solid_compression', 'wix_compression_level',
+                 'files_per_cabinet')
+
+    def __init__(self, name: str, description: str, inno_compression: str, inno_solid_compression: bool,
+                 wix_compression_level: str, files_per_cabinet: int = 0):
+        """
+        Initialize the BuildProfile.
+
+        Args:
+            name (str): Identifier of the profile.
+            description (str): What the profile is meant for.
+            inno_compression (str): Value of the Inno Setup ``Compression`` directive.
+            inno_solid_compression (bool): Whether Inno Setup compresses all files as one solid block.
+            wix_compression_level (str): ``CompressionLevel`` of the WiX cabinets.
+            files_per_cabinet (int): Number of files per WiX cabinet, or 0 for a single cabinet.
+        """
+        self.name: str = name
+        self.description: str = description
+        self.inno_compression: str = inno_compression
+        self.inno_solid_compression: bool = inno_solid_compression
+        self.wix_compression_level: str = wix_compression_level
+        self.files_per_cabinet: int = files_per_cabinet
+
+    def compression_id(self) -> str:
+        """
+        Return an identifier of the WiX compression settings, used to name shared cabinets.
+
+        Returns:
+            str: The identifier.
+        """
+        return f"{self.wix_compression_level}:{self.files_per_cabinet}"
+
+    def to_dict(self) -> dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"BuildProfile({self.name!r})"
+
+
+PROFILES: Dict[str, BuildProfile] = {
+    'fast': BuildProfile(
+        'fast', "Development builds: quick to compile, larger installers.",
+        inno_compression='zip/1', inno_solid_compression=False,
+        wix_compression_level='mszip', files_per_cabinet=500),
+    'balanced': BuildProfile(
+        'balanced', "Test and nightly builds: good compression at a moderate compile time.",
+        inno_compression='lzma2/fast', inno_solid_compression=False,
+        wix_compression_level='medium', files_per_cabinet=2000),
+    'release': BuildProfile(
+        'release', "Shipped builds: smallest installers, slowest to compile.",
+        inno_compression='lzma', inno_solid_compression=True,
+        wix_compression_level='high', files_per_cabinet=0),
+}
+
+PROFILE_ALIASES: Dict[str, str] = {'dev': 'fast'}
+
+
+def profile_names() -> List[str]:
+    """
+    Return the names of the build profiles, including aliases.
+
+    Returns:
+        List[str]: The profile names.
+    """
+    return list(PROFILES) + list(PROFILE_ALIASES)
+
+
+def get_profile(name: Optional[str] = None) -> BuildProfile:
+    """
+    Look up a build profile by name or alias.
+
+    Args:
+        name (Optional[str]): Name of the profile, defaulting to INSTALLER_BUILD_PROFILE ('release').
+
+    Returns:
+        BuildProfile: The profile.
+
+    Raises:
+        ValueError: If there is no profile with that name.
+    """
+    name = (name or build_profile).lower()
+    profile = PROFILES.get(PROFILE_ALIASES.get(name, name))
+    if profile is None:
+        raise ValueError(f"Unknown build profile '{name}'. Choose one of: {', '.join(profile_names())}.")
+    return profile
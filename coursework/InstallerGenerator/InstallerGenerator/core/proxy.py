@@ -1,9 +1,11 @@
+import asyncio
 import logging
-from typing import Any
+from typing import Any, Dict, List, Optional
 from .creators.abc_creator import InstallerCreator
+from .creators.build_step import BuildStep
 from .logging_config import setup_logging
+from .telemetry import BuildRecorder, BuildTelemetry, default_telemetry
 
-setup_logging()
 logger = logging.getLogger(__name__)
 
 class InstallerCreatorProxy(InstallerCreator):
@@ -11,18 +13,53 @@ class InstallerCreatorProxy(InstallerCreator):
     A proxy class for creating installers, allowing for additional functionality.
 
     This class acts as a proxy for creating installers, enabling the logging of creation events and handling errors.
+    Every build is also recorded in the build telemetry under its own build ID, with the
+    duration of each phase, the size of its input and output and its outcome.
     """
 
-    def __init__(self, real_creator: InstallerCreator, installer_type: str):
+    def __init__(self, real_creator: InstallerCreator, installer_type: str,
+                 telemetry: Optional[BuildTelemetry] = None):
         """
         Initialize the InstallerCreatorProxy.
 
         Args:
             real_creator (InstallerCreator): The real installer creator to delegate the creation to.
             installer_type (str): The type of installer being created (e.g., 'MSI' or 'EXE').
+            telemetry (Optional[BuildTelemetry]): Store the build is recorded in. Defaults to the shared store.
         """
         self._real_creator = real_creator
         self._installer_type = installer_type
+        self._telemetry_store = telemetry
+        self.installer_type = installer_type
+
+    @property
+    def build_id(self) -> Optional[str]:
+        """
+        The ID of the build in the telemetry, once the build has started.
+        """
+        return self.telemetry.build_id if self.telemetry is not None else None
+
+    def _start_build(self) -> BuildRecorder:
+        """
+        Start recording a new build and log its start.
+        """
+        setup_logging()
+        telemetry = self._telemetry_store or default_telemetry()
+        recorder = telemetry.start_build(self._installer_type, getattr(self._real_creator, 'installer_name', ''))
+        self.telemetry = recorder
+        self._real_creator.telemetry = recorder
+        logging.info(f"Proxy: Starting to create {self._installer_type} installer (build {recorder.build_id}).",
+                     extra={'build_id': recorder.build_id})
+        return recorder
+
+    def _fail(self, error: Any) -> None:
+        """
+        Record the build as failed and log the error.
+        """
+        logging.error(f"Proxy: Error occurred while creating {self._installer_type} installer "
+                      f"(build {self.build_id}) - {error}", extra={'build_id': self.build_id})
+        if self.telemetry is not None:
+            self.telemetry.finish('failed')
 
     def create_installer(self) -> Any:
         """
@@ -36,12 +73,110 @@ class InstallerCreatorProxy(InstallerCreator):
         Raises:
             Exception: If an error occurs during the installer creation process.
         """
-        logging.info(f"Proxy: Starting to create {self._installer_type} installer.")
+        recorder = self._start_build()
 
         try:
             result = self._real_creator.create_installer()
-            logging.info(f"Proxy: {self._installer_type} installer created successfully.")
+        except Exception as e:
+            self._fail(e)
+            raise
+        return self._record_result(recorder, result)
+
+    async def acreate_installer(self, timeout: Optional[float] = None) -> Any:
+        """
+        Create the installer without blocking the event loop and log creation events.
+
+        Args:
+            timeout (Optional[float]): Seconds each compiler step may run.
+
+        Returns:
+            Any: The result of the installer creation process.
+
+        Raises:
+            asyncio.CancelledError: If the awaiting task is cancelled; the build is recorded as cancelled.
+            Exception: If an error occurs during the installer creation process.
+        """
+        recorder = self._start_build()
+
+        try:
+            result = await self._real_creator.acreate_installer(timeout)
+        except asyncio.CancelledError:
+            recorder.finish('cancelled')
+            logging.info(f"Proxy: {self._installer_type} installer build {recorder.build_id} was cancelled.",
+                         extra={'build_id': recorder.build_id})
+            raise
+        except Exception as e:
+            self._fail(e)
+            raise
+        return self._record_result(recorder, result)
+
+    def _record_result(self, recorder: BuildRecorder, result: Any) -> Any:
+        """
+        Record and log the outcome of a finished creation.
+        """
+        if result is False:
+            recorder.finish('failed')
+            logging.error(f"Proxy: {self._installer_type} installer was not created (build {recorder.build_id}).",
+                          extra={'build_id': recorder.build_id})
             return result
+        recorder.finish('cached' if recorder.cached else 'success', self._real_creator.output_path())
+        logging.info(f"Proxy: {self._installer_type} installer created successfully (build {recorder.build_id}).",
+                     extra={'build_id': recorder.build_id})
+        return result
+
+    def output_path(self) -> str:
+        """
+        Return the path of the installer produced by the real creator.
+
+        Returns:
+            str: Path of the installer file.
+        """
+        return self._real_creator.output_path()
+
+    def payload_report(self) -> Dict[str, int]:
+        """
+        Return the shared payload statistics of the real creator.
+
+        Returns:
+            Dict[str, int]: Shared files, shared bytes and bytes saved.
+        """
+        return self._real_creator.payload_report()
+
+    def prepare_build(self) -> List[BuildStep]:
+        """
+        Prepare a build through the real creator and log the start of the creation.
+
+        Returns:
+            List[BuildStep]: The compiler steps of the build.
+
+        Raises:
+            ValueError: If the real creator is not configured correctly.
+        """
+        self._start_build()
+
+        try:
+            return self._real_creator.prepare_build()
         except Exception as e:
-            logging.error(f"Proxy: Error occurred while creating {self._installer_type} installer - {e}")
+            self._fail(e)
             raise
+
+    def fail_build(self, error: str) -> None:
+        """
+        Record a build whose steps failed or could not be run.
+
+        Args:
+            error (str): Description of the failure.
+        """
+        self._real_creator.fail_build(error)
+        if self.telemetry is not None and not self.telemetry.finished:
+            self._fail(error)
+
+    def finish_build(self) -> None:
+        """
+        Finish a build through the real creator and log the successful creation.
+        """
+        self._real_creator.finish_build()
+        if self.telemetry is not None:
+            self.telemetry.finish('cached' if self.telemetry.cached else 'success', self.output_path())
+        logging.info(f"Proxy: {self._installer_type} installer created successfully (build {self.build_id}).",
+                     extra={'build_id': self.build_id})
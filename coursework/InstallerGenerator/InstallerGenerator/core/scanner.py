@@ -0,0 +1,387 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from .hashing import hash_file
+
+
+class ManifestEntry:
+    """
+    A file recorded in a FileManifest.
+
+    Attributes:
+        path (str): Path of the file relative to the manifest root.
+        size (int): Size of the file in bytes.
+        mtime_ns (int): Modification time of the file in nanoseconds.
+    """
+    __slots__ = ('path', 'size', 'mtime_ns', '_content_hash')
+
+    def __init__(self, path: str, size: int, mtime_ns: int, content_hash: Optional[str] = None):
+        """
+        Initialize the ManifestEntry.
+
+        Args:
+            path (str): Path of the file relative to the manifest root.
+            size (int): Size of the file in bytes.
+            mtime_ns (int): Modification time of the file in nanoseconds.
+            content_hash (Optional[str]): Previously computed content digest, if known.
+        """
+        self.path: str = path
+        self.size: int = size
+        self.mtime_ns: int = mtime_ns
+        self._content_hash: Optional[str] = content_hash
+
+    def content_hash(self, root: str) -> str:
+        """
+        Return the content digest of the file, hashing it on first use.
+
+        Args:
+            root (str): The manifest root the entry path is relative to.
+
+        Returns:
+            str: The SHA-256 digest of the file.
+        """
+        if self._content_hash is None:
+            self._content_hash = hash_file(os.path.join(root, self.path))
+        return self._content_hash
+
+    def known_hash(self, size: int, mtime_ns: int) -> Optional[str]:
+        """
+        Return the recorded content digest if the file still has the recorded size and modification time.
+
+        Args:
+            size (int): Current size of the file.
+            mtime_ns (int): Current modification time of the file.
+
+        Returns:
+            Optional[str]: The digest, or None if it is unknown or out of date.
+        """
+        if size != self.size or mtime_ns != self.mtime_ns:
+            return None
+        return self._content_hash
+
+    def record_hash(self, size: int, mtime_ns: int, content_hash: str) -> None:
+        """
+        Record a digest computed elsewhere together with the file state it belongs to.
+
+        Args:
+            size (int): Size of the file when it was hashed.
+            mtime_ns (int): Modification time of the file when it was hashed.
+            content_hash (str): The SHA-256 digest of the file.
+        """
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self._content_hash = content_hash
+
+    def __repr__(self) -> str:
+        return f"ManifestEntry({self.path!r}, size={self.size!r})"
+
+
+class DirectoryRecord:
+    """
+    The scanned contents of one directory of the source tree.
+
+    Attributes:
+        mtime_ns (int): Modification time of the directory when it was scanned.
+        files (Dict[str, ManifestEntry]): Files of the directory, keyed by file name.
+        subdirectories (List[str]): Names of the subdirectories.
+    """
+    __slots__ = ('mtime_ns', 'files', 'subdirectories')
+
+    def __init__(self, mtime_ns: int, files: Dict[str, ManifestEntry], subdirectories: List[str]):
+        """
+        Initialize the DirectoryRecord.
+
+        Args:
+            mtime_ns (int): Modification time of the directory.
+            files (Dict[str, ManifestEntry]): Files of the directory, keyed by file name.
+            subdirectories (List[str]): Names of the subdirectories.
+        """
+        self.mtime_ns: int = mtime_ns
+        self.files: Dict[str, ManifestEntry] = files
+        self.subdirectories: List[str] = subdirectories
+
+
+class FileManifest:
+    """
+    An index of every file below a source directory.
+
+    Attributes:
+        root (str): The scanned source directory.
+        directories (Dict[str, DirectoryRecord]): Scanned directories, keyed by path relative to the root.
+    """
+
+    def __init__(self, root: str, directories: Optional[Dict[str, DirectoryRecord]] = None):
+        """
+        Initialize the FileManifest.
+
+        Args:
+            root (str): The scanned source directory.
+            directories (Optional[Dict[str, DirectoryRecord]]): Scanned directories.
+        """
+        self.root: str = root
+        self.directories: Dict[str, DirectoryRecord] = directories or {}
+        self._entries: Optional[Dict[str, ManifestEntry]] = None
+
+    def __iter__(self) -> Iterator[ManifestEntry]:
+        """
+        Iterate over the entries in path order.
+        """
+        return iter(self.entries().values())
+
+    def __len__(self) -> int:
+        return len(self.entries())
+
+    def entries(self) -> Dict[str, ManifestEntry]:
+        """
+        Return every file entry, keyed by relative path and sorted by path.
+
+        Returns:
+            Dict[str, ManifestEntry]: The file entries.
+        """
+        if self._entries is None:
+            entries = {entry.path: entry for record in self.directories.values() for entry in record.files.values()}
+            self._entries = dict(sorted(entries.items()))
+        return self._entries
+
+    def paths(self) -> List[str]:
+        """
+        Return the relative path of every file, usable as a creator file list.
+
+        Returns:
+            List[str]: The relative file paths in sorted order.
+        """
+        return list(self.entries())
+
+    def total_size(self) -> int:
+        """
+        Return the total size of the files in the manifest.
+
+        Returns:
+            int: Size in bytes.
+        """
+        return sum(entry.size for entry in self.entries().values())
+
+    def file_hashes(self, file_list: Iterable[str]) -> Dict[str, str]:
+        """
+        Return the content digests of the given files.
+
+        Directory scans only notice added and removed files, so each file is stat'ed again
+        and rehashed if its size or modification time changed since it was recorded.
+        Files that are not part of the manifest are left out.
+
+        Args:
+            file_list (Iterable[str]): Relative paths of the files.
+
+        Returns:
+            Dict[str, str]: Content digests keyed by relative path.
+        """
+        entries = self.entries()
+        file_hashes: Dict[str, str] = {}
+        for file in file_list:
+            entry = entries.get(file)
+            if entry is None:
+                continue
+            try:
+                stat_result = os.stat(os.path.join(self.root, file))
+            except OSError:
+                continue
+            if stat_result.st_size != entry.size or stat_result.st_mtime_ns != entry.mtime_ns:
+                entry.size = stat_result.st_size
+                entry.mtime_ns = stat_result.st_mtime_ns
+                entry._content_hash = None
+            file_hashes[file] = entry.content_hash(self.root)
+        return file_hashes
+
+    def to_dict(self) -> dict:
+        """
+        Convert the manifest into a JSON-serializable dictionary.
+
+        Returns:
+            dict: The manifest as plain data.
+        """
+        return {
+            'version': 1,
+            'root': self.root,
+            'directories': {
+                path: {
+                    'mtime_ns': record.mtime_ns,
+                    'subdirectories': record.subdirectories,
+                    'files': {name: [entry.size, entry.mtime_ns, entry._content_hash]
+                              for name, entry in record.files.items()},
+                }
+                for path, record in self.directories.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'FileManifest':
+        """
+        Create a manifest from the data produced by to_dict().
+
+        Args:
+            data (dict): The manifest as plain data.
+
+        Returns:
+            FileManifest: The restored manifest.
+        """
+        directories = {}
+        for path, record in data['directories'].items():
+            files = {name: ManifestEntry(os.path.join(path, name) if path else name, size, mtime_ns, content_hash)
+                     for name, (size, mtime_ns, content_hash) in record['files'].items()}
+            directories[path] = DirectoryRecord(record['mtime_ns'], files, record['subdirectories'])
+        return cls(data['root'], directories)
+
+
+class DirectoryScanner:
+    """
+    Recursively scans a source directory into a FileManifest, persisted as an on-disk index.
+
+    A rescan stats every directory, but only lists the directories whose modification time
+    changed since the previous scan. Entries of unchanged directories, including their
+    already computed content digests, are reused from the index.
+
+    Attributes:
+        root (str): The source directory to scan.
+        index_path (Optional[str]): Path of the manifest index file, or None to keep it in memory only.
+    """
+
+    def __init__(self, root: str, index_path: Optional[str] = None):
+        """
+        Initialize the DirectoryScanner.
+
+        Args:
+            root (str): The source directory to scan.
+            index_path (Optional[str]): Path of the manifest index file.
+        """
+        self.root: str = root
+        self.index_path: Optional[str] = index_path
+        self._lock: threading.Lock = threading.Lock()
+        self._manifest: Optional[FileManifest] = None
+
+    @staticmethod
+    def default_index_path(root: str, index_directory: str) -> str:
+        """
+        Return the index path used for a source directory inside a shared index directory.
+
+        Args:
+            root (str): The source directory.
+            index_directory (str): Directory holding the manifest indexes.
+
+        Returns:
+            str: Path of the index file of the source directory.
+        """
+        root_digest = hashlib.sha256(os.path.abspath(root).encode('utf-8')).hexdigest()[:16]
+        return os.path.join(index_directory, f"{root_digest}.json")
+
+    def scan(self, on_directory: Optional[Callable[[List[str]], None]] = None) -> FileManifest:
+        """
+        Scan the source directory, reusing the previous scan where nothing changed.
+
+        Directories are visited depth first in name order, so callers that list the paths as
+        they arrive show the files of a directory before those of its subdirectories.
+
+        Args:
+            on_directory (Optional[Callable[[List[str]], None]]): Called with the sorted relative paths of
+                the files of every directory as soon as it has been scanned, e.g. to list them before the
+                whole tree is done.
+
+        Returns:
+            FileManifest: The up-to-date manifest of the source directory.
+        """
+        with self._lock:
+            previous = self._manifest or self._load_index()
+            directories: Dict[str, DirectoryRecord] = {}
+            pending = ['']
+            while pending:
+                relative_directory = pending.pop()
+                record = self._scan_directory(relative_directory, previous.directories.get(relative_directory))
+                if record is None:
+                    continue
+                directories[relative_directory] = record
+                if on_directory is not None and record.files:
+                    on_directory([record.files[name].path for name in sorted(record.files)])
+                pending.extend(os.path.join(relative_directory, name) if relative_directory else name
+                               for name in reversed(record.subdirectories))
+
+            self._manifest = FileManifest(self.root, directories)
+            self._save_index()
+            return self._manifest
+
+    def _scan_directory(self, relative_directory: str, previous: Optional[DirectoryRecord]) -> Optional[DirectoryRecord]:
+        """
+        Scan one directory, or reuse its previous record if the directory did not change.
+        """
+        directory = os.path.join(self.root, relative_directory)
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            return None
+        if previous is not None and previous.mtime_ns == mtime_ns:
+            return previous
+
+        files: Dict[str, ManifestEntry] = {}
+        subdirectories: List[str] = []
+        index_path = os.path.abspath(self.index_path) if self.index_path else None
+        try:
+            with os.scandir(directory) as directory_entries:
+                for directory_entry in directory_entries:
+                    if directory_entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(directory_entry.name)
+                        continue
+                    if not directory_entry.is_file() or os.path.abspath(directory_entry.path) == index_path:
+                        continue
+                    stat_result = directory_entry.stat()
+                    content_hash = None
+                    if previous is not None:
+                        previous_entry = previous.files.get(directory_entry.name)
+                        if (previous_entry is not None and previous_entry.size == stat_result.st_size
+                                and previous_entry.mtime_ns == stat_result.st_mtime_ns):
+                            content_hash = previous_entry._content_hash
+                    path = os.path.join(relative_directory, directory_entry.name) if relative_directory \
+                        else directory_entry.name
+                    files[directory_entry.name] = ManifestEntry(path, stat_result.st_size, stat_result.st_mtime_ns,
+                                                                content_hash)
+        except OSError:
+            return None
+        subdirectories.sort()
+        return DirectoryRecord(mtime_ns, files, subdirectories)
+
+    def save(self) -> None:
+        """
+        Write the current manifest, including content digests computed since the scan, to the index.
+        """
+        with self._lock:
+            self._save_index()
+
+    def _load_index(self) -> FileManifest:
+        """
+        Read the previous manifest from the index, starting empty if it is missing, unreadable
+        or belongs to another directory.
+        """
+        if self.index_path is None:
+            return FileManifest(self.root)
+        try:
+            with open(self.index_path) as index_file:
+                data = json.load(index_file)
+            if data.get('version') != 1 or data.get('root') != self.root:
+                return FileManifest(self.root)
+            return FileManifest.from_dict(data)
+        except (OSError, ValueError, KeyError, TypeError):
+            return FileManifest(self.root)
+
+    def _save_index(self) -> None:
+        """
+        Atomically write the current manifest to the index.
+        """
+        if self.index_path is None or self._manifest is None:
+            return
+        index_directory = os.path.dirname(self.index_path)
+        if index_directory:
+            os.makedirs(index_directory, exist_ok=True)
+        temporary_path = f"{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary_path, 'w') as index_file:
+            json.dump(self._manifest.to_dict(), index_file)
+        os.replace(temporary_path, self.index_path)
@@ -0,0 +1,463 @@
+import asyncio
+import os
+import subprocess
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .build_cache import BuildCache
+from .cancellation import CancellationToken
+from .creators.build_step import BuildStep
+from .factories.creator_factory import InstallerCreatorFactory
+from .factories.installer_flyweight import InstallerFlyweightFactory
+from .payload import plan_shared_payloads
+from .preflight import PreflightError, PreflightReport
+from .proxy import InstallerCreatorProxy
+from .scanner import FileManifest
+
+
+class BuildJob:
+    """
+    Describes one installer to be built by the BuildScheduler.
+
+    Attributes:
+        installer_type (str): The type of installer to create (MSI or EXE).
+        source_directory (str): Directory containing the source files.
+        file_list (List[str]): List of files to include in the installer.
+        installer_name (str): Name of the installer.
+        output_directory (str): Output directory for the installer.
+        manifest (Optional[FileManifest]): Scanned manifest of the source directory, if any.
+        shared_files (List[str]): Files whose compressed payload is shared with other jobs of the batch.
+        profile (Optional[str]): Name of the build profile, defaulting to INSTALLER_BUILD_PROFILE.
+        preflight_report (Optional[PreflightReport]): Pre-flight check of the job's files, if the batch
+            already made one while planning shared payloads.
+    """
+
+    def __init__(self, installer_type: str, source_directory: str, file_list: List[str], installer_name: str,
+                 output_directory: str, manifest: Optional[FileManifest] = None, profile: Optional[str] = None):
+        """
+        Initialize the BuildJob.
+
+        Args:
+            installer_type (str): The type of installer to create (MSI or EXE).
+            source_directory (str): Directory containing the source files.
+            file_list (List[str]): List of files to include in the installer.
+            installer_name (str): Name of the installer.
+            output_directory (str): Output directory for the installer.
+            manifest (Optional[FileManifest]): Scanned manifest of the source directory.
+            profile (Optional[str]): Name of the build profile.
+        """
+        self.installer_type: str = installer_type
+        self.source_directory: str = source_directory
+        self.file_list: List[str] = file_list
+        self.installer_name: str = installer_name
+        self.output_directory: str = output_directory
+        self.manifest: Optional[FileManifest] = manifest
+        self.shared_files: List[str] = []
+        self.profile: Optional[str] = profile
+        self.preflight_report: Optional[PreflightReport] = None
+
+    def __repr__(self) -> str:
+        return f"BuildJob({self.installer_type!r}, {self.installer_name!r})"
+
+
+class BuildResult:
+    """
+    The outcome of a single BuildJob.
+
+    Attributes:
+        job (BuildJob): The job the result belongs to.
+        success (bool): Whether the installer was built.
+        cached (bool): Whether the installer was restored from the build cache instead of compiled.
+        error (Optional[str]): Description of the failure, if any.
+        output_path (Optional[str]): Path of the built installer.
+        timings (Dict[str, float]): Seconds spent in each phase, keyed by phase name.
+        duration (float): Wall-clock seconds from the start of the job until it finished.
+        build_id (Optional[str]): ID of the build in the build telemetry.
+        preflight (Optional[dict]): Report of the pre-flight check if it failed the build.
+        payload (Optional[dict]): Shared payload statistics of a finished build.
+    """
+
+    def __init__(self, job: BuildJob):
+        """
+        Initialize an empty BuildResult.
+
+        Args:
+            job (BuildJob): The job the result belongs to.
+        """
+        self.job: BuildJob = job
+        self.success: bool = False
+        self.cached: bool = False
+        self.error: Optional[str] = None
+        self.output_path: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+        self.duration: float = 0.0
+        self.build_id: Optional[str] = None
+        self.preflight: Optional[dict] = None
+        self.payload: Optional[dict] = None
+
+    def to_dict(self) -> dict:
+        """
+        Convert the result into a JSON-serializable dictionary.
+
+        Returns:
+            dict: The result as plain data.
+        """
+        return {
+            'installer_type': self.job.installer_type,
+            'installer_name': self.job.installer_name,
+            'success': self.success,
+            'cached': self.cached,
+            'error': self.error,
+            'output_path': self.output_path,
+            'timings': dict(self.timings),
+            'duration': self.duration,
+            'build_id': self.build_id,
+            'preflight': self.preflight,
+            'payload': self.payload,
+        }
+
+    @classmethod
+    def from_dict(cls, job: BuildJob, data: dict) -> 'BuildResult':
+        """
+        Recreate a result from the dictionary written by to_dict, e.g. by a build farm worker.
+
+        Args:
+            job (BuildJob): The job the result belongs to.
+            data (dict): The result as plain data.
+
+        Returns:
+            BuildResult: The result.
+        """
+        result = cls(job)
+        result.success = bool(data.get('success'))
+        result.cached = bool(data.get('cached'))
+        result.error = data.get('error')
+        result.output_path = data.get('output_path')
+        result.timings = {name: float(seconds) for name, seconds in (data.get('timings') or {}).items()}
+        result.duration = float(data.get('duration') or 0.0)
+        result.build_id = data.get('build_id')
+        result.preflight = data.get('preflight')
+        result.payload = data.get('payload')
+        return result
+
+    def __repr__(self) -> str:
+        return f"BuildResult({self.job!r}, success={self.success!r})"
+
+
+class _JobRun:
+    """
+    Bookkeeping for a job while the scheduler is running it.
+    """
+
+    def __init__(self, job: BuildJob):
+        self.job: BuildJob = job
+        self.result: BuildResult = BuildResult(job)
+        self.creator: Optional[InstallerCreatorProxy] = None
+        self.steps: List[BuildStep] = []
+        self.started: Set[str] = set()
+        self.completed: Set[str] = set()
+        self.step_starts: Dict[str, float] = {}
+        self.start_time: float = time.perf_counter()
+
+    def ready_steps(self) -> List[BuildStep]:
+        """
+        Return the steps whose dependencies are complete and which have not been started.
+        """
+        ready = [step for step in self.steps
+                 if step.name not in self.started and all(name in self.completed for name in step.depends_on)]
+        self.started.update(step.name for step in ready)
+        return ready
+
+    def finish(self, error: Optional[str] = None) -> None:
+        """
+        Record the final state of the job.
+        """
+        self.result.success = error is None
+        self.result.error = error
+        self.result.duration = time.perf_counter() - self.start_time
+        if self.creator is not None:
+            self.result.build_id = self.creator.build_id
+        if error is None:
+            self.result.output_path = self.creator.output_path()
+            self.result.payload = self.creator.payload_report()
+
+
+class BuildScheduler:
+    """
+    Builds batches of installers concurrently on a bounded worker pool.
+
+    Script generation runs as tasks on a thread pool and every compiler invocation is queued on
+    the compiler pool of its toolchain (InstallerFlyweight.submit), so the compilers of different
+    jobs overlap and the batch waits whenever a pool's queue is full. Within a job the steps form
+    a dependency graph: a step is only submitted once the steps it depends on (e.g. candle before
+    light) have succeeded, and a failing step cancels the rest of its job without affecting other jobs.
+
+    With a build cache, large files that several MSI jobs of the batch ship unchanged are
+    packed into shared, content-named cabinets that are compressed once and then reused (see
+    core.payload); ``payload_summary`` holds the number of shared files and bytes of the last batch.
+
+    Compiler output is streamed line by line to ``on_output`` and every finished job is reported
+    to ``on_job_finished``. Both callbacks are called from worker threads. Cancelling the
+    ``cancellation`` token terminates the running compilers and fails the remaining jobs.
+    """
+    CANCELLED_MESSAGE: str = "Build cancelled."
+    ERROR_OUTPUT_LINES: int = 5
+
+    def __init__(self, max_workers: Optional[int] = None, build_cache: Optional[BuildCache] = None,
+                 on_output: Optional[Callable[[BuildJob, str, str], None]] = None,
+                 on_job_finished: Optional[Callable[[BuildResult], None]] = None,
+                 cancellation: Optional[CancellationToken] = None):
+        """
+        Initialize the BuildScheduler.
+
+        Args:
+            max_workers (Optional[int]): Maximum number of concurrent tasks. Defaults to the CPU count.
+            build_cache (Optional[BuildCache]): Cache used to skip jobs whose inputs did not change.
+            on_output (Optional[Callable[[BuildJob, str, str], None]]): Receives the job, the step name and
+                each line of compiler output.
+            on_job_finished (Optional[Callable[[BuildResult], None]]): Receives the result of each finished job.
+            cancellation (Optional[CancellationToken]): Token that cancels the batch.
+        """
+        self.max_workers: int = max_workers or os.cpu_count() or 1
+        self.build_cache: Optional[BuildCache] = build_cache
+        self.on_output: Optional[Callable[[BuildJob, str, str], None]] = on_output
+        self.on_job_finished: Optional[Callable[[BuildResult], None]] = on_job_finished
+        self.cancellation: CancellationToken = cancellation or CancellationToken()
+        self.payload_summary: Dict[str, int] = {}
+
+    def run(self, jobs: Iterable[BuildJob]) -> List[BuildResult]:
+        """
+        Build every job and wait for all of them to finish.
+
+        Args:
+            jobs (Iterable[BuildJob]): The installers to build.
+
+        Returns:
+            List[BuildResult]: One result per job, in the order the jobs were given.
+        """
+        jobs = list(jobs)
+        self.plan_payloads(jobs)
+        runs = [_JobRun(job) for job in jobs]
+        if not runs:
+            return []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending: Dict[Future, Tuple[_JobRun, str, Optional[BuildStep]]] = {}
+            for run in runs:
+                pending[executor.submit(self._prepare, run)] = (run, 'prepare', None)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    run, phase, step = pending.pop(future)
+                    if phase == 'compile':
+                        # Checking the outputs may store them in the build cache, so it runs on the thread pool.
+                        pending[executor.submit(self._step_outcome, run, step, future,
+                                                time.perf_counter())] = (run, 'step', step)
+                        continue
+                    error = self._task_error(future, step)
+                    if error is None and phase != 'finish' and self.cancellation.cancelled:
+                        error = self.CANCELLED_MESSAGE
+                    if error is not None:
+                        self._report(run, error)
+                        continue
+
+                    if phase == 'finish':
+                        self._report(run)
+                        continue
+
+                    if step is not None:
+                        run.completed.add(step.name)
+
+                    if len(run.completed) == len(run.steps):
+                        pending[executor.submit(self._finish, run)] = (run, 'finish', None)
+                        continue
+
+                    for ready_step in run.ready_steps():
+                        pending[self._submit_step(run, ready_step)] = (run, 'compile', ready_step)
+
+        return [run.result for run in runs]
+
+    async def arun(self, jobs: Iterable[BuildJob], timeout: Optional[float] = None) -> List[BuildResult]:
+        """
+        Build every job on the running event loop and wait for all of them to finish.
+
+        The asyncio counterpart of run(): compilers run as asyncio subprocesses, so hundreds
+        of jobs can be in flight without a thread each. At most ``max_workers`` jobs build at
+        once, and the per-toolchain limits of the compiler pools still apply. Script
+        generation and the finishing hook run on worker threads.
+
+        Cancelling the awaiting task terminates the running compilers and fails the unfinished
+        jobs with CANCELLED_MESSAGE. Cancelling the scheduler's cancellation token stops jobs
+        before their next step.
+
+        Args:
+            jobs (Iterable[BuildJob]): The installers to build.
+            timeout (Optional[float]): Seconds each compiler step may run.
+
+        Returns:
+            List[BuildResult]: One result per job, in the order the jobs were given.
+        """
+        jobs = list(jobs)
+        await asyncio.to_thread(self.plan_payloads, jobs)
+        runs = [_JobRun(job) for job in jobs]
+        semaphore = asyncio.Semaphore(self.max_workers)
+        await asyncio.gather(*(self._arun_job(run, semaphore, timeout) for run in runs))
+        return [run.result for run in runs]
+
+    async def _arun_job(self, run: _JobRun, semaphore: asyncio.Semaphore, timeout: Optional[float]) -> None:
+        """
+        Build one job on the event loop and report its result.
+        """
+        try:
+            async with semaphore:
+                run.start_time = time.perf_counter()
+                error = await self._abuild(run, timeout)
+        except asyncio.CancelledError:
+            self._report(run, self.CANCELLED_MESSAGE)
+            raise
+        except Exception as exception:
+            error = str(exception)
+        self._report(run, error)
+
+    async def _abuild(self, run: _JobRun, timeout: Optional[float]) -> Optional[str]:
+        """
+        Prepare a job, run its steps as their dependencies complete and finish it.
+        """
+        if self.cancellation.cancelled:
+            return self.CANCELLED_MESSAGE
+        await asyncio.to_thread(self._prepare, run)
+
+        while len(run.completed) < len(run.steps):
+            ready_steps = run.ready_steps()
+            if not ready_steps:
+                return "Build steps have unsatisfiable dependencies."
+            errors = await asyncio.gather(*(self._arun_step(run, step, timeout) for step in ready_steps))
+            for step, error in zip(ready_steps, errors):
+                if error is not None:
+                    return error
+                run.completed.add(step.name)
+
+        await asyncio.to_thread(self._finish, run)
+        return None
+
+    async def _arun_step(self, run: _JobRun, step: BuildStep, timeout: Optional[float]) -> Optional[str]:
+        """
+        Run a single compiler step as an asyncio subprocess and return an error description if it failed.
+        """
+        if self.cancellation.cancelled:
+            return self.CANCELLED_MESSAGE
+        start = time.perf_counter()
+        flyweight = InstallerFlyweightFactory.get_flyweight(run.job.installer_type)
+        on_output = self.on_output
+        try:
+            compile_result = await flyweight.acompile_script(
+                step.command,
+                on_output=(lambda line: on_output(run.job, step.name, line)) if on_output else (lambda line: None),
+                timeout=timeout)
+        except asyncio.TimeoutError:
+            return f"{step.name} did not finish within {timeout} seconds"
+        except OSError as exception:
+            return f"{step.name} could not be run: {exception}"
+        finally:
+            run.result.timings[step.name] = time.perf_counter() - start
+            if run.creator is not None:
+                run.creator.record_phase(step.name, run.result.timings[step.name])
+        return self._step_error(step, compile_result)
+
+    def plan_payloads(self, jobs: List[BuildJob]) -> None:
+        """
+        Mark the files the jobs can share through cached cabinets, if the scheduler has a build cache.
+
+        Args:
+            jobs (List[BuildJob]): The jobs of the batch.
+        """
+        self.payload_summary = {}
+        if self.build_cache is not None and len(jobs) > 1:
+            self.payload_summary = plan_shared_payloads(jobs)
+
+    def _prepare(self, run: _JobRun) -> None:
+        """
+        Create the creator of a job, write its script and collect its build steps.
+        """
+        start = time.perf_counter()
+        job = run.job
+        run.creator = InstallerCreatorFactory.create(job.installer_type, job.source_directory, job.output_directory,
+                                                     job.file_list, job.installer_name,
+                                                     build_cache=self.build_cache, manifest=job.manifest,
+                                                     shared_files=job.shared_files, profile=job.profile,
+                                                     preflight_report=job.preflight_report)
+        try:
+            run.steps = run.creator.prepare_build()
+        except PreflightError as error:
+            run.result.preflight = error.report.to_dict()
+            raise
+        run.result.cached = not run.steps
+        run.result.timings['script'] = time.perf_counter() - start
+
+    def _submit_step(self, run: _JobRun, step: BuildStep) -> Future:
+        """
+        Queue a single compiler step on the compiler pool of its toolchain.
+
+        Blocks while the pool's queue is full, so the batch does not run ahead of the compilers.
+        """
+        flyweight = InstallerFlyweightFactory.get_flyweight(run.job.installer_type)
+        on_output = self.on_output
+        run.step_starts[step.name] = time.perf_counter()
+        return flyweight.submit(
+            step.command,
+            on_output=(lambda line: on_output(run.job, step.name, line)) if on_output else (lambda line: None),
+            cancellation=self.cancellation)
+
+    def _step_outcome(self, run: _JobRun, step: BuildStep, compilation: Future, end: float) -> Optional[str]:
+        """
+        Record the time of a finished compiler step and return an error description if it failed.
+        """
+        run.result.timings[step.name] = end - run.step_starts[step.name]
+        run.creator.record_phase(step.name, run.result.timings[step.name])
+        return self._step_error(step, compilation.result())
+
+    def _step_error(self, step: BuildStep, compile_result: subprocess.CompletedProcess) -> Optional[str]:
+        """
+        Check a finished compiler step, run its success hook and return an error description if it failed.
+        """
+        if self.cancellation.cancelled:
+            return self.CANCELLED_MESSAGE
+        if compile_result.returncode != 0:
+            output = "\n".join(compile_result.stdout.strip().splitlines()[-self.ERROR_OUTPUT_LINES:])
+            return f"{step.name} exited with code {compile_result.returncode}: {output}"
+        missing_outputs = step.missing_outputs()
+        if missing_outputs:
+            return f"{step.name} did not create {missing_outputs[0]}"
+        if step.on_success is not None:
+            step.on_success()
+        return None
+
+    def _report(self, run: _JobRun, error: Optional[str] = None) -> None:
+        """
+        Record the final state of a job and pass its result to the on_job_finished callback.
+        """
+        if error is not None and run.creator is not None:
+            run.creator.fail_build(error)
+        run.finish(error)
+        if self.on_job_finished is not None:
+            self.on_job_finished(run.result)
+
+    def _finish(self, run: _JobRun) -> None:
+        """
+        Run the finishing hook of a job's creator once all its steps have succeeded.
+        """
+        run.creator.finish_build()
+
+    @staticmethod
+    def _task_error(future: Future, step: Optional[BuildStep]) -> Optional[str]:
+        """
+        Return the error of a finished task, whether it was raised or returned.
+        """
+        exception = future.exception()
+        if exception is not None:
+            if step is not None:
+                return f"{step.name} could not be run: {exception}"
+            return str(exception)
+        return future.result()
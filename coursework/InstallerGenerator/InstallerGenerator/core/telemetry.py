@@ -0,0 +1,314 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from .base_config import log_database
+
+
+class BuildRecorder:
+    """
+    Collects the measurements of a single installer build.
+
+    Phase durations and input statistics are kept in memory while the build runs and are
+    written to the telemetry database in one transaction when the build finishes.
+
+    Attributes:
+        build_id (str): Unique identifier of the build.
+        installer_type (str): The type of installer being built (e.g. 'MSI' or 'EXE').
+        installer_name (str): Name of the installer being built.
+        phases (Dict[str, float]): Seconds spent in each phase, keyed by phase name.
+        file_count (int): Number of input files.
+        input_bytes (int): Total size of the input files.
+        cached (bool): Whether the installer was restored from the build cache.
+    """
+
+    def __init__(self, telemetry: 'BuildTelemetry', installer_type: str, installer_name: str):
+        """
+        Initialize the BuildRecorder.
+
+        Args:
+            telemetry (BuildTelemetry): The telemetry store the build is written to.
+            installer_type (str): The type of installer being built.
+            installer_name (str): Name of the installer being built.
+        """
+        self.build_id: str = uuid.uuid4().hex
+        self.installer_type: str = installer_type
+        self.installer_name: str = installer_name
+        self.phases: Dict[str, float] = {}
+        self.file_count: int = 0
+        self.input_bytes: int = 0
+        self.cached: bool = False
+        self._telemetry: BuildTelemetry = telemetry
+        self._started_at: float = time.time()
+        self._start: float = time.perf_counter()
+        self._finished: bool = False
+
+    @property
+    def finished(self) -> bool:
+        """
+        Whether the build has been written to the telemetry database.
+        """
+        return self._finished
+
+    def record_phase(self, phase: str, duration: float) -> None:
+        """
+        Record the duration of a build phase. Repeated phases are summed.
+
+        Args:
+            phase (str): Name of the phase (e.g. 'script_generation', 'candle').
+            duration (float): Seconds spent in the phase.
+        """
+        self.phases[phase] = self.phases.get(phase, 0.0) + duration
+
+    @contextmanager
+    def phase(self, phase: str) -> Iterator[None]:
+        """
+        Measure the duration of the enclosed block as a build phase.
+
+        Args:
+            phase (str): Name of the phase.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_phase(phase, time.perf_counter() - start)
+
+    def set_inputs(self, file_count: int, input_bytes: int) -> None:
+        """
+        Record the size of the build's input.
+
+        Args:
+            file_count (int): Number of input files.
+            input_bytes (int): Total size of the input files.
+        """
+        self.file_count = file_count
+        self.input_bytes = input_bytes
+
+    def finish(self, status: str, output_path: Optional[str] = None) -> None:
+        """
+        Write the build and its phases to the telemetry database. Later calls are ignored.
+
+        Args:
+            status (str): Outcome of the build ('success', 'cached', 'failed' or 'cancelled').
+            output_path (Optional[str]): Path of the built installer, used to record its size.
+        """
+        if self._finished:
+            return
+        self._finished = True
+        output_bytes = None
+        if output_path is not None and os.path.exists(output_path):
+            output_bytes = os.path.getsize(output_path)
+        self._telemetry.write_build(self, status, self._started_at, time.perf_counter() - self._start, output_bytes)
+
+
+class BuildTelemetry:
+    """
+    Stores per-build and per-phase measurements in indexed SQLite tables.
+
+    The ``builds`` table holds one row per build with its input and output sizes, and the
+    ``build_phases`` table one row per measured phase. Phase rows are indexed by installer
+    type and phase, so percentile queries only read the rows they report on. Old builds are
+    deleted together with their phases by the retention of core.log_store.LogStore.
+
+    Attributes:
+        db (str): Path of the SQLite database.
+    """
+
+    def __init__(self, db: str = log_database):
+        """
+        Initialize the BuildTelemetry and create its tables if needed.
+
+        Args:
+            db (str): Path of the SQLite database.
+        """
+        self.db: str = db
+        self._lock: threading.Lock = threading.Lock()
+        self._conn: sqlite3.Connection = sqlite3.connect(self.db, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS builds (
+                build_id TEXT PRIMARY KEY,
+                installer_type TEXT,
+                installer_name TEXT,
+                started_at REAL,
+                duration REAL,
+                status TEXT,
+                file_count INTEGER,
+                input_bytes INTEGER,
+                output_bytes INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS build_phases (
+                build_id TEXT,
+                installer_type TEXT,
+                phase TEXT,
+                duration REAL,
+                started_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_builds_type_started ON builds (installer_type, started_at);
+            CREATE INDEX IF NOT EXISTS idx_builds_started ON builds (started_at);
+            CREATE INDEX IF NOT EXISTS idx_build_phases_type_phase ON build_phases (installer_type, phase, duration);
+            CREATE INDEX IF NOT EXISTS idx_build_phases_build ON build_phases (build_id);
+        """)
+        self._conn.commit()
+
+    def start_build(self, installer_type: str, installer_name: str) -> BuildRecorder:
+        """
+        Start recording a new build.
+
+        Args:
+            installer_type (str): The type of installer being built.
+            installer_name (str): Name of the installer being built.
+
+        Returns:
+            BuildRecorder: The recorder of the build.
+        """
+        return BuildRecorder(self, installer_type, installer_name)
+
+    def write_build(self, recorder: BuildRecorder, status: str, started_at: float, duration: float,
+                    output_bytes: Optional[int]) -> None:
+        """
+        Write a finished build and its phases in one transaction.
+
+        Args:
+            recorder (BuildRecorder): The recorder of the build.
+            status (str): Outcome of the build.
+            started_at (float): Unix time the build started.
+            duration (float): Seconds the build took.
+            output_bytes (Optional[int]): Size of the built installer, if any.
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO builds VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (recorder.build_id, recorder.installer_type, recorder.installer_name, started_at, duration, status,
+                 recorder.file_count, recorder.input_bytes, output_bytes))
+            self._conn.executemany(
+                "INSERT INTO build_phases VALUES (?, ?, ?, ?, ?)",
+                [(recorder.build_id, recorder.installer_type, phase, phase_duration, started_at)
+                 for phase, phase_duration in recorder.phases.items()])
+            self._conn.commit()
+
+    def phase_percentiles(self, installer_type: Optional[str] = None,
+                          since: Optional[float] = None) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """
+        Report the median and 95th percentile duration of every phase per installer type.
+
+        Args:
+            installer_type (Optional[str]): Only report this installer type.
+            since (Optional[float]): Only include builds started at or after this Unix time.
+
+        Returns:
+            Dict[str, Dict[str, Dict[str, float]]]: ``{installer_type: {phase: {'count', 'p50', 'p95'}}}``.
+        """
+        query = "SELECT installer_type, phase, duration FROM build_phases"
+        conditions: List[str] = []
+        parameters: List[object] = []
+        if installer_type is not None:
+            conditions.append("installer_type = ?")
+            parameters.append(installer_type)
+        if since is not None:
+            conditions.append("started_at >= ?")
+            parameters.append(since)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY installer_type, phase, duration"
+
+        with self._lock:
+            rows = self._conn.execute(query, parameters).fetchall()
+
+        durations: Dict[str, Dict[str, List[float]]] = {}
+        for row_type, phase, duration in rows:
+            durations.setdefault(row_type, {}).setdefault(phase, []).append(duration)
+
+        return {
+            row_type: {
+                phase: {
+                    'count': len(values),
+                    'p50': percentile(values, 50),
+                    'p95': percentile(values, 95),
+                }
+                for phase, values in phases.items()
+            }
+            for row_type, phases in durations.items()
+        }
+
+    def close(self) -> None:
+        """
+        Close the database connection.
+        """
+        with self._lock:
+            self._conn.close()
+
+
+def percentile(sorted_values: List[float], rank: float) -> float:
+    """
+    Compute a percentile of sorted values with linear interpolation.
+
+    Args:
+        sorted_values (List[float]): Values in ascending order; must not be empty.
+        rank (float): The percentile to compute, between 0 and 100.
+
+    Returns:
+        float: The percentile.
+    """
+    position = (len(sorted_values) - 1) * rank / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+_default_telemetry: Optional[BuildTelemetry] = None
+_default_telemetry_lock: threading.Lock = threading.Lock()
+
+
+def default_telemetry() -> BuildTelemetry:
+    """
+    Return the telemetry store shared by the installer creators, opening it on first use.
+
+    Returns:
+        BuildTelemetry: The shared telemetry store.
+    """
+    global _default_telemetry
+    with _default_telemetry_lock:
+        if _default_telemetry is None:
+            _default_telemetry = BuildTelemetry()
+        return _default_telemetry
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Print the p50/p95 phase durations recorded in a telemetry database.
+
+    Usage (from the InstallerGenerator directory):
+        python -m core.telemetry [--db installer_logs.db] [--type MSI] [--days 7] [--json]
+    """
+    parser = argparse.ArgumentParser(description="Report installer build phase durations.")
+    parser.add_argument("--db", default=log_database, help="Path of the telemetry database.")
+    parser.add_argument("--type", dest="installer_type", help="Only report this installer type (MSI or EXE).")
+    parser.add_argument("--days", type=float, help="Only include builds from the last N days.")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    arguments = parser.parse_args(argv)
+
+    since = time.time() - arguments.days * 86400 if arguments.days is not None else None
+    telemetry = BuildTelemetry(arguments.db)
+    report = telemetry.phase_percentiles(arguments.installer_type, since)
+    telemetry.close()
+
+    if arguments.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{'type':<6}{'phase':<20}{'builds':>8}{'p50 s':>10}{'p95 s':>10}")
+    for installer_type, phases in sorted(report.items()):
+        for phase, stats in sorted(phases.items()):
+            print(f"{installer_type:<6}{phase:<20}{stats['count']:>8}{stats['p50']:>10.3f}{stats['p95']:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
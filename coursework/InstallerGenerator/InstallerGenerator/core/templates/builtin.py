@@ -0,0 +1,99 @@
+"""
+The built-in installer script templates.
+
+Custom templates set with INSTALLER_INNO_TEMPLATE or INSTALLER_WIX_TEMPLATE receive the same
+render context as the built-in template they replace.
+
+Inno Setup context:
+    installer_name, output_directory, output_base_filename
+    compression, solid_compression    The [Setup] directives of the build profile.
+    files                             One item per file with 'source' (absolute path) and 'dest_dir'
+                                      ('{app}' followed by the file's subdirectory, quoted for Inno Setup).
+
+Values in .iss templates are escaped for double-quoted parameters such as Source: by default;
+the unquoted [Setup] directives use the 'inno_directive' filter, which leaves double quotes alone.
+
+WiX context:
+    installer_name, upgrade_code
+    media                             One item per cabinet with 'id', 'cabinet' and 'compression_level'.
+    directory_tree                    The directories and components below INSTALLFOLDER, depth first:
+                                      an item that 'opens' a <Directory> has its 'id' and 'name', an item
+                                      that 'closes' one has neither, and every other item is a component
+                                      with the values of ``components``. Every item has an 'indent' of two
+                                      spaces per directory level.
+    components                        One item per file with 'id', 'guid', 'source' (relative to the
+                                      source directory) and 'disk_id' (empty for the first cabinet),
+                                      for templates that install every file into one directory.
+    component_refs                    One item per file with the 'id' of its component only.
+"""
+
+INNO_SETUP_TEMPLATE = """\
+[Setup]
+AppName={{ installer_name|inno_directive }}
+AppVersion=1.0
+DefaultDirName={autopf}\\{{ installer_name|inno_directive }}
+OutputDir={{ output_directory|inno_directive }}
+OutputBaseFilename={{ output_base_filename|inno_directive }}
+Compression={{ compression|inno_directive }}
+SolidCompression={{ solid_compression|inno_directive }}
+[Files]
+{% for file in files %}
+Source: "{{ file.source }}"; DestDir: "{{ file.dest_dir|raw }}"
+{% endfor %}
+"""
+
+WIX_COMPONENTS_TEMPLATE = """\
+{% for component in components %}
+          <Component Id="{{ component.id }}" Guid="{{ component.guid }}">
+            <File Id="{{ component.id }}" Source="{{ component.source }}" KeyPath="yes"\
+{% if component.disk_id %} DiskId="{{ component.disk_id }}"{% endif %} />
+          </Component>
+{% endfor %}
+"""
+
+WIX_DIRECTORY_TREE_TEMPLATE = """\
+{% for entry in directory_tree %}
+{% if entry.opens %}
+          {{ entry.indent|raw }}<Directory Id="{{ entry.id }}" Name="{{ entry.name }}">
+{% else %}
+{% if entry.closes %}
+          {{ entry.indent|raw }}</Directory>
+{% else %}
+          {{ entry.indent|raw }}<Component Id="{{ entry.id }}" Guid="{{ entry.guid }}">
+            {{ entry.indent|raw }}<File Id="{{ entry.id }}" Source="{{ entry.source }}" KeyPath="yes"\
+{% if entry.disk_id %} DiskId="{{ entry.disk_id }}"{% endif %} />
+          {{ entry.indent|raw }}</Component>
+{% endif %}
+{% endif %}
+{% endfor %}
+"""
+
+WIX_COMPONENT_REFS_TEMPLATE = """\
+{% for component in component_refs %}
+      <ComponentRef Id="{{ component.id }}" />
+{% endfor %}
+"""
+
+WIX_TEMPLATE = """\
+<?xml version="1.0" encoding="UTF-8"?>
+<Wix xmlns="http://schemas.microsoft.com/wix/2006/wi">
+  <Product Id="*" Name="{{ installer_name }}" Language="1033" Version="1.0.0.0" \
+Manufacturer="MyCompany" UpgradeCode="{{ upgrade_code }}">
+    <Package InstallerVersion="200" Compressed="yes" InstallScope="perMachine" />
+{% for medium in media %}
+    <Media Id="{{ medium.id }}" Cabinet="{{ medium.cabinet }}" EmbedCab="yes" \
+CompressionLevel="{{ medium.compression_level }}" />
+{% endfor %}
+    <Directory Id="TARGETDIR" Name="SourceDir">
+      <Directory Id="ProgramFilesFolder">
+        <Directory Id="INSTALLFOLDER" Name="{{ installer_name }}">
+""" + WIX_DIRECTORY_TREE_TEMPLATE + """\
+        </Directory>
+      </Directory>
+    </Directory>
+    <Feature Id="ProductFeature" Title="{{ installer_name }}" Level="1">
+""" + WIX_COMPONENT_REFS_TEMPLATE + """\
+    </Feature>
+  </Product>
+</Wix>
+"""
@@ -0,0 +1,372 @@
+import hashlib
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .escaping import ESCAPES
+
+_TOKEN_PATTERN = re.compile(r'({{.*?}}|{%.*?%}|{#.*?#})', re.DOTALL)
+_LINE_END_PATTERN = re.compile(r'[ \t]*(\n|$)')
+_NAME_PATTERN = re.compile(r'[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$')
+_FOR_PATTERN = re.compile(r'for\s+([A-Za-z_][A-Za-z0-9_]*)\s+in\s+(.+)$')
+_IF_PATTERN = re.compile(r'if\s+(not\s+)?(.+)$')
+
+# Number of output pieces a loop collects before yielding them as one chunk.
+CHUNK_PARTS = 256
+
+ESCAPE_BY_EXTENSION: Dict[str, str] = {'.wxs': 'xml', '.wxi': 'xml', '.xml': 'xml', '.iss': 'inno'}
+
+
+class TemplateError(ValueError):
+    """
+    Raised when a template cannot be parsed or rendered.
+    """
+
+
+class Stream:
+    """
+    An iterable that produces a new iterator every time it is iterated.
+
+    Lets a template loop over the same files more than once (e.g. for the components and
+    for the component references) without holding them all in memory.
+    """
+
+    def __init__(self, factory: Callable[[], Iterator[Any]]):
+        """
+        Initialize the Stream.
+
+        Args:
+            factory (Callable[[], Iterator[Any]]): Creates the iterator of each pass.
+        """
+        self._factory = factory
+
+    def __iter__(self) -> Iterator[Any]:
+        return self._factory()
+
+
+def _attribute(value: Any, name: str) -> Any:
+    """
+    Look up a key of a dictionary or an attribute of any other context value.
+    """
+    try:
+        return value[name] if type(value) is dict else getattr(value, name)
+    except (KeyError, AttributeError):
+        raise TemplateError(f"{type(value).__name__} value has no attribute '{name}'") from None
+
+
+def _variable(context: Dict[str, Any], name: str) -> Any:
+    """
+    Look up a top-level variable of the render context.
+    """
+    try:
+        return context[name]
+    except KeyError:
+        raise TemplateError(f"Undefined template variable '{name}'") from None
+
+
+class _CodeWriter:
+    """
+    Collects the lines of the Python generator function a template compiles to.
+    """
+
+    def __init__(self):
+        self.lines: List[str] = []
+        self.indent: int = 1
+        self.pending: List[str] = []
+        self.add_line("_buffer = []")
+        self.add_line("_append = _buffer.append")
+
+    def add_output(self, expression: str) -> None:
+        self.pending.append(expression)
+
+    def flush(self) -> None:
+        """
+        Append the output collected since the last statement to the output buffer.
+        """
+        if self.pending:
+            self.add_line(f"_append({' + '.join(self.pending)})")
+            self.pending = []
+
+    def yield_buffer(self, minimum: int) -> None:
+        """
+        Yield the output buffer as one chunk once it holds at least ``minimum`` parts.
+        """
+        self.add_line(f"if len(_buffer) >= {minimum}:")
+        self.add_line("    yield ''.join(_buffer)")
+        self.add_line("    _buffer.clear()")
+
+    def add_line(self, line: str) -> None:
+        self.lines.append("    " * self.indent + line)
+
+
+class Template:
+    """
+    An installer script template, compiled once into a Python generator function.
+
+    Templates are text with three kinds of tags:
+
+        {{ name.attribute|filter }}     Inserts a value. Values are looked up in the render
+                                        context, attributes on objects or keys of mappings.
+        {% for item in name %} ... {% endfor %}
+        {% if [not] name %} ... {% else %} ... {% endif %}
+        {# comment #}
+
+    Every inserted value is escaped with the template's escaping ('xml' for WiX, 'inno' for
+    Inno Setup) unless a filter ('xml', 'inno', 'inno_directive' or 'raw') is given. A line holding nothing but
+    a {% %} or {# #} tag is removed completely, so block tags do not leave blank lines.
+
+    Rendering yields the output in chunks of about CHUNK_PARTS pieces, so large scripts can be
+    streamed to disk without holding them in memory.
+
+    Attributes:
+        source (str): The template text.
+        escape (str): The default escaping of inserted values.
+        name (str): Name used in error messages, e.g. the template's path.
+    """
+
+    def __init__(self, source: str, escape: str = 'raw', name: str = '<template>'):
+        """
+        Parse and compile a template.
+
+        Prefer ``Template.from_string`` or ``load_template``, which reuse compiled templates.
+
+        Args:
+            source (str): The template text.
+            escape (str): The default escaping of inserted values: 'xml', 'inno' or 'raw'.
+            name (str): Name used in error messages.
+
+        Raises:
+            TemplateError: If the template has a syntax error or the escaping is unknown.
+        """
+        if escape not in ESCAPES:
+            raise TemplateError(f"Unknown escaping '{escape}'. Choose one of: {', '.join(ESCAPES)}.")
+        self.source: str = source
+        self.escape: str = escape
+        self.name: str = name
+        self._render = self._compile()
+
+    @classmethod
+    def from_string(cls, source: str, escape: str = 'raw', name: str = '<template>') -> 'Template':
+        """
+        Return the compiled template for a text, compiling it on first use.
+
+        Args:
+            source (str): The template text.
+            escape (str): The default escaping of inserted values.
+            name (str): Name used in error messages.
+
+        Returns:
+            Template: The compiled template.
+        """
+        key = (hashlib.sha256(source.encode('utf-8')).hexdigest(), escape)
+        template = _compiled_templates.get(key)
+        if template is None:
+            with _compile_lock:
+                template = _compiled_templates.get(key)
+                if template is None:
+                    template = cls(source, escape, name)
+                    _compiled_templates[key] = template
+        return template
+
+    def render(self, context: Dict[str, Any]) -> Iterator[str]:
+        """
+        Render the template piece by piece.
+
+        Args:
+            context (Dict[str, Any]): The values the template refers to.
+
+        Yields:
+            str: The next part of the output.
+
+        Raises:
+            TemplateError: If the template refers to an undefined variable or attribute.
+        """
+        return self._render(context)
+
+    def render_to_string(self, context: Dict[str, Any]) -> str:
+        """
+        Render the whole template into one string.
+
+        Args:
+            context (Dict[str, Any]): The values the template refers to.
+
+        Returns:
+            str: The output.
+        """
+        return "".join(self.render(context))
+
+    def _compile(self) -> Callable[[Dict[str, Any]], Iterator[str]]:
+        """
+        Translate the template into the source of a generator function and compile it.
+        """
+        code = _CodeWriter()
+        constants: List[str] = []
+        blocks: List[Tuple[str, int]] = []
+        loop_variables: List[str] = []
+
+        tokens = _TOKEN_PATTERN.split(self.source)
+        line_numbers = []
+        line_number = 1
+        for token in tokens:
+            line_numbers.append(line_number)
+            line_number += token.count('\n')
+        self._trim_block_lines(tokens)
+
+        for token, line_number in zip(tokens, line_numbers):
+            if token.startswith('{{') and token.endswith('}}'):
+                code.add_output(self._value_code(token[2:-2].strip(), loop_variables, line_number))
+            elif token.startswith('{%') and token.endswith('%}'):
+                code.flush()
+                self._block_code(token[2:-2].strip(), code, blocks, loop_variables, line_number)
+            elif token.startswith('{#'):
+                pass
+            elif token:
+                constants.append(token)
+                code.add_output(f"_c[{len(constants) - 1}]")
+        code.flush()
+        code.yield_buffer(1)
+        if blocks:
+            keyword, opened_at = blocks[-1]
+            raise TemplateError(f"{self.name}, line {opened_at}: '{keyword}' is never closed")
+
+        function_source = "def _render(_context):\n" + "\n".join(code.lines) + "\n"
+        namespace = {
+            '_c': tuple(constants),
+            '_attribute': _attribute,
+            '_variable': _variable,
+            '_str': str,
+            **{f"_escape_{name}": escape for name, escape in ESCAPES.items()},
+        }
+        exec(compile(function_source, self.name, 'exec'), namespace)
+        return namespace['_render']
+
+    @staticmethod
+    def _trim_block_lines(tokens: List[str]) -> None:
+        """
+        Remove the lines holding nothing but a block or comment tag, leaving the tag in place.
+
+        The tokens alternate between literal text (even positions) and tags (odd positions).
+        """
+        previous_trimmed = True
+        last_text = len(tokens) - 1
+        for position in range(1, len(tokens), 2):
+            if tokens[position].startswith('{{'):
+                previous_trimmed = False
+                continue
+            before, after = tokens[position - 1], tokens[position + 1]
+            line_start = before.rfind('\n')
+            line_end = _LINE_END_PATTERN.match(after)
+            standalone = ((line_start >= 0 or previous_trimmed) and not before[line_start + 1:].strip(' \t')
+                          and line_end is not None and (line_end.group(1) == '\n' or position + 1 == last_text))
+            if standalone:
+                tokens[position - 1] = before[:line_start + 1]
+                tokens[position + 1] = after[line_end.end():]
+            previous_trimmed = standalone
+
+    def _name_code(self, expression: str, loop_variables: List[str], line_number: int) -> str:
+        """
+        Return the Python expression that looks up a dotted name.
+        """
+        if not _NAME_PATTERN.match(expression):
+            raise TemplateError(f"{self.name}, line {line_number}: invalid expression '{expression}'")
+        first, *attributes = expression.split('.')
+        code = f"_v_{first}" if first in loop_variables else f"_variable(_context, {first!r})"
+        for attribute in attributes:
+            code = f"_attribute({code}, {attribute!r})"
+        return code
+
+    def _value_code(self, expression: str, loop_variables: List[str], line_number: int) -> str:
+        """
+        Return the Python expression that inserts a value, escaped.
+        """
+        name, *filters = [part.strip() for part in expression.split('|')]
+        escape = self.escape
+        for filter_name in filters:
+            if filter_name not in ESCAPES:
+                raise TemplateError(f"{self.name}, line {line_number}: unknown filter '{filter_name}'")
+            escape = filter_name
+        value = f"_str({self._name_code(name, loop_variables, line_number)})"
+        return value if escape == 'raw' else f"_escape_{escape}({value})"
+
+    def _block_code(self, statement: str, code: _CodeWriter, blocks: List[Tuple[str, int]],
+                    loop_variables: List[str], line_number: int) -> None:
+        """
+        Emit the Python statement of a {% %} tag.
+        """
+        keyword = statement.split(None, 1)[0] if statement else ''
+        if keyword == 'for':
+            match = _FOR_PATTERN.match(statement)
+            if match is None:
+                raise TemplateError(f"{self.name}, line {line_number}: expected 'for <name> in <expression>'")
+            variable, iterable = match.group(1), match.group(2).strip()
+            code.add_line(f"for _v_{variable} in {self._name_code(iterable, loop_variables, line_number)}:")
+            loop_variables.append(variable)
+            blocks.append(('for', line_number))
+            code.indent += 1
+        elif keyword == 'if':
+            match = _IF_PATTERN.match(statement)
+            if match is None:
+                raise TemplateError(f"{self.name}, line {line_number}: expected 'if [not] <expression>'")
+            negate = 'not ' if match.group(1) else ''
+            code.add_line(f"if {negate}{self._name_code(match.group(2).strip(), loop_variables, line_number)}:")
+            blocks.append(('if', line_number))
+            code.indent += 1
+        elif keyword == 'else':
+            if not blocks or blocks[-1][0] != 'if':
+                raise TemplateError(f"{self.name}, line {line_number}: 'else' outside of 'if'")
+            code.add_line("pass")
+            code.indent -= 1
+            code.add_line("else:")
+            code.indent += 1
+        elif keyword in ('endfor', 'endif'):
+            if not blocks or blocks[-1][0] != keyword[3:]:
+                raise TemplateError(f"{self.name}, line {line_number}: unexpected '{keyword}'")
+            blocks.pop()
+            if keyword == 'endfor':
+                loop_variables.pop()
+                code.yield_buffer(CHUNK_PARTS)
+            code.add_line("pass")
+            code.indent -= 1
+        else:
+            raise TemplateError(f"{self.name}, line {line_number}: unknown tag '{statement}'")
+
+
+_compiled_templates: Dict[Tuple[str, str], Template] = {}
+_compile_lock = threading.Lock()
+_loaded_templates: Dict[str, Tuple[Tuple[int, int], Template]] = {}
+
+
+def load_template(path: str, escape: Optional[str] = None) -> Template:
+    """
+    Load a template file, reusing its compiled form until the file changes.
+
+    Args:
+        path (str): Path of the template file.
+        escape (Optional[str]): Default escaping of inserted values. Derived from the file
+            extension if not given: 'xml' for .wxs, .wxi and .xml, 'inno' for .iss.
+
+    Returns:
+        Template: The compiled template.
+
+    Raises:
+        TemplateError: If the file cannot be read, the escaping cannot be derived or the template is invalid.
+    """
+    if escape is None:
+        escape = ESCAPE_BY_EXTENSION.get(os.path.splitext(path)[1].lower())
+        if escape is None:
+            raise TemplateError(f"Cannot tell how to escape values in {path}; pass the escaping explicitly.")
+    try:
+        stat_result = os.stat(path)
+        version = (stat_result.st_mtime_ns, stat_result.st_size)
+        loaded = _loaded_templates.get(path)
+        if loaded is not None and loaded[0] == version and loaded[1].escape == escape:
+            return loaded[1]
+        with open(path, encoding='utf-8') as template_file:
+            source = template_file.read()
+    except OSError as error:
+        raise TemplateError(f"Cannot read template {path}: {error}")
+    template = Template.from_string(source, escape, name=path)
+    _loaded_templates[path] = (version, template)
+    return template
+
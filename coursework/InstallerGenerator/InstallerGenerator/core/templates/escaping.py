@@ -0,0 +1,70 @@
+import re
+from typing import Callable, Dict
+
+_XML_SPECIAL = re.compile(r'[&<>"\']')
+_INNO_SPECIAL = re.compile(r'["{]')
+
+
+def escape_xml(value: str) -> str:
+    """
+    Escape a value for an XML attribute or text node.
+
+    Args:
+        value (str): The raw value.
+
+    Returns:
+        str: The value with &, <, >, " and ' replaced by entities.
+    """
+    if _XML_SPECIAL.search(value) is None:
+        return value
+    return (value.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+            .replace('"', '&quot;').replace("'", '&apos;'))
+
+
+def escape_inno(value: str) -> str:
+    """
+    Escape a value for a double-quoted Inno Setup parameter.
+
+    Inno Setup ends a quoted parameter at a single double quote and expands constants
+    such as {app}, so double quotes and opening braces are doubled.
+
+    Args:
+        value (str): The raw value.
+
+    Returns:
+        str: The value with " and { doubled.
+    """
+    if _INNO_SPECIAL.search(value) is None:
+        return value
+    return value.replace('"', '""').replace('{', '{{')
+
+
+def escape_inno_directive(value: str) -> str:
+    """
+    Escape the value of an unquoted Inno Setup [Setup] directive.
+
+    Directive values such as AppName= are taken up to the end of the line, so a double
+    quote is literal and doubling it would corrupt the value; only opening braces, which
+    start a constant, are doubled.
+
+    Args:
+        value (str): The raw value.
+
+    Returns:
+        str: The value with { doubled.
+    """
+    if '{' not in value:
+        return value
+    return value.replace('{', '{{')
+
+
+def no_escape(value: str) -> str:
+    return value
+
+
+ESCAPES: Dict[str, Callable[[str], str]] = {
+    'xml': escape_xml,
+    'inno': escape_inno,
+    'inno_directive': escape_inno_directive,
+    'raw': no_escape,
+}
@@ -0,0 +1,380 @@
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import stat
+import struct
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def _is_ignored(path: str, ignored: List[str]) -> bool:
+    """
+    Whether a path is one of the ignored directories or below one of them.
+    """
+    return any(path == directory or path.startswith(directory + os.sep) for directory in ignored)
+
+
+class ChangeWatcher(ABC):
+    """
+    An abstract base class for the watchers reporting which source directories changed.
+
+    Attributes:
+        directories (List[str]): The watched source directories.
+        ignored (List[str]): Directories whose changes are not reported, e.g. output directories
+            inside a source directory.
+    """
+
+    def __init__(self, directories: Iterable[str], ignored: Optional[Iterable[str]] = None):
+        """
+        Initialize the ChangeWatcher.
+
+        Args:
+            directories (Iterable[str]): The source directories to watch.
+            ignored (Optional[Iterable[str]]): Directories whose changes are not reported.
+        """
+        self.directories: List[str] = [os.path.abspath(directory) for directory in directories]
+        self.ignored: List[str] = [os.path.abspath(directory) for directory in ignored or []]
+
+    @abstractmethod
+    def wait(self, timeout: float) -> Set[str]:
+        """
+        Wait for changes below the watched directories.
+
+        Args:
+            timeout (float): Longest time to wait, in seconds.
+
+        Returns:
+            Set[str]: The watched directories with changes, or an empty set if none changed in time.
+        """
+        pass
+
+    def close(self) -> None:
+        """
+        Release the resources of the watcher.
+        """
+
+    def _root_of(self, path: str) -> Optional[str]:
+        """
+        Return the watched directory a changed path belongs to, unless the path is ignored.
+        """
+        if _is_ignored(path, self.ignored):
+            return None
+        for directory in self.directories:
+            if path == directory or path.startswith(directory + os.sep):
+                return directory
+        return None
+
+
+class InotifyWatcher(ChangeWatcher):
+    """
+    Watches source directories with Linux inotify.
+
+    Every directory below the watched directories gets its own inotify watch, and directories
+    created or moved in later are added as their events arrive. If the kernel's event queue
+    overflows, every watched directory is reported as changed.
+    """
+
+    def __init__(self, directories: Iterable[str], ignored: Optional[Iterable[str]] = None):
+        """
+        Initialize the InotifyWatcher and add a watch for every directory.
+
+        Args:
+            directories (Iterable[str]): The source directories to watch.
+            ignored (Optional[Iterable[str]]): Directories whose changes are not reported.
+
+        Raises:
+            OSError: If inotify is unavailable or the watch limit is reached.
+        """
+        super().__init__(directories, ignored)
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError("inotify is not available")
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd: int = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self._watches: Dict[int, str] = {}
+        try:
+            for directory in self.directories:
+                self._add_tree(directory)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_tree(self, directory: str) -> None:
+        """
+        Add a watch for a directory and every directory below it.
+        """
+        for current, subdirectories, _ in os.walk(directory):
+            if _is_ignored(current, self.ignored):
+                subdirectories.clear()
+                continue
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(current), WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error in (errno.ENOENT, errno.ENOTDIR):
+                    continue
+                raise OSError(error, f"Cannot watch {current}: {os.strerror(error)}")
+            self._watches[wd] = current
+
+    def wait(self, timeout: float) -> Set[str]:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed: Set[str] = set()
+        while True:
+            try:
+                buffer = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            changed |= self._parse_events(buffer)
+        return changed
+
+    def _parse_events(self, buffer: bytes) -> Set[str]:
+        """
+        Decode a buffer of inotify events into the watched directories they concern.
+        """
+        changed: Set[str] = set()
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(buffer):
+            wd, mask, _, name_length = EVENT_HEADER.unpack_from(buffer, offset)
+            name = buffer[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + name_length].rstrip(b'\0')
+            offset += EVENT_HEADER.size + name_length
+
+            if mask & IN_Q_OVERFLOW:
+                changed.update(self.directories)
+                continue
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._watches[wd]
+                continue
+            path = os.path.join(directory, os.fsdecode(name)) if name else directory
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and not _is_ignored(path, self.ignored):
+                try:
+                    self._add_tree(path)
+                except OSError as error:
+                    logging.error(f"Watching {path} failed: {error}")
+            root = self._root_of(path)
+            if root is not None:
+                changed.add(root)
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+            self._watches.clear()
+
+
+class PollingWatcher(ChangeWatcher):
+    """
+    Watches source directories by comparing the size and modification time of every file.
+
+    Used where inotify is unavailable. Every poll walks the watched trees, so the interval
+    should grow with the number of files.
+
+    Attributes:
+        interval (float): Seconds between two polls.
+    """
+
+    def __init__(self, directories: Iterable[str], ignored: Optional[Iterable[str]] = None, interval: float = 1.0):
+        """
+        Initialize the PollingWatcher and take the first snapshot of every directory.
+
+        Args:
+            directories (Iterable[str]): The source directories to watch.
+            ignored (Optional[Iterable[str]]): Directories whose changes are not reported.
+            interval (float): Seconds between two polls.
+        """
+        super().__init__(directories, ignored)
+        self.interval: float = interval
+        self._snapshots: Dict[str, Dict[str, Tuple[int, int]]] = {
+            directory: self._snapshot(directory) for directory in self.directories}
+        self._next_poll: float = time.monotonic() + interval
+
+    def _snapshot(self, directory: str) -> Dict[str, Tuple[int, int]]:
+        """
+        Return the size and modification time of every file and directory below a directory.
+        """
+        snapshot: Dict[str, Tuple[int, int]] = {}
+        pending = [directory]
+        while pending:
+            current = pending.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        try:
+                            entry_stat = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        if stat.S_ISDIR(entry_stat.st_mode):
+                            if _is_ignored(entry.path, self.ignored):
+                                continue
+                            pending.append(entry.path)
+                        snapshot[entry.path] = (entry_stat.st_size, entry_stat.st_mtime_ns)
+            except OSError:
+                continue
+        return snapshot
+
+    def wait(self, timeout: float) -> Set[str]:
+        deadline = time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            if now < self._next_poll:
+                if self._next_poll > deadline:
+                    time.sleep(max(deadline - now, 0))
+                    return set()
+                time.sleep(self._next_poll - now)
+            self._next_poll = time.monotonic() + self.interval
+            changed: Set[str] = set()
+            for directory in self.directories:
+                snapshot = self._snapshot(directory)
+                if snapshot != self._snapshots[directory]:
+                    self._snapshots[directory] = snapshot
+                    changed.add(directory)
+            if changed or time.monotonic() >= deadline:
+                return changed
+
+
+def create_watcher(directories: Iterable[str], ignored: Optional[Iterable[str]] = None,
+                   poll_interval: float = 1.0) -> ChangeWatcher:
+    """
+    Create the best watcher for the platform: inotify on Linux, polling elsewhere.
+
+    Falls back to polling if inotify cannot be used, e.g. because the limit of inotify
+    watches is reached.
+
+    Args:
+        directories (Iterable[str]): The source directories to watch.
+        ignored (Optional[Iterable[str]]): Directories whose changes are not reported.
+        poll_interval (float): Seconds between two polls of the polling watcher.
+
+    Returns:
+        ChangeWatcher: The watcher.
+    """
+    directories = list(directories)
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(directories, ignored)
+        except (OSError, AttributeError) as error:
+            logging.info(f"inotify unavailable, polling for changes instead: {error}")
+    return PollingWatcher(directories, ignored, poll_interval)
+
+
+class RebuildLoop:
+    """
+    Rebuilds installers when their source directories change.
+
+    Changes are debounced: a rebuild starts once the watched directories have been quiet for
+    ``debounce`` seconds, or at the latest ``max_delay`` seconds after the first change, so
+    a burst of saves triggers one rebuild. At most one rebuild runs at a time. Changes that
+    arrive while it runs are coalesced into a single follow-up rebuild of every directory
+    that changed, so a storm of changes never queues redundant builds.
+
+    Attributes:
+        watcher (ChangeWatcher): Source of the changes.
+        rebuild (Callable[[Set[str]], None]): Rebuilds the installers of the changed directories.
+        debounce (float): Seconds without changes before a rebuild starts.
+        max_delay (float): Longest time in seconds a rebuild is postponed by continuing changes.
+        rebuilds (int): Number of rebuilds started.
+        changes (int): Number of change notifications received.
+    """
+    WAIT_INTERVAL: float = 0.1
+
+    def __init__(self, watcher: ChangeWatcher, rebuild: Callable[[Set[str]], None], debounce: float = 0.5,
+                 max_delay: float = 5.0):
+        """
+        Initialize the RebuildLoop.
+
+        Args:
+            watcher (ChangeWatcher): Source of the changes.
+            rebuild (Callable[[Set[str]], None]): Rebuilds the installers of the changed directories.
+            debounce (float): Seconds without changes before a rebuild starts.
+            max_delay (float): Longest time in seconds a rebuild is postponed by continuing changes.
+        """
+        self.watcher: ChangeWatcher = watcher
+        self.rebuild: Callable[[Set[str]], None] = rebuild
+        self.debounce: float = debounce
+        self.max_delay: float = max(max_delay, debounce)
+        self.rebuilds: int = 0
+        self.changes: int = 0
+        self._build: Optional[threading.Thread] = None
+
+    def run(self, stop: Optional[threading.Event] = None) -> None:
+        """
+        Watch and rebuild until ``stop`` is set, then wait for the running rebuild.
+
+        If the loop is interrupted by an exception such as KeyboardInterrupt, the running
+        rebuild is not waited for, so the caller can cancel it before calling ``join``.
+
+        Args:
+            stop (Optional[threading.Event]): Ends the loop when set. Without it the loop runs
+                until interrupted.
+        """
+        pending: Set[str] = set()
+        first_change = last_change = 0.0
+        while stop is None or not stop.is_set():
+            changed = self.watcher.wait(self.WAIT_INTERVAL)
+            now = time.monotonic()
+            if changed:
+                self.changes += 1
+                if not pending:
+                    first_change = now
+                pending |= changed
+                last_change = now
+
+            building = self._build is not None and self._build.is_alive()
+            quiet = now - last_change >= self.debounce
+            overdue = now - first_change >= self.max_delay
+            if pending and not building and (quiet or overdue):
+                directories, pending = pending, set()
+                self.rebuilds += 1
+                self._build = threading.Thread(target=self._rebuild, args=(directories,), daemon=True)
+                self._build.start()
+        self.join()
+
+    def join(self) -> None:
+        """
+        Wait for the running rebuild, if any, to finish.
+        """
+        if self._build is not None:
+            self._build.join()
+            self._build = None
+
+    def _rebuild(self, directories: Set[str]) -> None:
+        """
+        Run one rebuild, logging instead of raising its errors so the loop keeps watching.
+        """
+        try:
+            self.rebuild(directories)
+        except Exception as error:
+            logging.error(f"Rebuild of {', '.join(sorted(directories))} failed: {error}")
@@ -0,0 +1,116 @@
+import hashlib
+import re
+from typing import Iterable, Set, Tuple
+
+MAX_IDENTIFIER_LENGTH: int = 72
+
+_VALID_IDENTIFIER = re.compile(r'[A-Za-z_][A-Za-z0-9_.]{0,%d}\Z' % (MAX_IDENTIFIER_LENGTH - 1))
+_INVALID_CHARACTERS = re.compile(r'[^A-Za-z0-9_.]')
+
+
+class IdentifierError(ValueError):
+    """
+    Raised when the items of an installer cannot be given unique WiX identifiers.
+    """
+
+
+def is_valid_identifier(name: str) -> bool:
+    """
+    Checks whether a name can be used as a WiX identifier as is.
+
+    Identifiers start with an ASCII letter or an underscore, continue with ASCII letters,
+    digits, underscores and periods, and are at most MAX_IDENTIFIER_LENGTH characters long.
+
+    Args:
+        name (str): The name.
+
+    Returns:
+        bool: True if the name is a valid identifier.
+    """
+    return _VALID_IDENTIFIER.match(name) is not None
+
+
+def sanitize_identifier(name: str) -> str:
+    """
+    Turns a name into a valid WiX identifier, apart from its length.
+
+    Every character an identifier may not contain is replaced by an underscore, and an
+    underscore is prepended if the name does not start with a letter or an underscore.
+
+    Args:
+        name (str): The name.
+
+    Returns:
+        str: The sanitized name.
+    """
+    identifier = _INVALID_CHARACTERS.sub('_', name)
+    if not identifier or not (identifier[0] == '_' or identifier[0].isalpha()):
+        identifier = '_' + identifier
+    return identifier
+
+
+class IdentifierAllocator:
+    """
+    Hands out unique, valid WiX identifiers.
+
+    A name that is a valid identifier and not taken yet is used as is. Any other name is
+    sanitized, shortened if needed, and given a suffix of the hexadecimal SHA-1 digest of the
+    item's unique key (e.g. its normalized path). If that identifier is taken too, the suffix
+    is lengthened.
+
+    Which identifier an item gets depends on the identifiers handed out before it, so the
+    identifiers are only reproducible for the same items allocated in the same order. Callers
+    that need them stable from build to build allocate in a deterministic order, e.g. sorted
+    by path.
+
+    Taken identifiers are kept in a set and compared case-insensitively, so allocating an
+    identifier costs the same for the hundred-thousandth item as for the first.
+    """
+    SUFFIX_LENGTHS: Tuple[int, ...] = (8, 16, 40)
+    __slots__ = ('_taken',)
+
+    def __init__(self, reserved: Iterable[str] = ()):
+        """
+        Initialize the IdentifierAllocator.
+
+        Args:
+            reserved (Iterable[str]): Identifiers that are already in use.
+        """
+        self._taken: Set[str] = {identifier.lower() for identifier in reserved}
+
+    def __contains__(self, identifier: str) -> bool:
+        return identifier.lower() in self._taken
+
+    def __len__(self) -> int:
+        return len(self._taken)
+
+    def allocate(self, name: str, key: str) -> str:
+        """
+        Allocate the identifier of an item.
+
+        Args:
+            name (str): The preferred identifier, e.g. the file name.
+            key (str): A key that is unique among the items, from which the suffix is derived.
+
+        Returns:
+            str: The identifier.
+
+        Raises:
+            IdentifierError: If every identifier derived from the key is taken, which means the key is not unique.
+        """
+        taken = self._taken
+        if _VALID_IDENTIFIER.match(name):
+            folded = name.lower()
+            if folded not in taken:
+                taken.add(folded)
+                return name
+
+        base = sanitize_identifier(name)
+        digest = hashlib.sha1(key.encode('utf-8'), usedforsecurity=False).hexdigest()
+        for length in self.SUFFIX_LENGTHS:
+            identifier = f"{base[:MAX_IDENTIFIER_LENGTH - length - 1]}_{digest[:length]}"
+            folded = identifier.lower()
+            if folded not in taken:
+                taken.add(folded)
+                return identifier
+        raise IdentifierError(f"No unique WiX identifier is left for '{key}'.")
@@ -0,0 +1,219 @@
+"""
+Shared fixtures of the test suite.
+
+The toolchains are replaced by stand-ins for candle, light and ISCC that run
+benchmarks/stub_compiler.py, so builds run end to end without WiX or Inno Setup. The stand-ins
+are configured through environment variables, which compiler processes inherit:
+
+    STUB_DELAY    Seconds every compilation takes.
+    STUB_FAIL     Comma-separated rules 'tool' or 'tool:text'; a matching compilation exits with
+                  an error, e.g. 'light:broken' fails light for commands mentioning 'broken'.
+    STUB_LOG      File every compilation appends a JSON line to, with the tool, its arguments,
+                  its start and end time (time.monotonic(), shared by all processes) and exit code.
+
+Run the tests from the InstallerGenerator directory:
+    python -m pytest tests
+"""
+import json
+import os
+import shutil
+import stat
+import sys
+import tempfile
+from typing import Dict, List, Optional
+
+import pytest
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PACKAGE_ROOT not in sys.path:
+    sys.path.insert(0, PACKAGE_ROOT)
+
+STUB_TOOL_SOURCE = """\
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, {package_root!r})
+from benchmarks import stub_compiler
+
+TOOL = {tool!r}
+
+
+def main() -> int:
+    arguments = sys.argv[1:]
+    options = []
+    if os.environ.get('STUB_DELAY'):
+        options += ['--delay', os.environ['STUB_DELAY']]
+    for rule in filter(None, os.environ.get('STUB_FAIL', '').split(',')):
+        tool, _, text = rule.partition(':')
+        if tool == TOOL and text in ' '.join(arguments):
+            options.append('--fail')
+            break
+    start = time.monotonic()
+    sys.argv = [sys.argv[0], *options, *arguments]
+    returncode = stub_compiler.main()
+    if os.environ.get('STUB_LOG'):
+        entry = {{'tool': TOOL, 'arguments': arguments, 'start': start, 'end': time.monotonic(),
+                  'returncode': returncode}}
+        with open(os.environ['STUB_LOG'], 'a') as log_file:
+            log_file.write(json.dumps(entry) + '\\n')
+    return returncode
+
+
+sys.exit(main())
+"""
+
+
+def _write_stub_tools(directory: str) -> Dict[str, str]:
+    """
+    Write the stand-in of every compiler and return their paths, keyed by tool name.
+    """
+    tools = {}
+    for tool in ('candle', 'light', 'iscc'):
+        source = STUB_TOOL_SOURCE.format(package_root=PACKAGE_ROOT, tool=tool)
+        if os.name == 'nt':
+            script_path = os.path.join(directory, f"{tool}.py")
+            with open(script_path, 'w') as script_file:
+                script_file.write(source)
+            tool_path = os.path.join(directory, f"{tool}.cmd")
+            with open(tool_path, 'w') as tool_file:
+                tool_file.write(f'@"{sys.executable}" "{script_path}" %*\n')
+        else:
+            tool_path = os.path.join(directory, tool)
+            with open(tool_path, 'w') as tool_file:
+                tool_file.write(f"#!{sys.executable}\n{source}")
+            os.chmod(tool_path, os.stat(tool_path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+        tools[tool] = tool_path
+    return tools
+
+
+# base_config reads the environment when it is first imported, so the stand-ins and private
+# cache, log and index locations are configured before any test imports the application.
+TEST_ROOT = tempfile.mkdtemp(prefix="installer_tests_")
+STUB_TOOLS = _write_stub_tools(TEST_ROOT)
+os.environ.update({
+    'WIX_CANDLE': STUB_TOOLS['candle'],
+    'WIX_LIGHT': STUB_TOOLS['light'],
+    'INNO_SETUP_COMPILER': STUB_TOOLS['iscc'],
+    'INSTALLER_BUILD_CACHE': os.path.join(TEST_ROOT, 'build_cache'),
+    'INSTALLER_MANIFEST_INDEX': os.path.join(TEST_ROOT, 'manifests'),
+    'INSTALLER_LOG_DATABASE': os.path.join(TEST_ROOT, 'installer_logs.db'),
+    'INSTALLER_LOG_FILE': os.path.join(TEST_ROOT, 'installer_creator.log'),
+})
+for variable in ('STUB_DELAY', 'STUB_FAIL', 'STUB_LOG', 'INSTALLER_WIX_TEMPLATE', 'INSTALLER_INNO_TEMPLATE'):
+    os.environ.pop(variable, None)
+
+
+def pytest_unconfigure(config) -> None:
+    shutil.rmtree(TEST_ROOT, ignore_errors=True)
+
+
+class StubRun:
+    """
+    One compilation of a stand-in compiler, as recorded in STUB_LOG.
+
+    Attributes:
+        tool (str): 'candle', 'light' or 'iscc'.
+        arguments (List[str]): The arguments the compiler was called with.
+        start (float): time.monotonic() when the compiler started.
+        end (float): time.monotonic() when it exited.
+        returncode (int): Its exit code.
+    """
+
+    def __init__(self, tool: str, arguments: List[str], start: float, end: float, returncode: int):
+        self.tool: str = tool
+        self.arguments: List[str] = arguments
+        self.start: float = start
+        self.end: float = end
+        self.returncode: int = returncode
+
+    def mentions(self, text: str) -> bool:
+        """
+        Whether any argument contains the text, e.g. the name of an installer.
+        """
+        return any(text in argument for argument in self.arguments)
+
+    def __repr__(self) -> str:
+        return f"StubRun({self.tool!r}, {self.start:.3f}-{self.end:.3f}, returncode={self.returncode})"
+
+
+class StubCompilers:
+    """
+    Controls the stand-in compilers of a test and reads back what they did.
+
+    Attributes:
+        tools (Dict[str, str]): Paths of the stand-ins, keyed by tool name.
+        log_path (str): The STUB_LOG of the test.
+    """
+
+    def __init__(self, monkeypatch: pytest.MonkeyPatch, log_path: str):
+        self._monkeypatch: pytest.MonkeyPatch = monkeypatch
+        self.tools: Dict[str, str] = dict(STUB_TOOLS)
+        self.log_path: str = log_path
+        monkeypatch.setenv('STUB_LOG', log_path)
+
+    def configure(self, delay: Optional[float] = None, fail: Optional[str] = None) -> None:
+        """
+        Set the compile time and failure rules of the compilations started from now on.
+        """
+        if delay is None:
+            self._monkeypatch.delenv('STUB_DELAY', raising=False)
+        else:
+            self._monkeypatch.setenv('STUB_DELAY', str(delay))
+        if fail is None:
+            self._monkeypatch.delenv('STUB_FAIL', raising=False)
+        else:
+            self._monkeypatch.setenv('STUB_FAIL', fail)
+
+    def runs(self, tool: Optional[str] = None) -> List[StubRun]:
+        """
+        Return the finished compilations in the order they started, optionally of one tool only.
+        """
+        if not os.path.exists(self.log_path):
+            return []
+        with open(self.log_path) as log_file:
+            runs = [StubRun(**json.loads(line)) for line in log_file if line.strip()]
+        return sorted((run for run in runs if tool is None or run.tool == tool), key=lambda run: run.start)
+
+    def peak_concurrency(self) -> int:
+        """
+        Return the largest number of compilations that were running at the same time.
+        """
+        events = sorted([(run.start, 1) for run in self.runs()] + [(run.end, -1) for run in self.runs()])
+        running = peak = 0
+        for _, change in events:
+            running += change
+            peak = max(peak, running)
+        return peak
+
+
+@pytest.fixture
+def stub_compilers(tmp_path, monkeypatch) -> StubCompilers:
+    """
+    The stand-in compilers, logging to a file of the test and without delay or failures.
+    """
+    compilers = StubCompilers(monkeypatch, str(tmp_path / 'stub_log.jsonl'))
+    compilers.configure()
+    return compilers
+
+
+@pytest.fixture
+def source_directory(tmp_path) -> str:
+    """
+    A source directory with a few files, one of them in a subdirectory.
+    """
+    source = tmp_path / 'source'
+    (source / 'docs').mkdir(parents=True)
+    (source / 'app.exe').write_bytes(b'application\n')
+    (source / 'readme.txt').write_text('read me\n')
+    (source / 'docs' / 'guide.txt').write_text('guide\n')
+    return str(source)
+
+
+@pytest.fixture
+def source_files() -> List[str]:
+    """
+    The files of ``source_directory``, relative to it.
+    """
+    return ['app.exe', 'readme.txt', os.path.join('docs', 'guide.txt')]
@@ -0,0 +1,139 @@
+import itertools
+import os
+
+import pytest
+
+import core.build_cache
+from core.build_cache import BuildCache
+from core.scheduler import BuildJob, BuildScheduler
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Let the cache's clock advance by one second per reading, so every use of an entry has its own time.
+    """
+    ticks = itertools.count(1_700_000_000)
+
+    class Clock:
+        @staticmethod
+        def time():
+            return float(next(ticks))
+
+    monkeypatch.setattr(core.build_cache, 'time', Clock)
+
+
+def make_artifact(tmp_path, name, size):
+    path = tmp_path / name
+    path.write_bytes(name.encode()[:1] * size)
+    return str(path)
+
+
+def read(path):
+    with open(path, 'rb') as read_file:
+        return read_file.read()
+
+
+def build(source_directory, source_files, output_directory, cache):
+    jobs = [BuildJob(installer_type, source_directory, source_files, 'Product', output_directory)
+            for installer_type in ('MSI', 'EXE')]
+    results = BuildScheduler(max_workers=2, build_cache=cache).run(jobs)
+    assert all(result.success for result in results), [result.error for result in results]
+    return results
+
+
+def compilations(stub_compilers):
+    return {tool: len(stub_compilers.runs(tool)) for tool in ('candle', 'light', 'iscc')}
+
+
+def test_unchanged_build_is_restored_from_the_cache(stub_compilers, source_directory, source_files, tmp_path):
+    output_directory = str(tmp_path / 'out')
+    os.makedirs(output_directory)
+    cache = BuildCache(str(tmp_path / 'cache'))
+    first = build(source_directory, source_files, output_directory, cache)
+    built = {result.output_path: read(result.output_path) for result in first}
+    for path in built:
+        os.remove(path)
+
+    second = build(source_directory, source_files, output_directory, cache)
+
+    assert [result.cached for result in first] == [False, False]
+    assert [result.cached for result in second] == [True, True]
+    assert {result.output_path: read(result.output_path) for result in second} == built
+    assert compilations(stub_compilers) == {'candle': 1, 'light': 1, 'iscc': 1}
+
+
+def test_changed_file_misses_the_cache(stub_compilers, source_directory, source_files, tmp_path):
+    output_directory = str(tmp_path / 'out')
+    os.makedirs(output_directory)
+    cache = BuildCache(str(tmp_path / 'cache'))
+    build(source_directory, source_files, output_directory, cache)
+    with open(os.path.join(source_directory, 'docs', 'guide.txt'), 'a') as guide_file:
+        guide_file.write('changed\n')
+
+    results = build(source_directory, source_files, output_directory, cache)
+
+    assert [result.cached for result in results] == [False, False]
+    # The WiX script did not change, so only the object file of candle is reused.
+    assert compilations(stub_compilers) == {'candle': 1, 'light': 2, 'iscc': 2}
+    assert build(source_directory, source_files, output_directory, cache)[0].cached
+
+
+def test_key_depends_on_the_script_the_files_and_the_compilers(source_directory, source_files, stub_compilers):
+    key = BuildCache.compute_key('script', source_directory, source_files, [stub_compilers.tools['iscc']])
+
+    assert BuildCache.compute_key('script', source_directory, list(reversed(source_files)),
+                                  [stub_compilers.tools['iscc']]) == key
+    assert BuildCache.compute_key('other script', source_directory, source_files,
+                                  [stub_compilers.tools['iscc']]) != key
+    assert BuildCache.compute_key('script', source_directory, source_files[:2], [stub_compilers.tools['iscc']]) != key
+    assert BuildCache.compute_key('script', source_directory, source_files, [stub_compilers.tools['candle']]) != key
+    assert BuildCache.compute_key('script', source_directory, source_files, [stub_compilers.tools['iscc']],
+                                  file_hashes={'readme.txt': 'changed'}) != key
+
+
+def test_least_recently_used_entry_is_evicted_beyond_max_entries(clock, tmp_path):
+    cache = BuildCache(str(tmp_path / 'cache'), max_entries=2)
+    cache.store('first', make_artifact(tmp_path, 'first.msi', 10))
+    cache.store('second', make_artifact(tmp_path, 'second.msi', 10))
+    assert cache.restore('first', str(tmp_path / 'restored.msi'))
+
+    cache.store('third', make_artifact(tmp_path, 'third.msi', 10))
+
+    assert not cache.restore('second', str(tmp_path / 'restored.msi'))
+    assert cache.restore('first', str(tmp_path / 'restored.msi'))
+    assert cache.restore('third', str(tmp_path / 'restored.msi'))
+    assert sorted(os.listdir(cache.directory)) == ['first.msi', 'index.json', 'index.lock', 'third.msi']
+
+
+def test_least_recently_used_entries_are_evicted_beyond_max_bytes(clock, tmp_path):
+    cache = BuildCache(str(tmp_path / 'cache'), max_bytes=100)
+    for name in ('a', 'b', 'c'):
+        cache.store(name, make_artifact(tmp_path, f"{name}.exe", 30))
+    assert cache.restore('a', str(tmp_path / 'restored.exe'))
+
+    cache.store('d', make_artifact(tmp_path, 'd.exe', 50))
+
+    assert cache.total_size() == 80
+    assert [name for name in 'abcd' if cache.restore(name, str(tmp_path / 'restored.exe'))] == ['a', 'd']
+
+
+def test_caches_sharing_a_directory_see_each_others_entries(tmp_path):
+    first = BuildCache(str(tmp_path / 'cache'))
+    second = BuildCache(str(tmp_path / 'cache'))
+    first.store('first', make_artifact(tmp_path, 'first.msi', 10))
+    second.store('second', make_artifact(tmp_path, 'second.msi', 20))
+
+    assert first.restore('second', str(tmp_path / 'restored.msi'))
+    assert read(tmp_path / 'restored.msi') == b's' * 20
+    assert second.total_size() == first.total_size() == 30
+
+
+def test_entry_whose_file_was_removed_is_a_miss(tmp_path):
+    cache = BuildCache(str(tmp_path / 'cache'))
+    cache.store('key', make_artifact(tmp_path, 'app.msi', 10))
+    os.remove(os.path.join(cache.directory, 'key.msi'))
+
+    assert not cache.restore('key', str(tmp_path / 'restored.msi'))
+    assert cache.total_size() == 0
+    assert not os.path.exists(tmp_path / 'restored.msi')
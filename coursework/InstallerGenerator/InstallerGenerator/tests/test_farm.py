@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from core.cancellation import terminate_process_tree
+from core.farm.coordinator import FarmCoordinator
+from core.farm.worker import start_local_workers, stop_local_workers
+from core.scheduler import BuildJob
+
+LEASE_TIMEOUT = 3.0
+STARTUP_TIMEOUT = 30.0
+
+
+class LocalFarm:
+    """
+    A coordinator on localhost and the worker processes connected to it.
+    """
+
+    def __init__(self, tmp_path):
+        self.coordinator = FarmCoordinator(lease_timeout=LEASE_TIMEOUT)
+        self.cache_directory = str(tmp_path / 'cache')
+        self.processes = []
+
+    def start(self, count):
+        self.coordinator.start()
+        self.processes = start_local_workers(self.coordinator.url, count, self.cache_directory)
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while len(self.coordinator.summary()['workers']) < count:
+            assert time.monotonic() < deadline, "the workers did not register"
+            assert all(process.poll() is None for process in self.processes), "a worker exited"
+            time.sleep(0.05)
+
+    def kill(self, name):
+        """
+        Kill a worker and its compilers without letting it tell the coordinator.
+        """
+        process = self.processes[int(name.rsplit('-', 1)[1]) - 1]
+        terminate_process_tree(process)
+        process.wait()
+
+    def close(self):
+        self.coordinator.close()
+        stop_local_workers(self.processes)
+
+
+@pytest.fixture
+def farm(tmp_path, monkeypatch, stub_compilers):
+    """
+    A local farm whose workers build below the test's directory with the stand-in compilers.
+    """
+    # The workers build in a directory below the temporary directory they inherit.
+    monkeypatch.setenv('TMPDIR', str(tmp_path / 'workers'))
+    monkeypatch.setenv('TEMP', str(tmp_path / 'workers'))
+    monkeypatch.setenv('TMP', str(tmp_path / 'workers'))
+    (tmp_path / 'workers').mkdir()
+    local_farm = LocalFarm(tmp_path)
+    yield local_farm
+    local_farm.close()
+
+
+def make_source(tmp_path, name):
+    source = tmp_path / name
+    source.mkdir()
+    (source / 'app.exe').write_bytes(name.encode() * 64)
+    (source / 'readme.txt').write_text(f"{name}\n")
+    return str(source)
+
+
+def make_jobs(source_directory, output_directory, names, installer_types=('MSI', 'EXE')):
+    return [BuildJob(installer_type, source_directory, ['app.exe', 'readme.txt'], name, output_directory)
+            for name in names for installer_type in installer_types]
+
+
+def test_idle_workers_steal_from_the_longest_shard(farm, stub_compilers, tmp_path):
+    stub_compilers.configure(delay=0.2)
+    output_directory = str(tmp_path / 'out')
+    os.makedirs(output_directory)
+    # Jobs of one source directory are sharded to one worker, so this worker gets eight jobs
+    # and the other two get two each.
+    jobs = (make_jobs(make_source(tmp_path, 'large'), output_directory, ['large1', 'large2', 'large3', 'large4'])
+            + make_jobs(make_source(tmp_path, 'small'), output_directory, ['small'])
+            + make_jobs(make_source(tmp_path, 'other'), output_directory, ['other']))
+    farm.start(3)
+
+    results = farm.coordinator.run(jobs, worker_timeout=STARTUP_TIMEOUT)
+
+    assert [result.job for result in results] == jobs
+    assert all(result.success for result in results), [result.error for result in results]
+    for result in results:
+        assert os.path.dirname(result.output_path) == output_directory
+        assert os.path.isfile(result.output_path)
+    summary = farm.coordinator.summary()
+    assert sum(worker['completed'] for worker in summary['workers']) == len(jobs)
+    assert sum(worker['stolen'] for worker in summary['workers']) > 0
+    assert summary['retries'] == 0
+
+    # The workers share one cache; everything they stored, installers and the object files of the
+    # MSI builds, is in its index.
+    with open(os.path.join(farm.cache_directory, 'index.json')) as index_file:
+        index = json.load(index_file)
+    cached_files = {name for name in os.listdir(farm.cache_directory)
+                    if name not in ('index.json', 'index.lock') and not name.endswith('.tmp')}
+    assert len(index) >= len(jobs)
+    assert {entry['file'] for entry in index.values()} == cached_files
+
+
+def test_job_of_a_worker_that_dies_is_built_by_another(farm, stub_compilers, tmp_path):
+    stub_compilers.configure(delay=1.0)
+    output_directory = str(tmp_path / 'out')
+    os.makedirs(output_directory)
+    jobs = make_jobs(make_source(tmp_path, 'source'), output_directory, ['first', 'second', 'third', 'fourth'],
+                     installer_types=('EXE',))
+    farm.start(2)
+    results = []
+    runner = threading.Thread(target=lambda: results.extend(farm.coordinator.run(jobs,
+                                                                               worker_timeout=STARTUP_TIMEOUT)))
+    runner.start()
+
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    victim = None
+    while victim is None:
+        assert time.monotonic() < deadline, "no job was leased"
+        with farm.coordinator._condition:
+            leased = [task.worker_id for task in farm.coordinator._tasks.values() if task.worker_id is not None]
+            if leased:
+                victim = farm.coordinator._workers[leased[0]].name
+        time.sleep(0.05)
+    # Let the compiler of the leased job start before the worker dies.
+    time.sleep(0.5)
+    farm.kill(victim)
+
+    runner.join(timeout=60)
+    assert not runner.is_alive()
+    assert [result.job for result in results] == jobs
+    assert all(result.success for result in results), [result.error for result in results]
+    for result in results:
+        assert os.path.isfile(result.output_path)
+    summary = farm.coordinator.summary()
+    assert summary['retries'] >= 1
+    assert sum(worker['completed'] for worker in summary['workers']) == len(jobs)
+    survivor, = [worker for worker in summary['workers'] if worker['name'] != victim]
+    assert survivor['completed'] >= 3
@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from core.cancellation import CancellationToken
+from core.factories.flyweight import InstallerFlyweight
+
+DELAY = 0.3
+
+
+def quiet(line):
+    pass
+
+
+@pytest.fixture
+def make_flyweight():
+    """
+    Create flyweights that are shut down when the test ends.
+    """
+    flyweights = []
+
+    def make(**kwargs):
+        flyweight = InstallerFlyweight('test', **kwargs)
+        flyweights.append(flyweight)
+        return flyweight
+
+    yield make
+    for flyweight in flyweights:
+        flyweight.shutdown()
+
+
+def compile_command(stub_compilers, tmp_path, name):
+    return [stub_compilers.tools['iscc'], '-o', str(tmp_path / f"{name}.exe")]
+
+
+def test_compilers_stay_within_max_concurrency(stub_compilers, make_flyweight, tmp_path):
+    stub_compilers.configure(delay=DELAY)
+    flyweight = make_flyweight(max_concurrency=2)
+
+    futures = [flyweight.submit(compile_command(stub_compilers, tmp_path, f"setup{index}"), quiet)
+               for index in range(6)]
+    results = [future.result(timeout=30) for future in futures]
+
+    assert [result.returncode for result in results] == [0] * 6
+    assert flyweight.spawned == 6
+    assert stub_compilers.peak_concurrency() == 2
+
+
+def test_async_compilers_stay_within_max_concurrency(stub_compilers, make_flyweight, tmp_path):
+    stub_compilers.configure(delay=DELAY)
+    flyweight = make_flyweight(max_concurrency=2)
+
+    async def compile_all():
+        return await asyncio.gather(*(flyweight.acompile_script(compile_command(stub_compilers, tmp_path,
+                                                                                f"setup{index}"), quiet)
+                                      for index in range(5)))
+
+    results = asyncio.run(compile_all())
+
+    assert [result.returncode for result in results] == [0] * 5
+    assert flyweight.spawned == 5
+    assert stub_compilers.peak_concurrency() == 2
+
+
+def test_submit_blocks_once_max_pending_is_reached(stub_compilers, make_flyweight, tmp_path):
+    stub_compilers.configure(delay=DELAY)
+    flyweight = make_flyweight(max_concurrency=1, max_pending=1)
+    futures = [flyweight.submit(compile_command(stub_compilers, tmp_path, name), quiet)
+               for name in ('running', 'pending')]
+    submitted_at = []
+
+    def submit_third():
+        futures.append(flyweight.submit(compile_command(stub_compilers, tmp_path, 'blocked'), quiet))
+        submitted_at.append(time.monotonic())
+
+    producer = threading.Thread(target=submit_third)
+    producer.start()
+    producer.join(timeout=DELAY / 2)
+    assert producer.is_alive(), "submit returned although the queue was full"
+
+    producer.join(timeout=30)
+    assert not producer.is_alive()
+    assert [future.result(timeout=30).returncode for future in futures] == [0] * 3
+    first = stub_compilers.runs()[0]
+    assert first.mentions('running')
+    # The third compilation was only accepted once the first one had finished.
+    assert submitted_at[0] >= first.end
+    assert stub_compilers.peak_concurrency() == 1
+
+
+def test_compilation_cancelled_while_waiting_for_a_slot_is_not_started(stub_compilers, make_flyweight,
+                                                                        tmp_path):
+    stub_compilers.configure(delay=DELAY * 3)
+    flyweight = make_flyweight(max_concurrency=1)
+    busy = flyweight.submit(compile_command(stub_compilers, tmp_path, 'busy'), quiet)
+    while flyweight.spawned == 0:
+        time.sleep(0.01)
+
+    cancellation = CancellationToken()
+    waiting = []
+    waiter = threading.Thread(target=lambda: waiting.append(
+        flyweight.compile_script(compile_command(stub_compilers, tmp_path, 'waiting'), quiet, cancellation)))
+    waiter.start()
+    time.sleep(InstallerFlyweight.SLOT_POLL_INTERVAL * 2)
+    cancellation.cancel()
+    waiter.join(timeout=InstallerFlyweight.SLOT_POLL_INTERVAL * 5)
+
+    assert not waiter.is_alive(), "the cancelled compilation kept waiting for a slot"
+    assert not busy.done()
+    assert waiting[0].returncode == 1
+    assert busy.result(timeout=30).returncode == 0
+    assert flyweight.spawned == 1
+    assert [run.mentions('busy') for run in stub_compilers.runs()] == [True]
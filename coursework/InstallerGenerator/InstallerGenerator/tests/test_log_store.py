@@ -0,0 +1,132 @@
+import datetime
+import sqlite3
+
+import pytest
+
+from core.log_store import LogStore, parse_time
+from core.telemetry import BuildTelemetry
+
+NOW = 1_700_000_000.0
+DAY = 86400
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / 'logs.db')
+
+
+def add_records(store, ages_in_days, level='INFO', build_id=None):
+    conn = store.connect()
+    try:
+        LogStore.insert(conn, [(f"record {age}", level, f"{level.lower()} message {age}", NOW - age * DAY, build_id)
+                               for age in ages_in_days])
+    finally:
+        conn.close()
+
+
+def add_builds(db, ages_in_days, phases=('script', 'candle', 'light')):
+    """
+    Record a finished build with a few phases per age and return their build IDs in the same order.
+    """
+    telemetry = BuildTelemetry(db)
+    build_ids = []
+    try:
+        for age in ages_in_days:
+            recorder = telemetry.start_build('MSI', f"app{age}")
+            for phase in phases:
+                recorder.record_phase(phase, 0.5)
+            telemetry.write_build(recorder, 'success', NOW - age * DAY, 1.5, 100)
+            build_ids.append(recorder.build_id)
+    finally:
+        telemetry.close()
+    return build_ids
+
+
+def rows(db, query):
+    conn = sqlite3.connect(db)
+    try:
+        return conn.execute(query).fetchall()
+    finally:
+        conn.close()
+
+
+def test_prune_deletes_records_and_builds_older_than_the_retention_period(db):
+    store = LogStore(db, retention_days=30, max_rows=0)
+    add_records(store, [60, 31, 29, 1])
+    old_build, recent_build = add_builds(db, [45, 10])
+
+    deleted = store.prune(now=NOW)
+
+    assert [record['message'] for record in store.query(newest_first=False)] == ['info message 29',
+                                                                                 'info message 1']
+    assert rows(db, "SELECT build_id FROM builds") == [(recent_build,)]
+    assert {build_id for build_id, in rows(db, "SELECT build_id FROM build_phases")} == {recent_build}
+    assert deleted == 2 + 1 + 3
+
+
+def test_prune_keeps_the_newest_rows_of_every_table(db, monkeypatch):
+    monkeypatch.setattr(LogStore, 'DELETE_BATCH_SIZE', 2)
+    store = LogStore(db, retention_days=0, max_rows=3)
+    add_records(store, range(10, 0, -1))
+    build_ids = add_builds(db, range(5, 0, -1))
+
+    store.prune(now=NOW)
+
+    assert [record['message'] for record in store.query(newest_first=False)] == [
+        'info message 3', 'info message 2', 'info message 1']
+    assert sorted(rows(db, "SELECT build_id FROM builds")) == sorted((build_id,) for build_id in build_ids[-3:])
+    assert sorted({build_id for build_id, in rows(db, "SELECT build_id FROM build_phases")}) == sorted(build_ids[-3:])
+
+
+def test_prune_without_build_telemetry_only_deletes_records(db):
+    store = LogStore(db, retention_days=30, max_rows=1)
+    add_records(store, [40, 2, 1])
+
+    assert store.prune(now=NOW) == 2
+    assert [record['message'] for record in store.query()] == ['info message 1']
+
+
+def test_query_filters_by_level_time_build_and_text(db):
+    store = LogStore(db, retention_days=0, max_rows=0)
+    add_records(store, [5, 3, 1])
+    add_records(store, [4, 2], level='ERROR', build_id='build-1')
+    add_records(store, [0.5], level='WARNING', build_id='build-2')
+
+    assert [record['message'] for record in store.query(min_level='warning', newest_first=False)] == [
+        'error message 4', 'error message 2', 'warning message 0.5']
+    assert [record['message'] for record in store.query(since=NOW - 3.5 * DAY, until=NOW - 1.5 * DAY)] == [
+        'error message 2', 'info message 3']
+    assert [record['level'] for record in store.query(build_id='build-1')] == ['ERROR', 'ERROR']
+    assert [record['message'] for record in store.query(contains='message 5')] == ['info message 5']
+    assert [record['message'] for record in store.query(limit=2)] == ['warning message 0.5', 'info message 1']
+    with pytest.raises(ValueError):
+        store.query(min_level='LOUD')
+
+
+def test_schema_of_an_older_database_is_migrated(db):
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE logs (time TEXT, level TEXT, message TEXT)")
+    conn.execute("INSERT INTO logs VALUES ('2024-05-01 12:00:00,123', 'ERROR', 'old record')")
+    conn.commit()
+    conn.close()
+
+    store = LogStore(db, retention_days=0, max_rows=0)
+
+    record, = store.query()
+    assert record['message'] == 'old record'
+    assert record['build_id'] is None
+    # The formatted time is local time.
+    assert record['created'] == pytest.approx(datetime.datetime(2024, 5, 1, 12, 0, 0, 123000).timestamp())
+    indexes = {name for name, in rows(db, "SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {'idx_logs_created', 'idx_logs_level_created', 'idx_logs_build'} <= indexes
+    # Opening the migrated database again changes nothing.
+    LogStore(db, retention_days=0, max_rows=0)
+    assert store.query() == [record]
+
+
+def test_parse_time_accepts_durations_and_iso_times():
+    assert parse_time('90m', now=NOW) == NOW - 90 * 60
+    assert parse_time('7d', now=NOW) == NOW - 7 * DAY
+    assert parse_time('2024-05-01T12:00') == datetime.datetime(2024, 5, 1, 12, 0).timestamp()
+    with pytest.raises(ValueError):
+        parse_time('yesterday')
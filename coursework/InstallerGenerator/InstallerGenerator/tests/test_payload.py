@@ -0,0 +1,67 @@
+import os
+
+import core.preflight
+from core.build_cache import BuildCache
+from core.payload import plan_shared_payloads
+from core.scheduler import BuildJob, BuildScheduler
+
+LARGE_FILE_SIZE = 4096
+
+
+def make_msi_jobs(source_directory, source_files, output_directory, names):
+    os.makedirs(output_directory, exist_ok=True)
+    return [BuildJob('MSI', source_directory, list(source_files), name, output_directory) for name in names]
+
+
+def count_hashes(monkeypatch):
+    """
+    Count the files the pre-flight check hashes.
+    """
+    hashed = []
+    hash_file = core.preflight.hash_file
+
+    def counting_hash_file(path):
+        hashed.append(path)
+        return hash_file(path)
+
+    monkeypatch.setattr(core.preflight, 'hash_file', counting_hash_file)
+    return hashed
+
+
+def test_jobs_sharing_a_large_file_are_planned_together(source_directory, source_files, tmp_path):
+    with open(os.path.join(source_directory, 'app.exe'), 'wb') as large_file:
+        large_file.write(b'x' * LARGE_FILE_SIZE)
+    jobs = make_msi_jobs(source_directory, source_files, str(tmp_path / 'out'), ['first', 'second'])
+    jobs.append(BuildJob('EXE', source_directory, list(source_files), 'third', str(tmp_path / 'out')))
+
+    summary = plan_shared_payloads(jobs, min_size=LARGE_FILE_SIZE)
+
+    assert summary == {'shared_files': 1, 'shared_bytes': LARGE_FILE_SIZE}
+    assert [job.shared_files for job in jobs] == [['app.exe'], ['app.exe'], []]
+    assert jobs[0].preflight_report.files.keys() == set(source_files)
+    assert jobs[2].preflight_report is None
+
+
+def test_builds_reuse_the_pre_flight_check_of_the_payload_planning(stub_compilers, source_directory, source_files,
+                                                                   tmp_path, monkeypatch):
+    hashed = count_hashes(monkeypatch)
+    jobs = make_msi_jobs(source_directory, source_files, str(tmp_path / 'out'), ['first', 'second'])
+
+    results = BuildScheduler(max_workers=2, build_cache=BuildCache(str(tmp_path / 'cache'))).run(jobs)
+
+    assert all(result.success for result in results), [result.error for result in results]
+    # Every job hashes its files once, while the batch is planned, and not again when it is built.
+    assert len(hashed) == len(jobs) * len(source_files)
+
+
+def test_creator_checks_files_again_if_its_file_list_differs(stub_compilers, source_directory, source_files,
+                                                             tmp_path, monkeypatch):
+    jobs = make_msi_jobs(source_directory, source_files, str(tmp_path / 'out'), ['first', 'second'])
+    plan_shared_payloads(jobs)
+    jobs[0].file_list = source_files[:1]
+    hashed = count_hashes(monkeypatch)
+
+    results = BuildScheduler(max_workers=2).run(jobs)
+
+    assert all(result.success for result in results), [result.error for result in results]
+    assert hashed == [os.path.join(source_directory, source_files[0])]
@@ -0,0 +1,99 @@
+import os
+
+import pytest
+
+import core.preflight
+from core.preflight import PreflightError, run_preflight
+from core.scheduler import BuildJob, BuildScheduler
+
+
+def deny_reading(monkeypatch, *paths):
+    """
+    Make os.access report the files as unreadable, also for root, who may read any file.
+    """
+    denied = {os.path.abspath(path) for path in paths}
+    access = os.access
+
+    def denying_access(path, mode, *args, **kwargs):
+        if mode & os.R_OK and os.path.abspath(path) in denied:
+            return False
+        return access(path, mode, *args, **kwargs)
+
+    monkeypatch.setattr(os, 'access', denying_access)
+
+
+def test_report_holds_the_size_and_hash_of_every_file(source_directory, source_files):
+    with open(os.path.join(source_directory, 'copy.txt'), 'w') as copy_file:
+        copy_file.write('read me\n')
+
+    report = run_preflight(source_directory, source_files + ['copy.txt', 'readme.txt'])
+
+    assert report.ok
+    assert sorted(report.files) == sorted(source_files + ['copy.txt'])
+    assert report.total_size() == sum(os.path.getsize(os.path.join(source_directory, file))
+                                      for file in report.files)
+    assert report.file_hashes()['readme.txt'] == report.file_hashes()['copy.txt']
+    assert report.duplicates == [['copy.txt', 'readme.txt']]
+
+
+def test_missing_and_unreadable_files_are_all_reported(source_directory, source_files, monkeypatch):
+    os.mkdir(os.path.join(source_directory, 'folder'))
+    deny_reading(monkeypatch, os.path.join(source_directory, 'readme.txt'))
+    hashed = []
+    monkeypatch.setattr(core.preflight, 'hash_file', hashed.append)
+
+    with pytest.raises(PreflightError) as raised:
+        run_preflight(source_directory, source_files + ['missing.dll', 'folder'])
+
+    assert sorted((issue.path, issue.kind) for issue in raised.value.report.issues) == [
+        ('folder', 'not_a_file'), ('missing.dll', 'missing'), ('readme.txt', 'unreadable')]
+    assert "Pre-flight check failed for 3 file(s):" in str(raised.value)
+    assert "missing: missing.dll (file does not exist)" in str(raised.value)
+    # The check fails before any file is read.
+    assert hashed == []
+
+
+@pytest.mark.skipif(os.name == 'nt' or os.geteuid() == 0, reason="root can read files without read permission")
+def test_file_without_read_permission_is_unreadable(source_directory, source_files):
+    path = os.path.join(source_directory, 'app.exe')
+    os.chmod(path, 0)
+    try:
+        with pytest.raises(PreflightError) as raised:
+            run_preflight(source_directory, source_files)
+    finally:
+        os.chmod(path, 0o644)
+
+    assert [(issue.path, issue.kind) for issue in raised.value.report.issues] == [('app.exe', 'unreadable')]
+
+
+def test_file_that_cannot_be_read_while_hashing_is_unreadable(source_directory, source_files, monkeypatch):
+    hash_file = core.preflight.hash_file
+
+    def failing_hash_file(path):
+        if path.endswith('guide.txt'):
+            raise PermissionError(13, "Permission denied")
+        return hash_file(path)
+
+    monkeypatch.setattr(core.preflight, 'hash_file', failing_hash_file)
+
+    with pytest.raises(PreflightError) as raised:
+        run_preflight(source_directory, source_files)
+
+    issue, = raised.value.report.issues
+    assert (issue.path, issue.kind, issue.message) == (os.path.join('docs', 'guide.txt'), 'unreadable',
+                                                       "Permission denied")
+
+
+def test_build_with_a_missing_file_fails_before_compiling(stub_compilers, source_directory, source_files, tmp_path):
+    output_directory = str(tmp_path / 'out')
+    os.makedirs(output_directory)
+    jobs = [BuildJob(installer_type, source_directory, source_files + ['missing.dll'], 'Product', output_directory)
+            for installer_type in ('MSI', 'EXE')]
+
+    results = BuildScheduler(max_workers=2).run(jobs)
+
+    for result in results:
+        assert not result.success
+        assert "missing: missing.dll" in str(result.error)
+    assert stub_compilers.runs() == []
+    assert os.listdir(output_directory) == []
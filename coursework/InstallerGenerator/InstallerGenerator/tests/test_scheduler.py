@@ -0,0 +1,117 @@
+import asyncio
+import os
+
+import pytest
+
+from core.scheduler import BuildJob, BuildScheduler
+
+DELAY = 0.2
+
+
+def make_jobs(source_directory, source_files, output_directory, names):
+    """
+    One MSI and one EXE job per installer name, all building into ``output_directory``.
+    """
+    os.makedirs(output_directory, exist_ok=True)
+    return [BuildJob(installer_type, source_directory, source_files, name, output_directory)
+            for name in names for installer_type in ('MSI', 'EXE')]
+
+
+def run_scheduler(scheduler, jobs, use_asyncio):
+    if use_asyncio:
+        return asyncio.run(scheduler.arun(jobs))
+    return scheduler.run(jobs)
+
+
+@pytest.mark.parametrize('use_asyncio', [False, True], ids=['run', 'arun'])
+def test_candle_finishes_before_light_starts(stub_compilers, source_directory, source_files, tmp_path, use_asyncio):
+    stub_compilers.configure(delay=DELAY)
+    jobs = make_jobs(source_directory, source_files, str(tmp_path / 'out'), ['alpha', 'beta'])
+
+    results = run_scheduler(BuildScheduler(max_workers=4), jobs, use_asyncio)
+
+    assert [result.job for result in results] == jobs
+    assert all(result.success for result in results), [result.error for result in results]
+    for name in ('alpha', 'beta'):
+        candle, = [run for run in stub_compilers.runs('candle') if run.mentions(f"{name}_")]
+        light, = [run for run in stub_compilers.runs('light') if run.mentions(f"{name}.msi")]
+        assert candle.end <= light.start
+    assert len(stub_compilers.runs('iscc')) == 2
+
+
+@pytest.mark.parametrize('use_asyncio', [False, True], ids=['run', 'arun'])
+def test_failing_job_does_not_stop_the_others(stub_compilers, source_directory, source_files, tmp_path,
+                                              use_asyncio):
+    stub_compilers.configure(fail='light:broken')
+    output_directory = str(tmp_path / 'out')
+    jobs = make_jobs(source_directory, source_files, output_directory, ['good', 'broken', 'other'])
+
+    results = run_scheduler(BuildScheduler(max_workers=2), jobs, use_asyncio)
+
+    by_job = {(result.job.installer_type, result.job.installer_name): result for result in results}
+    failed = by_job.pop(('MSI', 'broken'))
+    assert not failed.success
+    assert failed.output_path is None
+    assert failed.error.startswith("light exited with code 2")
+    assert all(result.success for result in by_job.values()), [result.error for result in by_job.values()]
+    for result in by_job.values():
+        assert os.path.isfile(result.output_path)
+    assert not os.path.exists(os.path.join(output_directory, 'broken.msi'))
+    assert not [name for name in os.listdir(output_directory) if name.endswith('.build')]
+
+
+def test_step_that_fails_stops_its_dependent_steps(stub_compilers, source_directory, source_files, tmp_path):
+    stub_compilers.configure(fail='candle:broken')
+    jobs = make_jobs(source_directory, source_files, str(tmp_path / 'out'), ['broken'])
+
+    msi_result, exe_result = BuildScheduler(max_workers=2).run(jobs)
+
+    assert not msi_result.success
+    assert msi_result.error.startswith("candle exited with code 2")
+    assert 'light' not in msi_result.timings
+    assert not stub_compilers.runs('light')
+    assert exe_result.success
+
+
+def test_results_report_the_time_of_every_phase(stub_compilers, source_directory, source_files, tmp_path):
+    stub_compilers.configure(delay=DELAY)
+    jobs = make_jobs(source_directory, source_files, str(tmp_path / 'out'), ['timed'])
+
+    msi_result, exe_result = BuildScheduler(max_workers=2).run(jobs)
+
+    assert set(msi_result.timings) == {'script', 'candle', 'light'}
+    assert set(exe_result.timings) == {'script', 'iscc'}
+    for result in (msi_result, exe_result):
+        assert result.success and not result.cached
+        assert result.build_id
+        for step in ('candle', 'light', 'iscc'):
+            if step in result.timings:
+                assert result.timings[step] >= DELAY
+        # The steps of a job run one after another, so the job takes at least as long as they do.
+        assert result.duration >= sum(result.timings.values()) - 0.01
+    assert msi_result.output_path == os.path.join(str(tmp_path / 'out'), 'timed.msi')
+    assert exe_result.output_path == os.path.join(str(tmp_path / 'out'), 'timed_installer.exe')
+
+
+def test_jobs_are_reported_as_they_finish(stub_compilers, source_directory, source_files, tmp_path):
+    jobs = make_jobs(source_directory, source_files, str(tmp_path / 'out'), ['one', 'two'])
+    finished = []
+    output = []
+
+    results = BuildScheduler(max_workers=2, on_job_finished=finished.append,
+                             on_output=lambda job, step, line: output.append((job, step))).run(jobs)
+
+    assert len(finished) == len(results)
+    assert {id(result) for result in finished} == {id(result) for result in results}
+    assert {step for _, step in output} == {'candle', 'light', 'iscc'}
+    assert {job for job, _ in output} == set(jobs)
+
+
+def test_cancelled_batch_fails_every_job(stub_compilers, source_directory, source_files, tmp_path):
+    scheduler = BuildScheduler(max_workers=2)
+    scheduler.cancellation.cancel()
+
+    results = scheduler.run(make_jobs(source_directory, source_files, str(tmp_path / 'out'), ['never']))
+
+    assert [result.error for result in results] == [BuildScheduler.CANCELLED_MESSAGE] * 2
+    assert not stub_compilers.runs()
@@ -0,0 +1,146 @@
+import glob
+import os
+import subprocess
+import sys
+import xml.etree.ElementTree as ElementTree
+
+from core.factories.creator_factory import InstallerCreatorFactory
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WIX_NAMESPACE = '{http://schemas.microsoft.com/wix/2006/wi}'
+TREE_FILES = ['root.txt', os.path.join('b', 'c', 'other.txt'), os.path.join('a', 'b', 'c', 'deep.txt'),
+              os.path.join('a', 'top.txt'), os.path.join('a', 'b', 'mid.txt')]
+
+GENERATE_SCRIPTS = """\
+import sys
+sys.path.insert(0, 'tests')
+from test_scripts import generate_scripts
+for script in generate_scripts(*sys.argv[1:4], sys.argv[4:]):
+    sys.stdout.buffer.write(script + b'\\0')
+"""
+
+
+def generate_scripts(source_directory, output_directory, installer_name, file_list):
+    """
+    Write the WiX and the Inno Setup script of an installer and return their contents, without compiling them.
+    """
+    os.makedirs(output_directory, exist_ok=True)
+    msi_creator = InstallerCreatorFactory.creator_class('MSI')(source_directory, output_directory, file_list,
+                                                               installer_name)
+    msi_creator.prepare_build()
+    try:
+        wxs_path, = glob.glob(os.path.join(output_directory, f"{installer_name}_*.build", 'installer.wxs'))
+        with open(wxs_path, 'rb') as wxs_file:
+            wxs = wxs_file.read()
+    finally:
+        msi_creator.remove_build_directory()
+
+    exe_creator = InstallerCreatorFactory.creator_class('EXE')(source_directory, output_directory, file_list,
+                                                               installer_name)
+    exe_creator.prepare_build()
+    with open(os.path.join(output_directory, f"{installer_name}_setup_script.iss"), 'rb') as iss_file:
+        iss = iss_file.read()
+    return wxs, iss
+
+
+def test_scripts_of_identical_inputs_are_byte_identical(stub_compilers, source_directory, source_files, tmp_path):
+    output_directory = str(tmp_path / 'out')
+
+    first = generate_scripts(source_directory, output_directory, 'Product', source_files)
+    second = generate_scripts(source_directory, output_directory, 'Product', source_files)
+    reordered_wxs, _ = generate_scripts(source_directory, output_directory, 'Product', list(reversed(source_files)))
+
+    assert first == second
+    # The WiX elements are ordered by path; Inno Setup installs the files in the order they were given.
+    assert reordered_wxs == first[0]
+    assert not glob.glob(os.path.join(output_directory, '*.build'))
+    assert stub_compilers.runs() == []
+
+
+def test_scripts_do_not_depend_on_the_process_that_generates_them(source_directory, source_files, tmp_path):
+    output_directory = str(tmp_path / 'out')
+    scripts = []
+    for hash_seed in ('1', '2'):
+        environment = dict(os.environ, PYTHONHASHSEED=hash_seed)
+        generated = subprocess.run([sys.executable, '-c', GENERATE_SCRIPTS, source_directory, output_directory,
+                                    'Product', *source_files],
+                                   cwd=PACKAGE_ROOT, env=environment, capture_output=True, check=True)
+        scripts.append(tuple(generated.stdout.split(b'\0')[:2]))
+
+    assert scripts[0] == scripts[1]
+    assert scripts[0] == generate_scripts(source_directory, output_directory, 'Product', source_files)
+
+
+def test_script_identifiers_are_derived_from_the_product_and_its_files(source_directory, source_files, tmp_path):
+    product, = {generate_scripts(source_directory, str(tmp_path / 'out'), 'Product', source_files)[0]
+                for _ in range(2)}
+    renamed, _ = generate_scripts(source_directory, str(tmp_path / 'out'), 'Renamed', source_files)
+    fewer, _ = generate_scripts(source_directory, str(tmp_path / 'out'), 'Product', source_files[:2])
+
+    def guids(wxs):
+        return [line.split(b'Guid="')[1].split(b'"')[0] for line in wxs.splitlines() if b'Guid="' in line]
+
+    def upgrade_code(wxs):
+        return wxs.split(b'UpgradeCode="')[1].split(b'"')[0]
+
+    assert len(set(guids(product))) == len(source_files)
+    assert upgrade_code(renamed) != upgrade_code(product)
+    assert set(guids(renamed)).isdisjoint(guids(product))
+    assert upgrade_code(fewer) == upgrade_code(product)
+    assert set(guids(fewer)) < set(guids(product))
+
+
+def make_tree(tmp_path):
+    source = tmp_path / 'tree'
+    for file in TREE_FILES:
+        (source / file).parent.mkdir(parents=True, exist_ok=True)
+        (source / file).write_text(f"{file}\n")
+    return str(source)
+
+
+def installed_files(directory, path=()):
+    """
+    Map the installed path of every file below a WiX <Directory> element to its source, and collect the directory IDs.
+    """
+    files, directory_ids = {}, [directory.get('Id')]
+    for child in directory:
+        if child.tag == WIX_NAMESPACE + 'Directory':
+            child_files, child_ids = installed_files(child, path + (child.get('Name'),))
+            files.update(child_files)
+            directory_ids.extend(child_ids)
+        elif child.tag == WIX_NAMESPACE + 'Component':
+            file, = child.iter(WIX_NAMESPACE + 'File')
+            files['/'.join(path + (os.path.basename(file.get('Source')),))] = file.get('Source')
+    return files, directory_ids
+
+
+def test_wix_script_nests_a_directory_per_subdirectory(tmp_path):
+    wxs, _ = generate_scripts(make_tree(tmp_path), str(tmp_path / 'out'), 'Product', TREE_FILES)
+
+    install_folder, = [directory for directory in ElementTree.fromstring(wxs).iter(WIX_NAMESPACE + 'Directory')
+                       if directory.get('Id') == 'INSTALLFOLDER']
+    files, directory_ids = installed_files(install_folder)
+
+    assert files == {file.replace(os.sep, '/'): file for file in TREE_FILES}
+    # INSTALLFOLDER, a, a/b, a/b/c, b and b/c each have their own identifier.
+    assert len(set(directory_ids)) == len(directory_ids) == 6
+    assert [child.get('Name') for child in install_folder if child.tag == WIX_NAMESPACE + 'Directory'] == ['a', 'b']
+
+
+def test_inno_setup_script_installs_files_into_their_subdirectories(tmp_path):
+    source_directory = make_tree(tmp_path)
+
+    _, iss = generate_scripts(source_directory, str(tmp_path / 'out'), 'Product', TREE_FILES)
+
+    destinations = {}
+    for line in iss.decode().splitlines():
+        if line.startswith('Source: '):
+            source, destination = line.split('"')[1], line.split('"')[3]
+            destinations[os.path.relpath(source, source_directory)] = destination
+    assert destinations == {
+        'root.txt': '{app}',
+        os.path.join('b', 'c', 'other.txt'): '{app}\\b\\c',
+        os.path.join('a', 'b', 'c', 'deep.txt'): '{app}\\a\\b\\c',
+        os.path.join('a', 'top.txt'): '{app}\\a',
+        os.path.join('a', 'b', 'mid.txt'): '{app}\\a\\b',
+    }
@@ -0,0 +1,89 @@
+import os
+
+import pytest
+
+from core.templates.engine import Template, TemplateError, load_template
+from core.templates.escaping import escape_inno, escape_inno_directive, escape_xml
+from test_scripts import generate_scripts
+
+
+class Item:
+    def __init__(self, name):
+        self.name = name
+
+
+def test_escape_xml_replaces_markup_and_quotes():
+    assert escape_xml('plain text') == 'plain text'
+    assert escape_xml('<a href="x">Tom & Jerry\'s</a>') == (
+        '&lt;a href=&quot;x&quot;&gt;Tom &amp; Jerry&apos;s&lt;/a&gt;')
+    assert escape_xml('{app}') == '{app}'
+
+
+def test_escape_inno_doubles_quotes_and_opening_braces():
+    assert escape_inno('plain text') == 'plain text'
+    assert escape_inno('My "App" {x}') == 'My ""App"" {{x}'
+    assert escape_inno('<&>') == '<&>'
+
+
+def test_escape_inno_directive_only_doubles_opening_braces():
+    assert escape_inno_directive('plain text') == 'plain text'
+    assert escape_inno_directive('My "App" {x}') == 'My "App" {{x}'
+
+
+def test_values_are_escaped_with_the_template_escaping_unless_a_filter_is_given():
+    source = '{{ name }}|{{ name|raw }}|{{ name|inno_directive }}|{% for item in items %}{{ item.name }};{% endfor %}'
+    context = {'name': 'A "b" {c} & <d>', 'items': [Item('"x"'), Item('{y}')]}
+
+    assert Template(source, escape='xml').render_to_string(context) == (
+        'A &quot;b&quot; {c} &amp; &lt;d&gt;|A "b" {c} & <d>|A "b" {{c} & <d>|&quot;x&quot;;{y};')
+    assert Template(source, escape='inno').render_to_string(context) == (
+        'A ""b"" {{c} & <d>|A "b" {c} & <d>|A "b" {{c} & <d>|""x"";{{y};')
+
+
+def test_block_lines_are_removed_and_conditions_are_evaluated():
+    template = Template("{% for item in items %}\n{% if item.name %}\n{{ item.name }}\n{% else %}\n-\n"
+                        "{% endif %}\n{% endfor %}\n{# the end #}\n")
+
+    assert template.render_to_string({'items': [Item('a'), Item(''), {'name': 'c'}]}) == "a\n-\nc\n"
+
+
+def test_unknown_names_raise_template_errors():
+    with pytest.raises(TemplateError, match="Unknown escaping 'html'"):
+        Template('{{ name }}', escape='html')
+    with pytest.raises(TemplateError, match='upper'):
+        Template('{{ name|upper }}')
+    with pytest.raises(TemplateError, match="unknown tag 'while x'"):
+        Template('{% while x %}')
+    with pytest.raises(TemplateError, match="Undefined template variable 'name'"):
+        Template('{{ name }}').render_to_string({})
+    with pytest.raises(TemplateError, match='size'):
+        Template('{{ item.size }}').render_to_string({'item': Item('a')})
+
+
+def test_template_file_is_reloaded_when_it_changes(tmp_path):
+    path = tmp_path / 'custom.iss'
+    path.write_text('AppName={{ name }}\n')
+    first = load_template(str(path))
+
+    assert load_template(str(path)) is first
+    assert first.render_to_string({'name': '"{x}"'}) == 'AppName=""{{x}""\n'
+
+    path.write_text('AppName={{ name|inno_directive }}!\n')
+    os.utime(path, ns=(0, 0))
+    assert load_template(str(path)).render_to_string({'name': '"{x}"'}) == 'AppName="{{x}"!\n'
+    with pytest.raises(TemplateError, match='Cannot tell how to escape'):
+        load_template(str(tmp_path / 'custom.txt'))
+
+
+def test_scripts_escape_names_with_quotes_and_braces(source_directory, tmp_path):
+    with open(os.path.join(source_directory, 'say "hi" {now}.txt'), 'w') as quoted_file:
+        quoted_file.write('hi\n')
+
+    wxs, iss = generate_scripts(source_directory, str(tmp_path / 'out'), 'My "App" {x} & Co',
+                                ['app.exe', 'say "hi" {now}.txt'])
+
+    assert b'Name="My &quot;App&quot; {x} &amp; Co"' in wxs
+    assert b'<File Id="say__hi___now_.txt_' in wxs
+    assert b'Source="say &quot;hi&quot; {now}.txt"' in wxs
+    assert b'\nAppName=My "App" {{x} & Co\n' in iss
+    assert b'say ""hi"" {{now}.txt"; DestDir: "{app}"' in iss
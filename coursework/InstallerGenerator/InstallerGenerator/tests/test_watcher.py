@@ -0,0 +1,170 @@
+import json
+import os
+import queue
+import threading
+import time
+
+from core.batch import BatchManifest
+from core.watcher import ChangeWatcher, RebuildLoop
+
+DEBOUNCE = 0.2
+TIMEOUT = 10.0
+
+
+class StubWatcher(ChangeWatcher):
+    """
+    A watcher that reports the changes a test pushes, mapped to their roots like the real watchers.
+    """
+
+    def __init__(self, directories):
+        super().__init__(directories)
+        self._changes = queue.Queue()
+
+    def push(self, *paths):
+        self._changes.put({self._root_of(os.path.abspath(path)) for path in paths} - {None})
+
+    def wait(self, timeout):
+        try:
+            return self._changes.get(timeout=timeout)
+        except queue.Empty:
+            return set()
+
+
+class RecordingRebuild:
+    """
+    Records the directories of every successful rebuild; each rebuild takes ``duration`` seconds.
+
+    Like the rebuild of the command line, it looks the directories up in ``scanners``, if given.
+    The first ``failures`` rebuilds raise an error.
+    """
+
+    def __init__(self, duration=0.0, scanners=None, failures=0):
+        self.duration = duration
+        self.scanners = scanners
+        self.failures = failures
+        self.attempts = 0
+        self.calls = []
+        self.called = threading.Condition()
+
+    def __call__(self, directories):
+        with self.called:
+            self.attempts += 1
+            self.called.notify_all()
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("compiler not found")
+        if self.scanners is not None:
+            for directory in directories:
+                self.scanners[directory]
+        time.sleep(self.duration)
+        with self.called:
+            self.calls.append(set(directories))
+            self.called.notify_all()
+
+    def wait_for(self, count):
+        with self.called:
+            assert self.called.wait_for(lambda: len(self.calls) >= count, TIMEOUT), self.calls
+
+
+def run_loop(loop):
+    stop = threading.Event()
+    thread = threading.Thread(target=loop.run, args=(stop,), daemon=True)
+    thread.start()
+    return stop, thread
+
+
+def stop_loop(stop, thread):
+    stop.set()
+    thread.join(TIMEOUT)
+    assert not thread.is_alive()
+
+
+def write_manifest(tmp_path, sources):
+    path = tmp_path / 'batch.json'
+    path.write_text(json.dumps({'installers': [{'name': f"app{position}", 'type': 'MSI', 'source': source,
+                                                'output': 'out'} for position, source in enumerate(sources)]}))
+    return str(path)
+
+
+def test_manifest_sources_match_the_directories_the_watcher_reports(tmp_path, caplog):
+    for name in ('src', 'other'):
+        (tmp_path / name).mkdir()
+    batch = BatchManifest.load(write_manifest(tmp_path, ['src/', './other', str(tmp_path / 'src')]))
+    scanners = batch.create_scanners(index_directory=None)
+    watcher = StubWatcher(scanners)
+    rebuild = RecordingRebuild(scanners=scanners)
+    loop = RebuildLoop(watcher, rebuild, debounce=DEBOUNCE)
+    stop, thread = run_loop(loop)
+
+    watcher.push(tmp_path / 'src' / 'app.exe', tmp_path / 'other' / 'readme.txt')
+    rebuild.wait_for(1)
+    stop_loop(stop, thread)
+
+    assert sorted(scanners) == sorted([str(tmp_path / 'src'), str(tmp_path / 'other')])
+    assert rebuild.calls == [{str(tmp_path / 'src'), str(tmp_path / 'other')}]
+    assert 'failed' not in caplog.text
+
+
+def test_burst_of_changes_triggers_one_rebuild(tmp_path):
+    watcher = StubWatcher([tmp_path])
+    rebuild = RecordingRebuild()
+    loop = RebuildLoop(watcher, rebuild, debounce=DEBOUNCE)
+    stop, thread = run_loop(loop)
+
+    for _ in range(5):
+        watcher.push(tmp_path / 'app.exe')
+        time.sleep(DEBOUNCE / 5)
+    rebuild.wait_for(1)
+    time.sleep(DEBOUNCE * 2)
+    stop_loop(stop, thread)
+
+    assert rebuild.calls == [{str(tmp_path)}]
+    assert loop.changes == 5
+    assert loop.rebuilds == 1
+
+
+def test_changes_during_a_rebuild_are_coalesced_into_one_follow_up(tmp_path):
+    first, second = tmp_path / 'first', tmp_path / 'second'
+    watcher = StubWatcher([first, second])
+    rebuild = RecordingRebuild(duration=DEBOUNCE * 4)
+    loop = RebuildLoop(watcher, rebuild, debounce=DEBOUNCE)
+    stop, thread = run_loop(loop)
+
+    watcher.push(first / 'app.exe')
+    while loop.rebuilds == 0:
+        time.sleep(0.01)
+    watcher.push(first / 'app.exe')
+    watcher.push(second / 'readme.txt')
+    watcher.push(first / 'docs' / 'guide.txt')
+    rebuild.wait_for(2)
+    time.sleep(DEBOUNCE * 2)
+    stop_loop(stop, thread)
+
+    assert rebuild.calls == [{str(first)}, {str(first), str(second)}]
+    assert loop.rebuilds == 2
+
+
+def test_failed_rebuild_is_logged_and_watching_continues(tmp_path, caplog):
+    watcher = StubWatcher([tmp_path])
+    rebuild = RecordingRebuild(failures=1)
+    loop = RebuildLoop(watcher, rebuild, debounce=DEBOUNCE)
+    stop, thread = run_loop(loop)
+
+    watcher.push(tmp_path / 'app.exe')
+    with rebuild.called:
+        assert rebuild.called.wait_for(lambda: rebuild.attempts == 1, TIMEOUT)
+    watcher.push(tmp_path / 'app.exe')
+    rebuild.wait_for(1)
+    stop_loop(stop, thread)
+
+    assert f"Rebuild of {tmp_path} failed: compiler not found" in caplog.text
+    assert rebuild.calls == [{str(tmp_path)}]
+    assert loop.rebuilds == 2
+
+
+def test_changes_in_ignored_directories_are_not_reported(tmp_path):
+    watcher = StubWatcher([tmp_path])
+    watcher.ignored = [str(tmp_path / 'out')]
+
+    assert watcher._root_of(str(tmp_path / 'out' / 'app.msi')) is None
+    assert watcher._root_of(str(tmp_path / 'outside.txt')) == str(tmp_path)
@@ -0,0 +1,85 @@
+import hashlib
+import os
+
+import pytest
+
+from core.wix_ids import (MAX_IDENTIFIER_LENGTH, IdentifierAllocator, IdentifierError, is_valid_identifier,
+                          sanitize_identifier)
+from test_scripts import generate_scripts
+
+
+def sha1(key):
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def test_valid_names_are_used_as_they_are():
+    allocator = IdentifierAllocator()
+
+    assert allocator.allocate('app.exe', 'app.exe') == 'app.exe'
+    assert allocator.allocate('_Readme_1.txt', 'docs/_Readme_1.txt') == '_Readme_1.txt'
+    assert 'APP.EXE' in allocator
+    assert len(allocator) == 2
+
+
+def test_names_differing_only_in_case_collide():
+    allocator = IdentifierAllocator()
+
+    assert allocator.allocate('Readme.txt', 'a/Readme.txt') == 'Readme.txt'
+    assert allocator.allocate('README.TXT', 'b/README.TXT') == f"README.TXT_{sha1('b/README.TXT')[:8]}"
+    assert allocator.allocate('readme.txt', 'c/readme.txt') == f"readme.txt_{sha1('c/readme.txt')[:8]}"
+    assert len(allocator) == 3
+
+
+def test_suffix_grows_while_the_identifier_is_taken():
+    key = 'b/app.exe'
+    digest = sha1(key)
+    allocator = IdentifierAllocator(reserved=['app.exe', f"APP.EXE_{digest[:8]}"])
+
+    assert allocator.allocate('app.exe', key) == f"app.exe_{digest[:16]}"
+    assert allocator.allocate('app.exe', key) == f"app.exe_{digest}"
+    with pytest.raises(IdentifierError, match="b/app.exe"):
+        allocator.allocate('app.exe', key)
+
+
+def test_invalid_names_are_sanitized_and_suffixed():
+    allocator = IdentifierAllocator()
+
+    assert allocator.allocate('my app (1).exe', 'my app (1).exe') == f"my_app__1_.exe_{sha1('my app (1).exe')[:8]}"
+    assert allocator.allocate('1st.txt', '1st.txt') == f"_1st.txt_{sha1('1st.txt')[:8]}"
+    assert allocator.allocate('café.txt', 'café.txt') == f"caf_.txt_{sha1('café.txt')[:8]}"
+
+
+def test_long_names_are_shortened_to_the_maximum_length():
+    name = 'a' * 100 + '.txt'
+    allocator = IdentifierAllocator(reserved=['a' * 71])
+
+    assert not is_valid_identifier(name)
+    identifier = allocator.allocate(name, name)
+    assert len(identifier) == MAX_IDENTIFIER_LENGTH
+    assert identifier == f"{'a' * (MAX_IDENTIFIER_LENGTH - 9)}_{sha1(name)[:8]}"
+    assert is_valid_identifier(identifier)
+    assert allocator.allocate('a' * 71, 'other') == f"{'a' * (MAX_IDENTIFIER_LENGTH - 9)}_{sha1('other')[:8]}"
+
+
+def test_identifier_rules():
+    assert is_valid_identifier('_a.b_1')
+    assert not is_valid_identifier('1a')
+    assert not is_valid_identifier('a-b')
+    assert not is_valid_identifier('')
+    assert is_valid_identifier('a' * MAX_IDENTIFIER_LENGTH)
+    assert not is_valid_identifier('a' * (MAX_IDENTIFIER_LENGTH + 1))
+    assert sanitize_identifier('') == '_'
+    assert sanitize_identifier('.hidden') == '_.hidden'
+
+
+def test_script_gives_files_differing_only_in_case_distinct_identifiers(source_directory, tmp_path):
+    for name in ('Readme.txt', 'README.TXT'):
+        with open(os.path.join(source_directory, name), 'w') as readme_file:
+            readme_file.write(f"{name}\n")
+
+    wxs, _ = generate_scripts(source_directory, str(tmp_path / 'out'), 'Product',
+                              ['readme.txt', 'Readme.txt', 'README.TXT'])
+
+    identifiers = [line.split(b'<File Id="')[1].split(b'"')[0] for line in wxs.splitlines() if b'<File Id="' in line]
+    assert len(identifiers) == 3
+    assert len({identifier.lower() for identifier in identifiers}) == 3